@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 완료 게시판 묶음 전송 버퍼
+# - 종료된 분배 임베드를 채널별로 잠시(window초) 모았다가 메시지 1통에 여러 개(embeds=[...])로 게시
+# - 한 통에는 임베드 최대 10개, 임베드 글자 수 합계 6000자까지 (Discord 메시지당 제한)
+#   → 꽉 차면 기한을 기다리지 않고 바로 내보내고, 넘칠 것 같으면 지금까지 모은 것부터 내보냄
+# - 기한 관리는 DelayedActions(타이머 힙)에 맡김 (DigestBuffer와 같은 방식)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+from typing import Any, Callable, Dict, List
+
+from timers import DelayedActions
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+class ArchiveBuffer:
+    """
+    add(channel_id, embed): 채널 버퍼에 추가. 버퍼가 비어 있었으면 window초 뒤 기한을 잡는다.
+    내보낼 때 on_batch(channel_id, embeds)를 호출 (추가 순서 유지).
+    size_of: 임베드 글자 수 (discord.Embed는 len()이 제한 계산과 같은 값)
+    """
+
+    def __init__(self, timers: DelayedActions, on_batch: Callable[[int, List[Any]], None], window: float,
+                 max_entries: int = MAX_EMBEDS_PER_MESSAGE, max_chars: int = MAX_EMBED_CHARS_PER_MESSAGE,
+                 size_of: Callable[[Any], int] = len):
+        self.timers = timers
+        self.on_batch = on_batch
+        self.window = window
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.size_of = size_of
+        self._pending: Dict[int, List[Any]] = {}
+        self._chars: Dict[int, int] = {}
+        # 누적 계측값 (게시 수 / 완료 수 = 완료 1건당 게시 메시지 수)
+        self.added = 0
+        self.posts = 0
+
+    def __len__(self) -> int:
+        """게시 대기 중인 임베드 수"""
+        return sum(len(v) for v in self._pending.values())
+
+    def add(self, channel_id: int, entry: Any):
+        self.added += 1
+        size = self.size_of(entry)
+        if channel_id in self._pending and self._chars[channel_id] + size > self.max_chars:
+            self._flush(channel_id)
+        entries = self._pending.get(channel_id)
+        if entries is None:
+            entries = self._pending[channel_id] = []
+            self._chars[channel_id] = 0
+            self.timers.call_later(self.window, lambda: self._flush(channel_id), group=("archive", channel_id))
+        entries.append(entry)
+        self._chars[channel_id] += size
+        if len(entries) >= self.max_entries:
+            self._flush(channel_id)
+
+    def flush_all(self):
+        """종료 시 등: 기한을 기다리지 않고 모두 내보냄"""
+        for channel_id in list(self._pending):
+            self._flush(channel_id)
+
+    def _flush(self, channel_id: int):
+        self.timers.cancel_group(("archive", channel_id))
+        entries = self._pending.pop(channel_id, None)
+        self._chars.pop(channel_id, None)
+        if entries:
+            self.posts += 1
+            self.on_batch(channel_id, entries)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 분배 레코드 메모리 벤치마크
+# - Distribution 레코드 N개(대상자 10명, 아이템/가격 문자열 포함)를 만들고
+#   tracemalloc으로 잰 증가량을 분배 1건당 바이트로 보고
+# - distribution_data 딕셔너리 슬롯 비용까지 포함
+# 실행: python bench/bench_distribution_memory.py [N]
+# ------------------------------------------------------------
+
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from distribution import Distribution  # noqa: E402
+
+
+def make_snowflake(rng: random.Random) -> int:
+    # 2020~2026년대 디스코드 ID 범위 (60비트 안팎)
+    return rng.randrange(700_000_000_000_000_000, 1_400_000_000_000_000_000)
+
+
+def main(n: int = 50_000, recipients: int = 10):
+    rng = random.Random(42)
+    # 입력 문자열은 측정 전에 미리 만들어 둔다 (아이템 이름은 실제로도 명령에서 넘어오는 값)
+    items = [f"테스트 아이템 {i % 500}" for i in range(n)]
+    ids = [[make_snowflake(rng) for _ in range(recipients)] for _ in range(n)]
+    now = time.time()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    data = {}
+    for i in range(n):
+        msg_id = make_snowflake(rng)
+        d = Distribution(msg_id, 1, 2, ids[i][0], ids[i], items[i], now)
+        d.set_received(i % recipients, True)
+        data[msg_id] = d
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per = (after - before) / n
+    print(f"분배 {n:,}건 (대상자 {recipients}명): 총 {(after - before) / 1024 / 1024:.1f} MiB, "
+          f"건당 {per:.0f} B (peak {(peak - before) / 1024 / 1024:.1f} MiB)")
+    return per
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 장기 실행 소크 벤치마크: 쿨다운/DM 기록 맵의 메모리
+# - 가짜 시계로 수 주를 시뮬레이션 (시간당 분배 N건, 대상자 10명, 사람마다 리액션 1~3회,
+#   분배는 10~60분 뒤 종료, 종료된 분배의 일부는 판매 → 대상자 DM 기록)
+# - 예전 방식(dict, 정리 없음)과 ExpiringMap(만료 + 분배 종료 시 그룹 삭제)을 같은 이벤트로 돌리고
+#   하루마다 항목 수와 tracemalloc 기준 메모리를 비교
+# 실행: python bench/bench_expiring_soak.py [일수] [시간당 분배 수]
+# ------------------------------------------------------------
+
+import heapq
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from expiring import ExpiringMap  # noqa: E402
+
+REACTION_COOLDOWN = 1.5
+DM_MIN_INTERVAL = 300.0
+USER_POOL = 50_000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(days: int, per_hour: int, expiring: bool):
+    rng = random.Random(42)
+    clock = FakeClock()
+    if expiring:
+        reaction_ts = ExpiringMap(REACTION_COOLDOWN, clock=clock, group_of=lambda k: k[0])
+        user_dm = ExpiringMap(DM_MIN_INTERVAL, resolution=60.0, clock=clock)
+    else:
+        reaction_ts = {}
+        user_dm = {}
+
+    # (시각, 순번, 종류, 데이터) 이벤트 힙. 시간 단위로 생성해 힙은 작게 유지 (측정 잡음 방지)
+    events = []
+    counter = iter(range(1 << 62))
+    msg_ids = iter(range(1, 1 << 62))
+
+    def spawn_hour(hour: int):
+        for _ in range(per_hour):
+            msg_id = next(msg_ids)
+            start = hour * 3600 + rng.uniform(0, 3600)
+            recipients = rng.sample(range(USER_POOL), 10)
+            for uid in recipients:
+                for _ in range(rng.randint(1, 3)):
+                    heapq.heappush(events, (start + rng.uniform(0, 600), next(counter), "react", (msg_id, uid)))
+            heapq.heappush(events, (start + rng.uniform(600, 3600), next(counter), "end", (msg_id, recipients)))
+
+    spawn_hour(0)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    samples = []
+    next_day = 86400.0
+    next_hour = 1
+    while events:
+        if next_hour < days * 24 and events[0][0] >= next_hour * 3600 - 3600:
+            spawn_hour(next_hour)
+            next_hour += 1
+            continue
+        t, _, kind, data = heapq.heappop(events)
+        while t >= next_day:
+            samples.append((len(reaction_ts), len(user_dm), (tracemalloc.get_traced_memory()[0] - base) / 1024 / 1024))
+            next_day += 86400.0
+        clock.now = t
+        if kind == "react":
+            key = data
+            if expiring:
+                if key not in reaction_ts:
+                    reaction_ts[key] = t
+            elif t - reaction_ts.get(key, 0.0) >= REACTION_COOLDOWN:
+                reaction_ts[key] = t
+        else:
+            mid, recipients = data
+            if expiring:
+                reaction_ts.discard_group(mid)
+            if rng.random() < 0.3:   # 판매 → 대상자 DM 기록
+                for uid in recipients:
+                    user_dm[uid] = t
+    samples.append((len(reaction_ts), len(user_dm), (tracemalloc.get_traced_memory()[0] - base) / 1024 / 1024))
+    tracemalloc.stop()
+    return samples
+
+
+def main(days: int = 28, per_hour: int = 30):
+    old = simulate(days, per_hour, expiring=False)
+    new = simulate(days, per_hour, expiring=True)
+    print(f"{days}일 시뮬레이션, 시간당 분배 {per_hour}건 (대상자 10명, 사용자 풀 {USER_POOL:,}명)")
+    print(f"{'일':>4} | {'dict 리액션':>11} {'dict DM':>8} {'MiB':>7} | {'만료맵 리액션':>12} {'만료맵 DM':>9} {'MiB':>7}")
+    for day, (o, n) in enumerate(zip(old, new), 1):
+        if day in (1, 2, 7, 14, 21, 28) or day == len(old):
+            print(f"{day:>4} | {o[0]:>11,} {o[1]:>8,} {o[2]:>7.2f} | {n[0]:>12,} {n[1]:>9,} {n[2]:>7.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 28, int(sys.argv[2]) if len(sys.argv) > 2 else 30)
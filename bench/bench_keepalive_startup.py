@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# keepalive 서버 기동 비용 비교 (Flask 스레드 vs 같은 루프의 aiohttp)
+# - 변형마다 새 프로세스에서: aiohttp import(= discord.py가 어차피 올리는 것) 후
+#   서버 기동 → 첫 GET / 200까지 걸린 시간, 그 사이 늘어난 RSS, 스레드 수를 잰다
+# - Flask 변형은 예전 keep_alive()와 같은 방식 (app.run을 별도 스레드로)
+# 실행: python bench/bench_keepalive_startup.py [반복 횟수]
+# ------------------------------------------------------------
+
+import json
+import os
+import subprocess
+import sys
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = r'''
+import asyncio, json, os, socket, sys, threading, time, urllib.request
+import aiohttp  # discord.py 의존성 (양쪽 공통 비용)
+
+def rss_mib():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+def free_port():
+    s = socket.socket(); s.bind(("127.0.0.1", 0)); p = s.getsockname()[1]; s.close(); return p
+
+def wait_200(port):
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.002)
+
+variant = sys.argv[1]
+port = free_port()
+base_rss = rss_mib()
+t0 = time.perf_counter()
+
+if variant == "flask":
+    import logging
+    logging.getLogger("werkzeug").disabled = True
+    from flask import Flask
+    app = Flask("")
+    @app.route("/")
+    def home():
+        return "I'm alive!"
+    threading.Thread(target=lambda: app.run(host="127.0.0.1", port=port), daemon=True).start()
+    wait_200(port)
+    elapsed = time.perf_counter() - t0
+else:
+    sys.path.insert(0, sys.argv[2])
+    from keepalive import HealthServer
+    async def main():
+        srv = HealthServer("127.0.0.1", port, lambda: (True, {}), lambda: "", lambda: {})
+        await srv.start()
+        await asyncio.to_thread(wait_200, port)
+        e = time.perf_counter() - t0
+        await srv.close()
+        return e
+    elapsed = asyncio.run(main())
+
+print(json.dumps({"elapsed": elapsed, "rss_delta": rss_mib() - base_rss,
+                  "threads": threading.active_count(),
+                  "flask_loaded": "flask" in sys.modules, "werkzeug_loaded": "werkzeug" in sys.modules}))
+'''
+
+
+def run(variant: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, variant, ROOT], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(repeat: int = 5):
+    for variant in ("flask", "aiohttp"):
+        results = [run(variant) for _ in range(repeat)]
+        ms = statistics.median(r["elapsed"] for r in results) * 1000
+        rss = statistics.median(r["rss_delta"] for r in results)
+        last = results[-1]
+        print(f"{variant:<8} 첫 200까지 {ms:7.1f} ms | RSS +{rss:5.1f} MiB | 스레드 {last['threads']} | "
+              f"flask 로드={last['flask_loaded']} werkzeug 로드={last['werkzeug_loaded']}  (중앙값, {repeat}회)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
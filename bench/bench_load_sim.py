@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 오프라인 부하 시뮬레이션: 실제 MyBot을 가짜 Discord(bench/fake_discord.py)에 붙여 피크 시간대를 재현
+# - 워크로드(JSONL, 한 줄에 동작 1개)를 시각에 맞춰 재생:
+#     {"t": 초, "op": "post",    "post": 라벨, "channel": n, "author": n, "recipients": [n, ...], "item": "..."}
+#     {"t": 초, "op": "react" | "unreact", "post": 라벨, "user": n, "emoji": "1️⃣"}
+#     {"t": 초, "op": "price",   "post": 라벨, "user": n, "price": "..."}          (!판매 <메시지ID> <금액>)
+#     {"t": 초, "op": "list",    "user": n, "channel": n}                          (/분배중)
+#     {"t": 초, "op": "optin",   "user": n, "channel": n}                          (!알림동의)
+#   user/channel/author는 가짜 길드의 사용자/채널 번호. 같은 post의 동작은 순서대로,
+#   게시글이 아직 안 보이면 보일 때까지 기다렸다가 재생 (실제 사용자도 못 누르므로)
+#   녹화된 트레이스도 이 형식으로 바꾸면 그대로 재생 가능, 파일을 안 주면 피크 시간대 합성 워크로드 생성
+# - 보고: 명령 → 게시글 표시 / 리액션 → 임베드 반영 / 리액션 → 종료(원본 삭제) 지연 백분위,
+#         시간대별 쓰기 큐 깊이, 분배당 REST 호출 수(경로별), 429 수, 완료 게시판 메시지 수(완료당),
+#         봇 쪽 재시도·재조정 지표
+# 실행: python bench/bench_load_sim.py [trace.jsonl] [--posts N] [--window 초] [--seed N]
+#       [--shared-429 확률] [--lazy] [--save-trace 경로] [-v]
+# ------------------------------------------------------------
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_discord import FakeDiscord  # noqa: E402
+
+NUMBER_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
+ITEM_RE = re.compile(r"🎁 아이템명 : (.+)")
+VISIBLE_TIMEOUT = 30.0
+
+
+# ================== 워크로드 ==================
+def generate_trace(posts: int, window: float, users: int, channels: int, seed: int) -> List[dict]:
+    """
+    피크 시간대 합성 워크로드: window초 동안 posts건의 !분배, 게시 직후 대상자 리액션 폭주
+    (일부는 빠른 토글·남의 번호 실수 → 쿨다운에 걸림), 일부 판매금액 등록/💰, 미완료분 ✅ 강제 종료, /분배중 조회.
+    """
+    rng = random.Random(seed)
+    ops: List[dict] = []
+    for u in rng.sample(range(users), users // 10):   # 알림동의는 가끔씩 여러 채널에서
+        ops.append({"t": rng.uniform(0, window), "op": "optin", "user": u, "channel": rng.randrange(channels)})
+    for n in range(posts):
+        label = f"p{n}"
+        t0 = 3.0 + rng.uniform(0, window)
+        author = rng.randrange(users)
+        recipients = rng.sample(range(users), rng.randint(3, 10))
+        ops.append({"t": t0, "op": "post", "post": label, "channel": rng.randrange(channels), "author": author,
+                    "recipients": recipients, "item": f"{label} 아이템"})
+        finish_all = rng.random() < 0.6
+        for i, u in enumerate(recipients):
+            if not finish_all and rng.random() < 0.3:
+                continue
+            t = t0 + 1.0 + rng.expovariate(1 / 8)
+            mine = NUMBER_EMOJIS[i]
+            r = rng.random()
+            if r < 0.15:   # 빠른 토글: 누르고 바로 취소했다가 다시 누름
+                ops += [{"t": t, "op": "react", "post": label, "user": u, "emoji": mine},
+                        {"t": t + 0.4, "op": "unreact", "post": label, "user": u, "emoji": mine},
+                        {"t": t + 0.9, "op": "react", "post": label, "user": u, "emoji": mine}]
+            elif r < 0.25:   # 남의 번호를 눌렀다가 취소하고 자기 번호
+                other = NUMBER_EMOJIS[(i + 1) % len(recipients)]
+                ops += [{"t": t, "op": "react", "post": label, "user": u, "emoji": other},
+                        {"t": t + 0.6, "op": "unreact", "post": label, "user": u, "emoji": other},
+                        {"t": t + 1.0, "op": "react", "post": label, "user": u, "emoji": mine}]
+            else:
+                ops.append({"t": t, "op": "react", "post": label, "user": u, "emoji": mine})
+        if rng.random() < 0.3:
+            ops.append({"t": t0 + rng.uniform(3, 15), "op": "price", "post": label, "user": author,
+                        "price": f"{rng.randint(1, 99) * 1000}"})
+            ops.append({"t": t0 + rng.uniform(15, 30), "op": "react", "post": label, "user": author, "emoji": "💰"})
+        if not finish_all and rng.random() < 0.5:
+            ops.append({"t": t0 + rng.uniform(40, 60), "op": "react", "post": label, "user": author, "emoji": "✅"})
+    for _ in range(max(1, posts // 2)):
+        ops.append({"t": rng.uniform(5, window + 30), "op": "list", "user": rng.randrange(users),
+                    "channel": rng.randrange(channels)})
+    ops.sort(key=lambda o: o["t"])
+    return ops
+
+
+def load_trace(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ================== 계측 ==================
+def pct(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def fmt_latency(name: str, values: List[float]) -> str:
+    if not values:
+        return f"{name:<26} 표본 없음"
+    return (f"{name:<26} n={len(values):<5} p50 {pct(values, 0.5):6.2f}s  p90 {pct(values, 0.9):6.2f}s  "
+            f"p99 {pct(values, 0.99):6.2f}s  최대 {max(values):6.2f}s")
+
+
+class Probe:
+    """가짜 서버 훅으로 게시글 표시 / 임베드 반영 / 종료 시각을 잡는다"""
+
+    def __init__(self):
+        self.command_at: Dict[str, float] = {}                  # 아이템명 -> 명령 전송 시각
+        self.label_of_item: Dict[str, str] = {}
+        self.visible: Dict[str, asyncio.Event] = {}             # 라벨 -> 게시글 표시 이벤트
+        self.msg_of: Dict[str, int] = {}                        # 라벨 -> 분배 메시지 ID
+        self.cmd_msgs: Dict[int, str] = {}                      # 명령/!판매 메시지 ID -> 라벨
+        self.embed_state: Dict[int, List[bool]] = {}            # 메시지 ID -> 마지막으로 보인 줄별 수령 여부
+        self.pending: Dict[Tuple[int, int], Tuple[float, bool]] = {}   # (메시지, 번호) -> (첫 리액션 시각, 기대 상태)
+        self.post_latency: List[float] = []
+        self.embed_latency: List[float] = []
+        self.finish_latency: List[float] = []
+        self.late_reactions = 0
+
+    def expect_post(self, label: str, item: str):
+        self.command_at[item] = time.monotonic()
+        self.label_of_item[item] = label
+        self.visible.setdefault(label, asyncio.Event())
+
+    @staticmethod
+    def _lines(msg: dict) -> Optional[List[bool]]:
+        embeds = msg.get("embeds") or []
+        fields = embeds[0].get("fields", []) if embeds else []
+        if len(fields) < 2:
+            return None
+        return [line.endswith("✅") for line in fields[1].get("value", "").split("\n")]
+
+    def on_created(self, msg: dict):
+        embeds = msg.get("embeds") or []
+        fields = embeds[0].get("fields", []) if embeds else []
+        hit = ITEM_RE.search(fields[0].get("value", "")) if fields else None
+        if hit is None:
+            return
+        item = hit.group(1).split("\n")[0]
+        label = self.label_of_item.get(item)
+        if label is None or label in self.msg_of:
+            return
+        self.post_latency.append(time.monotonic() - self.command_at[item])
+        self.msg_of[label] = int(msg["id"])
+        self.embed_state[int(msg["id"])] = self._lines(msg) or []
+        self.visible[label].set()
+
+    def on_edited(self, msg: dict):
+        mid = int(msg["id"])
+        lines = self._lines(msg)
+        if lines is None or mid not in self.embed_state:
+            return
+        self.embed_state[mid] = lines
+        now = time.monotonic()
+        for i, on in enumerate(lines):
+            p = self.pending.get((mid, i))
+            if p is not None and p[1] == on:
+                self.embed_latency.append(now - p[0])
+                del self.pending[(mid, i)]
+
+    def on_deleted(self, mid: int):
+        if mid not in self.embed_state:
+            return
+        now = time.monotonic()
+        for key in [k for k in self.pending if k[0] == mid]:
+            self.finish_latency.append(now - self.pending.pop(key)[0])
+        del self.embed_state[mid]
+
+    def reacted(self, mid: int, index: int, want: bool):
+        """숫자 리액션 후 임베드가 보여줘야 할 상태 기록 (이미 그렇게 보이면 기다릴 것 없음)"""
+        key = (mid, index)
+        p = self.pending.get(key)
+        shown = self.embed_state.get(mid, [])
+        if p is not None:
+            if index < len(shown) and shown[index] == want:
+                del self.pending[key]   # 반대로 눌렀다 되돌림 → 보이는 상태 그대로가 정답
+            else:
+                self.pending[key] = (p[0], want)
+        elif not (index < len(shown) and shown[index] == want):
+            self.pending[key] = (time.monotonic(), want)
+
+
+# ================== 재생 ==================
+class Simulation:
+    def __init__(self, fake: FakeDiscord, probe: Probe, users: List[int], channels: List[int]):
+        self.fake = fake
+        self.probe = probe
+        self.users = users
+        self.channels = channels
+        self.start = 0.0
+
+    async def _at(self, t: float):
+        delay = self.start + t - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def run(self, ops: List[dict]):
+        self.start = time.monotonic()
+        by_post: Dict[str, List[dict]] = defaultdict(list)
+        loose: List[dict] = []
+        for op in ops:
+            (by_post[op["post"]] if "post" in op else loose).append(op)
+        await asyncio.gather(*(self._post_ops(label, seq) for label, seq in by_post.items()),
+                             *(self._loose_op(op) for op in loose))
+
+    async def _post_ops(self, label: str, seq: List[dict]):
+        for op in seq:
+            await self._at(op["t"])
+            if op["op"] == "post":
+                await self._post(label, op)
+                continue
+            event = self.probe.visible.setdefault(label, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), VISIBLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"[WARN] {label} 게시글이 {VISIBLE_TIMEOUT:.0f}초 안에 안 보임 → 나머지 동작 생략")
+                return
+            mid = self.probe.msg_of[label]
+            uid = self.users[op["user"]]
+            if op["op"] in ("react", "unreact"):
+                add = op["op"] == "react"
+                if not await self.fake.user_react(mid, uid, op["emoji"], add):
+                    self.probe.late_reactions += 1
+                elif op["emoji"] in NUMBER_EMOJIS:
+                    holders = self.fake.reactions.get(mid, {}).get(op["emoji"], [])
+                    self.probe.reacted(mid, NUMBER_EMOJIS.index(op["emoji"]), any(u != self.fake.app_id for u in holders))
+            elif op["op"] == "price":
+                channel = int(self.fake.messages[mid]["channel_id"]) if mid in self.fake.messages else self.channels[0]
+                cmd = await self.fake.user_message(channel, uid, f"!판매 {mid} {op['price']}")
+                self.probe.cmd_msgs[cmd] = label
+
+    async def _post(self, label: str, op: dict):
+        recipients = [self.users[n] for n in op["recipients"]]
+        mentions = " ".join(f"<@{u}>" for u in recipients)
+        self.probe.expect_post(label, op["item"])
+        cmd = await self.fake.user_message(self.channels[op["channel"]], self.users[op["author"]],
+                                           f"!분배 {op['item']} / {mentions}", mentions=recipients)
+        self.probe.cmd_msgs[cmd] = label
+
+    async def _loose_op(self, op: dict):
+        await self._at(op["t"])
+        uid = self.users[op["user"]]
+        channel = self.channels[op.get("channel", 0)]
+        if op["op"] == "list":
+            await self.fake.user_slash(channel, uid, "분배중")
+        elif op["op"] == "optin":
+            await self.fake.user_message(channel, uid, "!알림동의")
+
+
+# ================== 실행 ==================
+# discord.py가 이벤트/명령어/버튼 처리마다 띄우는 태스크 이름 (아직 도는 핸들러 = 곧 쓰기가 더 들어올 수 있음)
+HANDLER_TASK_PREFIXES = ("discord.py: on_", "CommandTree-invoker", "discord-ui-view-dispatch-")
+
+def running_handlers() -> int:
+    return sum(1 for t in asyncio.all_tasks() if not t.done() and t.get_name().startswith(HANDLER_TASK_PREFIXES))
+
+async def run_sim(args, ops: List[dict]):
+    import discord
+    import yarl
+    import distributor_bot as app
+
+    raid_channels = [app.완료_채널_ID + 1 + n for n in range(args.channels)]
+    fake = FakeDiscord(raid_channels + [app.완료_채널_ID], args.users, shared_429=args.shared_429, seed=args.seed)
+    await fake.start()
+    discord.http.Route.BASE = fake.base_url
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(fake.gateway_url)
+    probe = Probe()
+    fake.on_message_created = probe.on_created
+    fake.on_message_edited = probe.on_edited
+    fake.on_message_deleted = probe.on_deleted
+
+    bot = app.bot
+    out = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    depth: List[Tuple[float, int, int]] = []
+    with out:
+        runner = asyncio.create_task(bot.start("sim-token"))
+        await asyncio.wait_for(bot.wait_until_ready(), 30)
+        assert bot.scheduler is not None
+        sched = bot.scheduler
+
+        async def sample():
+            while True:
+                depth.append((time.monotonic(), sched.depth, sched.inflight))
+                await asyncio.sleep(0.25)
+
+        sampler = asyncio.create_task(sample())
+        sim = Simulation(fake, probe, list(fake.users), raid_channels)
+        started = time.monotonic()
+        await sim.run(ops)
+        replayed = time.monotonic() - started
+
+        # 남은 핸들러/쓰기/편집/재조정/지연 삭제·DM 다이제스트가 다 빠질 때까지 (최대 drain초)
+        deadline = time.monotonic() + args.drain
+        while time.monotonic() < deadline:
+            if (running_handlers() == 0 and sched.depth == 0 and sched.inflight == 0 and not bot.dirty_embeds
+                    and bot.reconciler.pending == 0 and len(bot.timers) == 0):
+                break
+            await asyncio.sleep(0.25)
+        drained = time.monotonic() - started - replayed
+        sampler.cancel()
+        await bot.close()
+        with contextlib.suppress(Exception):
+            await runner
+    await fake.close()
+    return fake, probe, depth, started, replayed, drained, app
+
+
+def report(args, ops, fake: FakeDiscord, probe: Probe, depth, started, replayed, drained, app):
+    sched = app.bot.scheduler
+    posts = sum(1 for o in ops if o["op"] == "post")
+    reactions = sum(1 for o in ops if o["op"] in ("react", "unreact"))
+    print(f"워크로드: 동작 {len(ops)}건 (게시 {posts}, 리액션 {reactions}) | 재생 {replayed:.1f}s + 정리 {drained:.1f}s"
+          f" | 멤버 모드 {app.MEMBER_MODE} | shared 429 {args.shared_429:.0%}")
+    print()
+    print("■ 지연")
+    print(fmt_latency("명령 → 게시글 표시", probe.post_latency))
+    print(fmt_latency("리액션 → 임베드 반영", probe.embed_latency))
+    print(fmt_latency("리액션 → 종료(원본 삭제)", probe.finish_latency))
+    if probe.pending:
+        print(f"  (끝까지 반영 안 된 리액션 {len(probe.pending)}건)")
+    if probe.late_reactions:
+        print(f"  (이미 삭제된 게시글에 누른 리액션 {probe.late_reactions}건)")
+
+    print()
+    print("■ 쓰기 큐 깊이 (5초 구간별 최대 / 실행 중 최대)")
+    buckets: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    for t, d, inflight in depth:
+        b = buckets[int((t - started) // 5)]
+        b[0] = max(b[0], d)
+        b[1] = max(b[1], inflight)
+    peak = max((v[0] for v in buckets.values()), default=0) or 1
+    for b in sorted(buckets):
+        d, inflight = buckets[b]
+        print(f"  {b * 5:>4}s {d:>5} {inflight:>3} {'█' * round(30 * d / peak)}")
+
+    print()
+    print("■ REST 호출")
+    dist_of: Dict[int, str] = {mid: label for label, mid in probe.msg_of.items()}
+    dist_of.update(probe.cmd_msgs)
+    per_dist: Counter = Counter()
+    by_route: Counter = Counter()
+    unattributed = 0
+    for _, method, tpl, status, ids in fake.calls:
+        by_route[f"{method} {tpl}"] += 1
+        label = next((dist_of[int(i)] for i in ids if i.isdigit() and int(i) in dist_of), None)
+        if label is None:
+            unattributed += 1
+        else:
+            per_dist[label] += 1
+    total = len(fake.calls)
+    n = max(1, len(probe.msg_of))
+    counts = [per_dist[label] for label in probe.msg_of]
+    print(f"  전체 {total}건 (429 {sum(fake.rate_limited.values())}건) | 분배당 {total / n:.1f}건 "
+          f"(분배에 귀속 {sum(counts) / n:.1f}건, p50 {pct(counts, 0.5):.0f} / 최대 {max(counts, default=0)}) | 귀속 안 됨 {unattributed}건")
+    for route, c in by_route.most_common():
+        limited = fake.rate_limited.get(route, 0)
+        print(f"  {c:>6} ({c / n:5.2f}/분배) {route}" + (f"  [429 {limited}]" if limited else ""))
+    if fake.unknown_routes:
+        print(f"  가짜 서버에 없는 경로: {dict(fake.unknown_routes)}")
+    print(f"  DM 메시지 {fake.dm_messages}건")
+    archive_id = str(app.완료_채널_ID)
+    archive_posts = sum(1 for m in fake.messages.values() if m["channel_id"] == archive_id)
+    completions = app.bot.archive.added
+    print(f"  완료 게시판: 완료 {completions}건 → 메시지 {archive_posts}통"
+          f" (완료당 {archive_posts / completions:.2f}통)" if completions else "  완료 게시판: 완료 없음")
+
+    print()
+    print("■ 봇 지표")
+    print(f"  쓰기 작업 완료 {sched.completed} · 합치기 {sched.coalesced} · 재시도 {sched.retried} · 429 실패 {sched.rate_limited}"
+          f" · 포기 {sched.failed} · discord.py 429 대기 {app.discord_rate_limits.value}")
+    for name, w in sched.wait_summary().items():
+        print(f"  대기 {name:<11} {w['count']:>6}건 · 평균 {w['mean']:.2f}s · p95≤{w['p95']:g}s · 최대 {w['max']:.2f}s")
+    rec = app.bot.reconciler
+    results = {r: c.value for r, c in app.reconcile_results.items()}
+    print(f"  쿨다운으로 버린 리액션 {app.reaction_events['cooldown'].value} · 재조정 {rec.runs}회 {results}")
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="가짜 Discord에 붙인 분배 봇 부하 시뮬레이션")
+    ap.add_argument("trace", nargs="?", help="JSONL 워크로드 (없으면 합성)")
+    ap.add_argument("--posts", type=int, default=30)
+    ap.add_argument("--window", type=float, default=60.0, help="합성 워크로드의 게시 구간 (초)")
+    ap.add_argument("--users", type=int, default=120)
+    ap.add_argument("--channels", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--shared-429", type=float, default=0.0, help="성공할 요청을 shared 429로 바꿀 확률")
+    ap.add_argument("--drain", type=float, default=90.0, help="재생 후 큐가 빌 때까지 기다리는 최대 시간 (초)")
+    ap.add_argument("--lazy", action="store_true", help="MEMBER_MODE=lazy 로 실행")
+    ap.add_argument("--save-trace", help="사용한 워크로드를 JSONL로 저장")
+    ap.add_argument("-v", "--verbose", action="store_true", help="봇 로그 출력")
+    args = ap.parse_args(argv)
+
+    ops = load_trace(args.trace) if args.trace else generate_trace(args.posts, args.window, args.users, args.channels, args.seed)
+    if args.save_trace:
+        with open(args.save_trace, "w", encoding="utf-8") as f:
+            for op in ops:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+
+    with tempfile.TemporaryDirectory(prefix="distbot-sim-") as tmp:
+        # 봇 모듈은 import 시점에 환경변수를 읽으므로 먼저 설정
+        os.environ.update({"STORE_PATH": os.path.join(tmp, "sim.db"), "SYNC_ON_STARTUP": "0", "PORT": "0",
+                           "HEALTH_HOST": "127.0.0.1", "MEMBER_MODE": "lazy" if args.lazy else "full",
+                           "CLAIM_MODE": "reaction"})
+        report(args, ops, *asyncio.run(run_sim(args, ops)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# /분배 멘션 파싱 마이크로 벤치마크
+# - 기존: 채널 멤버 전체를 돌며 대상자 문자열에 "<@id>"/"<@!id>"가 있는지 검사
+# - 변경: 정규식으로 ID만 파싱한 뒤 get_member(dict 조회)
+# 가짜 길드(멤버 N명)에서 멘션 10개짜리 인자로 1회 처리 시간을 비교
+# 실행: python bench/bench_mention_parsing.py [멤버수]
+# ------------------------------------------------------------
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from members import parse_mention_ids  # noqa: E402
+
+
+class FakeMember:
+    __slots__ = ("id",)
+
+    def __init__(self, uid: int):
+        self.id = uid
+
+
+def main(n_members: int = 20_000, n_mentions: int = 10):
+    rng = random.Random(7)
+    members = [FakeMember(rng.randrange(10**17, 10**18 * 14)) for _ in range(n_members)]
+    by_id = {m.id: m for m in members}
+    picked = rng.sample(members, n_mentions)
+    arg = " ".join(f"<@{m.id}>" if i % 2 else f"<@!{m.id}>" for i, m in enumerate(picked))
+
+    def old():
+        return [m for m in members if f"<@{m.id}>" in arg or f"<@!{m.id}>" in arg]
+
+    def new():
+        return [by_id[uid] for uid in parse_mention_ids(arg) if uid in by_id]
+
+    assert {m.id for m in old()} == {m.id for m in new()}
+    assert [m.id for m in new()] == [m.id for m in picked]   # 작성 순서 유지
+
+    for name, fn in (("채널 멤버 스캔", old), ("멘션 파싱 + get_member", new)):
+        number = 20 if fn is old else 20_000
+        t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{name:<22} 멤버 {n_members:,}명 / 멘션 {n_mentions}개: {t * 1e6:,.1f} µs/회")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 쓰기 스케줄러 재시도/데드레터 확인 (로컬 가짜 HTTP 서버)
+# - /rl    : 처음 2번은 429 + Retry-After, 이후 200
+# - /flaky : 처음 3번은 503 (대기 힌트 없음 → 지수 백오프), 이후 200
+# - /down  : 항상 503 → 재시도를 다 쓰고 데드레터로, 복구 후 replay()로 성공
+# - /gone  : 404 → 재시도하지 않고 바로 포기
+# 작업은 factory(호출마다 새 요청)라 같은 작업을 여러 번 실행할 수 있는지도 같이 확인
+# 실행: python bench/bench_retry_fake_http.py
+# ------------------------------------------------------------
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from retry import RetryPolicy  # noqa: E402
+from scheduler import WriteScheduler, channel_lane  # noqa: E402
+
+hits: Counter = Counter()
+down = True
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        hits[self.path] += 1
+        n = hits[self.path]
+        if self.path == "/rl" and n <= 2:
+            self._reply(429, {"Retry-After": "0.2", "X-RateLimit-Scope": "user"})
+        elif self.path == "/flaky" and n <= 3:
+            self._reply(503)
+        elif self.path == "/down" and down:
+            self._reply(503)
+        elif self.path == "/gone":
+            self._reply(404)
+        else:
+            self._reply(200)
+
+    def _reply(self, status: int, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def post(url: str):
+    req = urllib.request.Request(url, data=b"{}", method="POST")
+    with urllib.request.urlopen(req, timeout=5):
+        pass
+
+
+async def main():
+    global down
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    sched = WriteScheduler(rate=50, burst=10, max_concurrency=4,
+                           retry=RetryPolicy(max_attempts=4, base=0.05, cap=1.0))
+    sched.start()
+    t0 = time.perf_counter()
+    for i, path in enumerate(("/rl", "/flaky", "/down", "/gone")):
+        url = base + path
+        sched.submit(channel_lane(i), lambda url=url: asyncio.to_thread(post, url), name=path)
+    await sched.drain(10)
+    elapsed = time.perf_counter() - t0
+
+    print(f"\n1차 실행 {elapsed:.2f}초, 재시도 예약 {sched.retried}회")
+    for path in ("/rl", "/flaky", "/down", "/gone"):
+        print(f"  {path:<7} 요청 {hits[path]}회")
+    letters = sched.dead_letters.list()
+    print(f"  데드레터: {[(d.seq, d.name, d.attempts) for d in letters]}")
+    assert hits["/rl"] == 3 and hits["/flaky"] == 4 and hits["/down"] == 4 and hits["/gone"] == 1
+    assert [d.name for d in letters] == ["/down"]
+
+    down = False
+    replayed = sched.replay()
+    await sched.drain(10)
+    print(f"복구 후 replay {replayed}건 → /down 요청 누적 {hits['/down']}회, 데드레터 {len(sched.dead_letters)}건")
+    assert hits["/down"] == 5 and len(sched.dead_letters) == 0
+
+    await sched.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
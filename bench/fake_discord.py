@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 가짜 Discord (REST + 게이트웨이) — 부하 시뮬레이션용
+# - aiohttp 서버 하나로 봇이 쓰는 REST 경로 일부와 게이트웨이 웹소켓(JSON, 비압축 텍스트 프레임)을 흉내냄
+# - REST는 Discord처럼 (메서드, 경로 템플릿, 주요 파라미터) 버킷마다 limit/per 토큰을 두고
+#   X-RateLimit-* 헤더를 돌려주며, 넘치면 429(Retry-After, retry_after)
+#   전역 상한(초당 global_rps) 초과는 global 429, shared_429 확률로 공유 버킷 429도 섞을 수 있음
+# - 멤버 요청(op 8)에는 GUILD_MEMBERS_CHUNK 1덩어리로 응답 (lazy 모드 멤버 조회)
+# - 메시지/리액션/스레드 상태를 메모리에 들고 있어 조회(GET 메시지, 리액션 사용자)도 실제처럼 응답
+# - 호출 기록(calls)과 훅(on_message_created / _edited / _deleted)으로 하네스가 지연·호출 수를 잰다
+# 사용: bench/bench_load_sim.py (discord.py의 REST 기본 주소와 기본 게이트웨이를 이 서버로 돌려서 봇을 붙임)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from aiohttp import WSMsgType, web
+
+DISCORD_EPOCH_MS = 1420070400000
+
+# (메서드, 경로 정규식, 템플릿, limit, per초). 주요 파라미터(채널/길드/웹훅 ID)가 같으면 같은 버킷
+ROUTES: List[Tuple[str, str, str, int, float]] = [
+    ("GET",    r"/users/@me",                                               "/users/@me",                                   5, 1.0),
+    ("GET",    r"/oauth2/applications/@me",                                 "/oauth2/applications/@me",                     5, 1.0),
+    ("GET",    r"/gateway/bot",                                             "/gateway/bot",                                 2, 5.0),
+    ("POST",   r"/users/@me/channels",                                      "/users/@me/channels",                          10, 10.0),
+    ("POST",   r"/channels/(\d+)/messages",                                 "/channels/{c}/messages",                       5, 5.0),
+    ("GET",    r"/channels/(\d+)/messages/(\d+)",                           "/channels/{c}/messages/{m}",                   5, 1.0),
+    ("PATCH",  r"/channels/(\d+)/messages/(\d+)",                           "/channels/{c}/messages/{m}",                   5, 5.0),
+    ("DELETE", r"/channels/(\d+)/messages/(\d+)",                           "/channels/{c}/messages/{m}",                   5, 1.0),
+    ("PUT",    r"/channels/(\d+)/messages/(\d+)/reactions/([^/]+)/@me",     "/channels/{c}/messages/{m}/reactions/{e}/@me", 1, 0.25),
+    ("GET",    r"/channels/(\d+)/messages/(\d+)/reactions/([^/]+)",         "/channels/{c}/messages/{m}/reactions/{e}",     5, 1.0),
+    ("POST",   r"/channels/(\d+)/messages/(\d+)/threads",                   "/channels/{c}/messages/{m}/threads",           5, 5.0),
+    ("PUT",    r"/channels/(\d+)/thread-members/(\d+)",                     "/channels/{c}/thread-members/{u}",             10, 10.0),
+    ("DELETE", r"/channels/(\d+)",                                          "/channels/{c}",                                5, 5.0),
+    ("GET",    r"/guilds/(\d+)/members/(\d+)",                              "/guilds/{g}/members/{u}",                      10, 1.0),
+    ("POST",   r"/interactions/(\d+)/([^/]+)/callback",                     "/interactions/{i}/{t}/callback",               50, 1.0),
+    ("POST",   r"/webhooks/(\d+)/([^/]+)",                                  "/webhooks/{a}/{t}",                            5, 2.0),
+    ("PATCH",  r"/webhooks/(\d+)/([^/]+)/messages/@original",               "/webhooks/{a}/{t}/messages/@original",         5, 2.0),
+]
+_COMPILED = [(m, re.compile("^/api/v\\d+" + rx + "$"), tpl, limit, per) for m, rx, tpl, limit, per in ROUTES]
+
+
+def json_response(payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    # discord.py는 Content-Type이 정확히 application/json일 때만 본문을 JSON으로 읽는다 (charset 붙이면 문자열)
+    # Via가 없는 429는 Cloudflare 차단으로 보고 재시도 없이 바로 예외를 낸다 → 실제 API처럼 붙여줌
+    return web.Response(body=json.dumps(payload).encode("utf-8"), status=status,
+                        headers=dict(headers or {}, **{"Content-Type": "application/json", "Via": "1.1 google"}))
+
+
+def iso(ts: Optional[float] = None) -> str:
+    return datetime.fromtimestamp(time.time() if ts is None else ts, timezone.utc).isoformat()
+
+
+class Bucket:
+    __slots__ = ("limit", "per", "remaining", "reset_at")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float) -> bool:
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+class FakeDiscord:
+    """
+    길드 1개(channels: 텍스트 채널 ID 목록, 사용자 user_count명 + 봇)를 가진 가짜 Discord.
+    rtt: 요청마다 더하는 왕복 지연 범위 (초, (lo, hi)).
+    """
+
+    def __init__(self, channels: List[int], user_count: int, rtt: Tuple[float, float] = (0.03, 0.09),
+                 global_rps: float = 50.0, shared_429: float = 0.0, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.rtt = rtt
+        self.global_rps = global_rps
+        self.shared_429 = shared_429
+        self._seq = itertools.count()
+        self.guild_id = self.snowflake()
+        self.app_id = self.snowflake()
+        self.bot_user = self._user(self.app_id, "분배봇", bot=True)
+        self.users: Dict[int, dict] = {}
+        for n in range(user_count):
+            uid = self.snowflake()
+            self.users[uid] = self._user(uid, f"user{n:03d}")
+        self.channel_ids = list(channels)
+        self.messages: Dict[int, dict] = {}                       # message_id -> 메시지 JSON
+        self.reactions: Dict[int, Dict[str, List[int]]] = {}       # message_id -> emoji -> 누른 사용자 ID (순서 유지)
+        self.threads: Dict[int, dict] = {}
+        self.dm_channels: Dict[int, int] = {}                      # user_id -> DM 채널 ID
+        self.dm_messages = 0
+
+        self._buckets: Dict[Tuple[str, str, str], Bucket] = {}
+        self._global: List[float] = []
+        self.calls: List[Tuple[float, str, str, int, Tuple[str, ...]]] = []   # (시각, 메서드, 템플릿, 상태, 경로 ID들)
+        self.rate_limited = Counter()                               # "메서드 템플릿" -> 429 수
+        self.unknown_routes = Counter()
+
+        self.on_message_created: Optional[Callable[[dict], None]] = None
+        self.on_message_edited: Optional[Callable[[dict], None]] = None
+        self.on_message_deleted: Optional[Callable[[int], None]] = None
+
+        self._ws: Optional[web.WebSocketResponse] = None
+        self._ws_seq = 0
+        self.identified = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    # --------------- 유틸 ---------------
+    def snowflake(self) -> int:
+        ms = int(time.time() * 1000) - DISCORD_EPOCH_MS
+        return (ms << 22) | (next(self._seq) & 0x3FFFFF)
+
+    @staticmethod
+    def _user(uid: int, name: str, bot: bool = False) -> dict:
+        return {"id": str(uid), "username": name, "global_name": name, "discriminator": "0", "avatar": None, "bot": bot}
+
+    def member(self, uid: int) -> dict:
+        user = self.bot_user if uid == self.app_id else self.users[uid]
+        return {"user": user, "roles": [], "joined_at": iso(0), "deaf": False, "mute": False, "flags": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/v10"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/gateway"
+
+    # --------------- 수명주기 ---------------
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/gateway", self._gateway)
+        app.router.add_route("*", "/api/{tail:.*}", self._rest)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]   # type: ignore[union-attr]
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # --------------- 게이트웨이 ---------------
+    def guild_payload(self) -> dict:
+        gid = str(self.guild_id)
+        channels = [{"id": str(c), "type": 0, "name": f"ch-{n}", "position": n, "guild_id": gid,
+                     "permission_overwrites": [], "parent_id": None, "nsfw": False, "rate_limit_per_user": 0}
+                    for n, c in enumerate(self.channel_ids)]
+        members = [self.member(self.app_id)] + [self.member(uid) for uid in self.users]
+        return {
+            "id": gid, "name": "sim-guild", "owner_id": str(next(iter(self.users))), "icon": None,
+            "roles": [{"id": gid, "name": "@everyone", "permissions": str((1 << 41) - 1), "position": 0,
+                       "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+            "channels": channels, "threads": [], "members": members, "member_count": len(members),
+            "emojis": [], "stickers": [], "features": [], "presences": [], "voice_states": [],
+            "large": False, "unavailable": False, "mfa_level": 0, "verification_level": 0,
+            "premium_tier": 0, "preferred_locale": "ko", "afk_timeout": 300, "joined_at": iso(0),
+        }
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._ws = ws
+        self._ws_seq = 0
+        await ws.send_str(json.dumps({"op": 10, "d": {"heartbeat_interval": 41250}}))
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            data = json.loads(msg.data)
+            op = data.get("op")
+            if op == 1:
+                await ws.send_str(json.dumps({"op": 11}))
+            elif op == 2:
+                await self.dispatch("READY", {
+                    "v": 10, "user": self.bot_user, "session_id": "sim", "resume_gateway_url": self.gateway_url,
+                    "guilds": [{"id": str(self.guild_id), "unavailable": True}],
+                    "application": {"id": str(self.app_id), "flags": 0}, "private_channels": [], "relationships": [],
+                })
+                await self.dispatch("GUILD_CREATE", self.guild_payload())
+                self.identified.set()
+            elif op == 6:
+                await self.dispatch("RESUMED", {})
+            elif op == 8:
+                await self.dispatch("GUILD_MEMBERS_CHUNK", self.members_chunk(data.get("d") or {}))
+        self._ws = None
+        return ws
+
+    def members_chunk(self, req: dict) -> dict:
+        """REQUEST_GUILD_MEMBERS(op 8) 응답 1덩어리: user_ids면 아는 멤버 + not_found, 아니면 이름 접두어 검색"""
+        if req.get("user_ids") is not None:
+            ids = [int(u) for u in req["user_ids"]]
+            known = [u for u in ids if u in self.users or u == self.app_id]
+            not_found = [str(u) for u in ids if u not in known]
+        else:
+            query = (req.get("query") or "").lower()
+            known = [u for u, user in self.users.items() if user["username"].lower().startswith(query)]
+            known = known[:req.get("limit") or len(known)]
+            not_found = []
+        chunk = {"guild_id": str(self.guild_id), "members": [self.member(u) for u in known],
+                 "chunk_index": 0, "chunk_count": 1, "not_found": not_found}
+        if req.get("nonce") is not None:
+            chunk["nonce"] = req["nonce"]
+        return chunk
+
+    async def dispatch(self, event: str, data: Any):
+        if self._ws is None or self._ws.closed:
+            return
+        self._ws_seq += 1
+        await self._ws.send_str(json.dumps({"op": 0, "t": event, "s": self._ws_seq, "d": data}))
+
+    # --------------- 사용자 행동 (하네스가 호출) ---------------
+    async def user_message(self, channel_id: int, user_id: int, content: str, mentions: List[int] = ()) -> int:
+        mid = self.snowflake()
+        await self.dispatch("MESSAGE_CREATE", {
+            "id": str(mid), "channel_id": str(channel_id), "guild_id": str(self.guild_id),
+            "author": self.users[user_id], "member": {k: v for k, v in self.member(user_id).items() if k != "user"},
+            "content": content, "timestamp": iso(), "edited_timestamp": None, "tts": False,
+            "mention_everyone": False, "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0,
+            "mentions": [dict(self.users[u], member={k: v for k, v in self.member(u).items() if k != "user"}) for u in mentions],
+        })
+        self.messages[mid] = {"id": str(mid), "channel_id": str(channel_id), "author": self.users[user_id]}
+        return mid
+
+    async def user_react(self, message_id: int, user_id: int, emoji: str, add: bool) -> bool:
+        """사용자 리액션 추가/제거. 메시지가 이미 없으면 False"""
+        msg = self.messages.get(message_id)
+        if msg is None:
+            return False
+        users = self.reactions.setdefault(message_id, {}).setdefault(emoji, [])
+        if add == (user_id in users):
+            return True
+        if add:
+            users.append(user_id)
+        else:
+            users.remove(user_id)
+        data = {"user_id": str(user_id), "channel_id": msg["channel_id"], "message_id": str(message_id),
+                "guild_id": str(self.guild_id), "emoji": {"id": None, "name": emoji}, "burst": False, "type": 0}
+        if add:
+            data["member"] = self.member(user_id)
+        await self.dispatch("MESSAGE_REACTION_ADD" if add else "MESSAGE_REACTION_REMOVE", data)
+        return True
+
+    async def user_slash(self, channel_id: int, user_id: int, name: str, options: Optional[List[dict]] = None):
+        iid = self.snowflake()
+        member = dict(self.member(user_id), permissions="0")
+        await self.dispatch("INTERACTION_CREATE", {
+            "id": str(iid), "application_id": str(self.app_id), "type": 2, "token": f"tok{iid}", "version": 1,
+            "guild_id": str(self.guild_id), "channel_id": str(channel_id), "member": member,
+            "app_permissions": "0", "locale": "ko", "guild_locale": "ko",
+            "data": {"id": str(self.snowflake()), "name": name, "type": 1, "options": options or []},
+        })
+
+    # --------------- REST ---------------
+    def _bucket_for(self, method: str, path: str) -> Tuple[Optional[str], Tuple[str, ...], int, float]:
+        for m, rx, tpl, limit, per in _COMPILED:
+            if m == method:
+                hit = rx.match(path)
+                if hit:
+                    return tpl, hit.groups(), limit, per
+        return None, (), 50, 1.0
+
+    def _rate_headers(self, bucket: Bucket, tpl: str, now: float) -> Dict[str, str]:
+        after = max(0.0, bucket.reset_at - now)
+        return {
+            "X-RateLimit-Limit": str(bucket.limit), "X-RateLimit-Remaining": str(bucket.remaining),
+            "X-RateLimit-Reset": f"{time.time() + after:.3f}", "X-RateLimit-Reset-After": f"{after:.3f}",
+            "X-RateLimit-Bucket": f"{abs(hash(tpl)):x}",
+        }
+
+    @staticmethod
+    def _too_many(retry_after: float, scope: str, headers: Dict[str, str]) -> web.Response:
+        headers = dict(headers, **{"Retry-After": str(math.ceil(retry_after)), "X-RateLimit-Scope": scope})
+        if scope == "global":
+            headers["X-RateLimit-Global"] = "true"
+        body = {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": scope == "global"}
+        return json_response(body, status=429, headers=headers)
+
+    async def _rest(self, request: web.Request) -> web.Response:
+        # 본문은 먼저 읽어둔다 (왕복 지연 중에 봇이 종료하며 연결을 끊어도 처리 중 예외가 안 나게)
+        body: Any = None
+        if request.can_read_body:
+            ctype = request.headers.get("Content-Type", "")
+            if ctype.startswith("multipart/"):
+                form = await request.post()
+                body = json.loads(form.get("payload_json", "{}"))
+            else:
+                raw = await request.read()
+                body = json.loads(raw) if raw else None
+        await asyncio.sleep(self.rng.uniform(*self.rtt))
+        method, path = request.method, unquote(request.path)
+        tpl, ids, limit, per = self._bucket_for(method, path)
+        now = time.monotonic()
+        if tpl is None:
+            self.unknown_routes[f"{method} {path}"] += 1
+            self.calls.append((now, method, path, 404, ()))
+            return json_response({"message": "Unknown route (fake)", "code": 0}, status=404)
+
+        # 전역 상한 (슬라이딩 1초 창)
+        self._global = [t for t in self._global if now - t < 1.0]
+        if len(self._global) >= self.global_rps and not tpl.startswith("/interactions"):
+            self.rate_limited[f"{method} {tpl}"] += 1
+            self.calls.append((now, method, tpl, 429, ids))
+            return self._too_many(1.0 - (now - self._global[0]), "global", {})
+        self._global.append(now)
+
+        major = ids[0] if ids and not tpl.startswith("/users") else ""
+        bucket = self._buckets.get((method, tpl, major))
+        if bucket is None:
+            bucket = self._buckets[(method, tpl, major)] = Bucket(limit, per)
+        if not bucket.take(now):
+            self.rate_limited[f"{method} {tpl}"] += 1
+            self.calls.append((now, method, tpl, 429, ids))
+            return self._too_many(bucket.reset_at - now, "user", self._rate_headers(bucket, tpl, now))
+        headers = self._rate_headers(bucket, tpl, now)
+        if self.shared_429 and self.rng.random() < self.shared_429:
+            self.rate_limited[f"{method} {tpl}"] += 1
+            self.calls.append((now, method, tpl, 429, ids))
+            return self._too_many(self.rng.uniform(0.2, 1.0), "shared", headers)
+
+        status, payload = self._handle(method, tpl, ids, body, request)
+        self.calls.append((now, method, tpl, status, ids))
+        if payload is None:
+            return web.Response(status=status, headers=dict(headers, Via="1.1 google"))
+        return json_response(payload, status=status, headers=headers)
+
+    def _unknown(self, what: str, code: int) -> Tuple[int, dict]:
+        return 404, {"message": f"Unknown {what}", "code": code}
+
+    def _new_message(self, channel_id: int, body: dict) -> dict:
+        mid = self.snowflake()
+        msg = {
+            "id": str(mid), "channel_id": str(channel_id), "author": self.bot_user,
+            "content": body.get("content") or "", "embeds": body.get("embeds") or [],
+            "components": body.get("components") or [], "timestamp": iso(), "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+            "pinned": False, "type": 0, "flags": 0,
+        }
+        if channel_id in self.channel_ids or channel_id in self.threads:
+            msg["guild_id"] = str(self.guild_id)
+        self.messages[mid] = msg
+        return msg
+
+    def _with_reactions(self, msg: dict) -> dict:
+        mid = int(msg["id"])
+        out = dict(msg)
+        out["reactions"] = [
+            {"emoji": {"id": None, "name": e}, "count": len(us), "me": self.app_id in us, "me_burst": False,
+             "count_details": {"normal": len(us), "burst": 0}, "burst_colors": []}
+            for e, us in self.reactions.get(mid, {}).items() if us
+        ]
+        return out
+
+    def _handle(self, method: str, tpl: str, ids: Tuple[str, ...], body: Any, request: web.Request) -> Tuple[int, Any]:
+        if tpl == "/users/@me":
+            return 200, self.bot_user
+        if tpl == "/oauth2/applications/@me":
+            return 200, {"id": str(self.app_id), "name": "분배봇", "description": "", "icon": None, "bot_public": True,
+                         "bot_require_code_grant": False, "owner": next(iter(self.users.values())), "verify_key": "0" * 64,
+                         "flags": 0, "team": None, "summary": ""}
+        if tpl == "/gateway/bot":
+            return 200, {"url": self.gateway_url, "shards": 1,
+                         "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1}}
+        if tpl == "/users/@me/channels":
+            uid = int(body["recipient_id"])
+            cid = self.dm_channels.get(uid)
+            if cid is None:
+                cid = self.dm_channels[uid] = self.snowflake()
+            return 200, {"id": str(cid), "type": 1, "recipients": [self.users.get(uid) or self._user(uid, "?")], "last_message_id": None}
+        if tpl == "/guilds/{g}/members/{u}":
+            uid = int(ids[1])
+            return (200, self.member(uid)) if uid in self.users else self._unknown("Member", 10007)
+        if tpl in ("/interactions/{i}/{t}/callback", "/webhooks/{a}/{t}/messages/@original"):
+            return 204, None
+        if tpl == "/webhooks/{a}/{t}":
+            return 200, self._new_message(0, body or {})
+
+        cid = int(ids[0])
+        if tpl == "/channels/{c}/messages":
+            if cid in self.dm_channels.values():
+                self.dm_messages += 1
+            elif cid not in self.channel_ids and cid not in self.threads:
+                return self._unknown("Channel", 10003)
+            msg = self._new_message(cid, body or {})
+            if self.on_message_created is not None:
+                self.on_message_created(msg)
+            return 200, msg
+        if tpl == "/channels/{c}":   # DELETE 채널 (스레드)
+            thread = self.threads.pop(cid, None)
+            if thread is None:
+                return self._unknown("Channel", 10003)
+            asyncio.get_running_loop().create_task(self.dispatch("THREAD_DELETE", {
+                "id": thread["id"], "guild_id": thread["guild_id"], "parent_id": thread["parent_id"], "type": 11}))
+            return 200, thread
+        if tpl == "/channels/{c}/thread-members/{u}":
+            return (204, None) if cid in self.threads else self._unknown("Channel", 10003)
+
+        mid = int(ids[1])
+        msg = self.messages.get(mid)
+        if msg is None or msg["channel_id"] != str(cid):
+            return self._unknown("Message", 10008)
+        if tpl == "/channels/{c}/messages/{m}":
+            if method == "GET":
+                return 200, self._with_reactions(msg)
+            if method == "DELETE":
+                del self.messages[mid]
+                self.reactions.pop(mid, None)
+                if self.on_message_deleted is not None:
+                    self.on_message_deleted(mid)
+                return 204, None
+            for k in ("content", "embeds", "components"):
+                if body and k in body:
+                    msg[k] = body[k]
+            msg["edited_timestamp"] = iso()
+            if self.on_message_edited is not None:
+                self.on_message_edited(msg)
+            return 200, self._with_reactions(msg)
+        if tpl == "/channels/{c}/messages/{m}/reactions/{e}/@me":
+            users = self.reactions.setdefault(mid, {}).setdefault(ids[2], [])
+            if self.app_id not in users:
+                users.append(self.app_id)
+            return 204, None
+        if tpl == "/channels/{c}/messages/{m}/reactions/{e}":
+            users = self.reactions.get(mid, {}).get(ids[2], [])
+            after = int(request.query.get("after", 0))
+            limit = int(request.query.get("limit", 25))
+            page = sorted(u for u in users if u > after)[:limit]
+            return 200, [self.bot_user if u == self.app_id else self.users[u] for u in page]
+        if tpl == "/channels/{c}/messages/{m}/threads":
+            thread = {
+                "id": str(mid), "type": 11, "guild_id": str(self.guild_id), "parent_id": str(cid),
+                "name": (body or {}).get("name", ""), "owner_id": str(self.app_id), "last_message_id": None,
+                "member_count": 1, "message_count": 0, "rate_limit_per_user": 0, "flags": 0,
+                "thread_metadata": {"archived": False, "auto_archive_duration": (body or {}).get("auto_archive_duration", 60),
+                                    "archive_timestamp": iso(), "locked": False},
+            }
+            self.threads[mid] = thread
+            asyncio.get_running_loop().create_task(self.dispatch("THREAD_CREATE", dict(thread, newly_created=True)))
+            return 201, thread
+        return self._unknown("Route", 0)
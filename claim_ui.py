@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 버튼 기반 수령 UI (CLAIM_MODE=button)
+# - 대상자별 번호 버튼 + 완료/판매 버튼
+# - 표시용 View는 레코드로부터 렌더링하고 바로 stop() → 메시지마다 뷰 객체를 붙잡지 않음
+# - 실제 클릭은 custom_id가 고정된 영구 뷰 1개(ClaimHandlerView)가 모든 메시지에 대해 받음
+#   → bot.add_view로 등록해두면 재시작 후에도 예전 게시글 버튼이 동작
+# - 클릭 응답은 인터랙션 응답(edit_message 등)으로 처리 → 별도 REST 쓰기/리액션 시딩 없음
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+from typing import Awaitable, Callable, List
+
+import discord
+
+CLAIM_PREFIX = "distbot:claim:"
+DONE_ID = "distbot:done"
+SELL_ID = "distbot:sell"
+
+# 한 줄 최대 버튼 수 (디스코드 제한 5)
+BUTTONS_PER_ROW = 5
+
+# handler(interaction, action, index): action은 "claim" / "done" / "sell", index는 claim일 때만 의미
+ClaimHandler = Callable[[discord.Interaction, str, int], Awaitable[None]]
+
+
+def render_claim_view(recipient_count: int, received_mask: int, emojis: List[str],
+                      done_emoji: str, sell_emoji: str) -> discord.ui.View:
+    """표시용 View (stop 상태라 send/edit 해도 뷰 스토어에 등록되지 않는다)"""
+    view = discord.ui.View(timeout=None)
+    for i in range(recipient_count):
+        received = bool(received_mask >> i & 1)
+        view.add_item(discord.ui.Button(
+            custom_id=f"{CLAIM_PREFIX}{i}",
+            emoji=emojis[i],
+            label="수령 완료" if received else "수령",
+            style=discord.ButtonStyle.success if received else discord.ButtonStyle.secondary,
+            row=i // BUTTONS_PER_ROW,
+        ))
+    last_row = (len(emojis) + BUTTONS_PER_ROW - 1) // BUTTONS_PER_ROW
+    view.add_item(discord.ui.Button(custom_id=DONE_ID, emoji=done_emoji, label="완료", style=discord.ButtonStyle.primary, row=last_row))
+    view.add_item(discord.ui.Button(custom_id=SELL_ID, emoji=sell_emoji, label="판매", style=discord.ButtonStyle.secondary, row=last_row))
+    view.stop()
+    return view
+
+
+class ClaimHandlerView(discord.ui.View):
+    """모든 분배 메시지의 버튼 클릭을 받는 영구 뷰 (message_id 없이 add_view)"""
+
+    def __init__(self, handler: ClaimHandler, slots: int):
+        super().__init__(timeout=None)
+        for i in range(slots):
+            self._add(f"{CLAIM_PREFIX}{i}", handler, "claim", i, row=i // BUTTONS_PER_ROW)
+        last_row = (slots + BUTTONS_PER_ROW - 1) // BUTTONS_PER_ROW
+        self._add(DONE_ID, handler, "done", -1, row=last_row)
+        self._add(SELL_ID, handler, "sell", -1, row=last_row)
+
+    def _add(self, custom_id: str, handler: ClaimHandler, action: str, index: int, row: int):
+        button = discord.ui.Button(custom_id=custom_id, label=custom_id, row=row)
+
+        async def _callback(interaction: discord.Interaction):
+            await handler(interaction, action, index)
+
+        button.callback = _callback
+        self.add_item(button)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 슬래시 명령어 동기화 (지문 비교)
+# - 명령어 트리(이름/설명/파라미터 등 discord에 올라가는 payload)를 정렬된 JSON으로 만들어 sha256
+# - 저장소 meta 테이블에 범위(전역/길드)별 지문을 저장해두고, 달라졌을 때만 tree.sync
+#   → 재시작마다 전역 sync(레이트리밋이 빡빡함)를 하지 않아도 되고, 명령어를 바꾸면 알아서 반영
+# - 지문은 sync가 성공한 뒤에만 저장 (실패하면 다음 부팅에 다시 시도)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+from store import DistributionStore
+
+
+def _payload(tree: app_commands.CommandTree, cmd: Any) -> Dict[str, Any]:
+    try:
+        return cmd.to_dict(tree)   # discord.py 2.4+
+    except TypeError:
+        return cmd.to_dict()
+
+
+def command_payload(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> List[Dict[str, Any]]:
+    """sync 때 discord로 보내는 것과 같은 payload 목록 (이름순)"""
+    return sorted((_payload(tree, c) for c in tree.get_commands(guild=guild)), key=lambda d: (d.get("type", 1), d["name"]))
+
+
+def fingerprint(payload: List[Dict[str, Any]]) -> str:
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def meta_key(guild: Optional[discord.abc.Snowflake]) -> str:
+    return f"command_tree:{guild.id}" if guild is not None else "command_tree:global"
+
+
+async def sync_if_changed(tree: app_commands.CommandTree, store: DistributionStore,
+                          guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> Optional[int]:
+    """
+    지문이 저장된 값과 다르면(또는 force) sync 후 지문 저장.
+    sync 했으면 동기화된 명령어 수, 건너뛰었으면 None.
+    """
+    key = meta_key(guild)
+    current = fingerprint(command_payload(tree, guild))
+    try:
+        stored = store.get_meta(key)
+    except Exception as e:
+        print(f"[WARN] 명령어 지문 조회 실패 (sync 진행): {e}")
+        stored = None
+    if not force and stored == current:
+        return None
+    synced = await tree.sync(guild=guild)
+    try:
+        await store.set_meta(key, current)
+    except Exception as e:
+        print(f"[WARN] 명령어 지문 저장 실패: {e}")
+    return len(synced)
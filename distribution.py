@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 분배 레코드 (__slots__ + 배열 기반)
+# - discord 객체(Message/Member/Embed)를 들고 있지 않고 ID만 보관
+#   → discord.py 캐시를 붙잡지 않아 분배 수만 건도 메모리 예산이 예측 가능
+# - 수령 여부는 set 대신 정수 비트마스크 (i번째 비트 = i번째 대상자)
+# - 대상자 ID는 array('Q') (ID당 8바이트)
+# - 임베드는 필요할 때 레코드로부터 렌더링 (봇 쪽 render_embed)
+# - RecipientIndex: 사용자 ID -> 아직 수령 안 한 분배 메시지 ID 집합 (역인덱스)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from store import StoredDistribution
+
+DEFAULT_PRICE = "미입력"
+
+# flags 비트
+FLAG_BUTTONS = 1 << 0   # 리액션 대신 버튼 수령 UI
+
+
+class Distribution:
+    __slots__ = (
+        "message_id", "guild_id", "channel_id", "creator_id",
+        "recipient_ids", "received", "item", "price", "created_at",
+        "flags", "lines",
+    )
+
+    def __init__(self, message_id: int, guild_id: int, channel_id: int, creator_id: int,
+                 recipient_ids: Iterable[int], item: str, created_at: float,
+                 price: str = DEFAULT_PRICE, received: int = 0, flags: int = 0):
+        self.message_id = message_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.creator_id = creator_id
+        self.recipient_ids = array("Q", recipient_ids)
+        self.received = received
+        self.item = item
+        self.price = price
+        self.created_at = created_at      # epoch 초 (time.time())
+        self.flags = flags
+        # 수령자 줄 캐시: 첫 수령 변경 때 만들어 분배가 끝날 때까지 유지 (변경 없는 분배는 None)
+        self.lines: Optional[List[str]] = None
+
+    # --------------- 수령 상태 ---------------
+    @property
+    def recipient_count(self) -> int:
+        return len(self.recipient_ids)
+
+    def is_received(self, index: int) -> bool:
+        return bool(self.received >> index & 1)
+
+    def set_received(self, index: int, on: bool) -> bool:
+        """수령 상태 변경. 실제로 바뀌었으면 True."""
+        if self.is_received(index) == on:
+            return False
+        self.received ^= 1 << index
+        return True
+
+    @property
+    def all_received(self) -> bool:
+        n = len(self.recipient_ids)
+        return n > 0 and self.received == (1 << n) - 1
+
+    def has_open(self, user_id: int) -> bool:
+        """이 사용자 몫 중 아직 수령 안 한 칸이 있는지 (같은 사람이 두 번 들어간 경우 포함)"""
+        return any(uid == user_id and not self.received >> i & 1 for i, uid in enumerate(self.recipient_ids))
+
+    def index_of(self, user_id: int) -> int:
+        """대상자 순번 (없으면 -1)"""
+        try:
+            return self.recipient_ids.index(user_id)
+        except ValueError:
+            return -1
+
+    @property
+    def uses_buttons(self) -> bool:
+        return bool(self.flags & FLAG_BUTTONS)
+
+    # --------------- 표시용 ---------------
+    @property
+    def link(self) -> str:
+        return f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.message_id}"
+
+    def created_at_dt(self, tz) -> datetime:
+        return datetime.fromtimestamp(self.created_at, tz)
+
+    # --------------- 저장 행 변환 ---------------
+    def to_row(self) -> StoredDistribution:
+        return StoredDistribution(
+            message_id=self.message_id,
+            guild_id=self.guild_id,
+            channel_id=self.channel_id,
+            creator_id=self.creator_id,
+            mention_ids=tuple(self.recipient_ids),
+            received=self.received,
+            item=self.item,
+            created_at=datetime.fromtimestamp(self.created_at, timezone.utc),
+            price=self.price,
+            flags=self.flags,
+        )
+
+    @classmethod
+    def from_row(cls, row: StoredDistribution) -> "Distribution":
+        return cls(
+            row.message_id, row.guild_id, row.channel_id, row.creator_id,
+            row.mention_ids, row.item, row.created_at.timestamp(),
+            price=row.price, received=row.received, flags=row.flags,
+        )
+
+
+class RecipientIndex:
+    """
+    사용자 ID -> 미수령 분배 메시지 ID 집합.
+    /분배중 조회 비용을 전체 분배 수가 아니라 그 사용자의 미완료 항목 수에 비례하게 만든다.
+    생성(add) / 수령 토글(refresh) / 종료(remove) 시점에 맞춰 갱신할 것.
+    """
+
+    def __init__(self):
+        self._open: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def add(self, dist: Distribution):
+        for uid in set(dist.recipient_ids):
+            self.refresh(dist, uid)
+
+    def remove(self, dist: Distribution):
+        for uid in set(dist.recipient_ids):
+            self._discard(uid, dist.message_id)
+
+    def refresh(self, dist: Distribution, user_id: int):
+        """수령 상태가 바뀐 뒤 해당 사용자 항목만 다시 맞춘다."""
+        if dist.has_open(user_id):
+            self._open.setdefault(user_id, set()).add(dist.message_id)
+        else:
+            self._discard(user_id, dist.message_id)
+
+    def open_for(self, user_id: int) -> Set[int]:
+        return self._open.get(user_id, set())
+
+    def _discard(self, user_id: int, message_id: int):
+        ids = self._open.get(user_id)
+        if ids is None:
+            return
+        ids.discard(message_id)
+        if not ids:
+            del self._open[user_id]
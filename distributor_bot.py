@@ -1,19 +1,39 @@
 # -*- coding: utf-8 -*-
 # ------------------------------------------------------------
 # Discord 분배 봇 (리팩토링본)
-# - 모든 쓰기 작업(편집/삭제/리액션/스레드초대/DM)을 단일 큐를 통해 직렬화
-# - 임베드 편집 디바운스(동시 반응 폭주 시 1.5초에 1회로 합쳐서 편집)
-# - DM 옵트인 + 사용자 쿨다운 (스팸/남발 방지)
-# - 부팅 시 / 명령어 sync는 환경변수로 제어(SYNC_ON_STARTUP=1 이면 실행)
+# - 모든 쓰기 작업(편집/삭제/리액션/스레드초대/DM)은 레이트리밋 버킷별 레인 스케줄러로
+#   (레인 내부 순서 보장, 레인끼리는 병렬, 전역 초당 요청 상한)
+#   작업은 다시 실행할 수 있는 factory로 등록 → 429/5xx는 백오프 재시도, 끝내 실패하면 데드레터
+#   (관리자는 !실패작업 / !실패재실행 으로 조회·재실행)
+#   우선순위: 임베드 갱신/안내 정리/완료 게시(interactive) > 일반 > 초대/리액션 시딩/DM/스레드 삭제(bulk), bulk도 aging으로 보장
+# - 같은 메시지의 대기 중 편집은 최신 임베드 1건으로 합치고, 삭제가 잡히면 대기 편집은 폐기
+# - 지연 삭제는 타이머 힙에 보관했다가 기한이 되면 큐에 등록 (큐가 sleep으로 막히지 않음)
+# - 임베드 편집은 더티 집합 + 단일 플러셔(반응 폭주 시 메시지당 1.5초에 1회로 합쳐서 편집)
+#   수령자 줄은 갱신 대기 중에만 캐시해두고 상태가 바뀐 줄만 갱신
+# - 분배 상태는 ID만 담는 __slots__ 레코드(Distribution), 임베드는 필요할 때 렌더링
+# - 사용자 ID -> 미수령 분배 역인덱스로 /분배중 조회 (DM 2000자 제한에 맞춰 페이지 분할)
+# - DM 옵트인 + 사용자별 다이제스트 (판매 알림을 잠시 모아 1통으로, 버리지 않음)
+# - 완료 게시판은 종료 임베드를 잠시 모아 메시지 1통에 최대 10개씩 게시 (스레드/원본 정리는 각자 레인)
+# - 분배/옵트인/DM 쿨다운 상태는 SQLite(WAL)에 write-behind로 저장, 재시작 시 그대로 적재
+# - MEMBER_MODE=lazy: 길드 멤버 청크 없이 시작, 필요한 멤버만 LRU+TTL 캐시를 거쳐 조회
+# - 부팅 시 / 명령어 sync는 명령어 트리 지문이 바뀐 경우에만 (SYNC_ON_STARTUP=1 강제, 0 생략)
 # - 반응 처리 사용자별 쿨다운(1.5초)
+# - 쿨다운/DM 간격/임베드 지연 기록은 만료 맵(ExpiringMap)에 → 오래 돌려도 메모리가 늘지 않음, 분배 종료 시 같이 정리
+# - 반응은 raw 이벤트(payload의 message_id/user_id)로 처리 → 메시지 캐시와 무관
+# - CLAIM_MODE=button: 리액션 시딩 대신 버튼 수령 UI (영구 뷰, 인터랙션 응답으로 갱신)
+# - 계측: 핫패스는 카운터/히스토그램만 올리고, 상태 서버의 /metrics(Prometheus) · /debug/state(JSON)가 수집
+# - 상태 서버(aiohttp)는 setup_hook에서 같은 이벤트 루프로 기동, /ready는 게이트웨이 연결 + 큐 적체로 판단
 # Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
 # ------------------------------------------------------------
 
 import os
+import time
 import asyncio
+import logging
 import random
-from typing import Optional, Dict, Set, Tuple, List
+from typing import Optional, Dict, Set, Tuple, List, Iterable
 
+import aiohttp
 import discord
 from discord.ext import commands
 from discord import app_commands
@@ -22,12 +42,28 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
-# keepalive 서버는 루트(/)에 200을 반환하도록 구성해주세요.
-# (UptimeRobot이 HEAD/GET으로 상태 확인 시 200이 떠야 503로 치지 않습니다)
-from keepalive import keep_alive
+# 상태 서버: 루트(/)는 항상 200 (UptimeRobot keepalive 핑용)
+# 실제 장애 감지는 /ready (게이트웨이 끊김/큐 적체 시 503)
+from keepalive import HealthServer
+from metrics import Registry, LogMatchCounter
+from scheduler import (
+    WriteScheduler, RateLimiter, GLOBAL_LANE, channel_lane, message_lane, reaction_lane, thread_lane, dm_lane,
+    edit_key, delete_key, INTERACTIVE, NORMAL, BULK, PRIORITY_NAMES,
+)
+from retry import RetryPolicy, DeadLetterQueue
+from timers import DelayedActions
+from dm_digest import DigestBuffer
+from archive import ArchiveBuffer
+from store import DistributionStore
+from expiring import ExpiringMap
+from reconcile import Reconciler
+from command_sync import sync_if_changed
+from distribution import Distribution, RecipientIndex, DEFAULT_PRICE, FLAG_BUTTONS
+from members import MemberCache, parse_mention_ids, resolve_members
+from claim_ui import ClaimHandlerView, render_claim_view
 
 # ================== 기본 설정 ==================
-keep_alive()
+BOOT_TS = time.monotonic()
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 
@@ -40,37 +76,123 @@ intents.message_content = True
 intents.reactions = True
 intents.members = True
 
+# 멤버 캐시 모드
+# - full(기본): 시작 시 모든 길드 멤버를 청크로 내려받아 캐시
+# - lazy: 청크 없이 바로 준비 완료, 멤버 캐시는 끄고 필요한 멤버만 조회해 LRU+TTL로 보관
+MEMBER_MODE = os.getenv("MEMBER_MODE", "full")
+LAZY_MEMBERS = MEMBER_MODE == "lazy"
+MEMBER_CACHE_SIZE = 2048
+MEMBER_CACHE_TTL  = 600.0
+
 # 숫자 이모지(최대 10명), 완료/판매 이모지
 emoji_list = ['1️⃣','2️⃣','3️⃣','4️⃣','5️⃣','6️⃣','7️⃣','8️⃣','9️⃣','🔟']
 check_emoji = '✅'
 sell_emoji  = '💰'
 
+# 수령 UI 모드
+# - reaction(기본): 번호/✅/💰 리액션을 달고 반응으로 처리
+# - button: 첫 메시지에 버튼을 같이 보냄 (리액션 시딩 없음). 예전 리액션 게시글도 계속 동작
+CLAIM_MODE = os.getenv("CLAIM_MODE", "reaction")
+
 # 완료 채널 ID (필요에 맞게 설정)
 완료_채널_ID = 1399368173949550692
 
-# 분배 상태 메모리
-distribution_data: Dict[int, dict] = {}
+# 분배 상태 메모리 (message_id -> ID만 담은 레코드)
+# discord 객체는 들고 있지 않으므로 재시작 후에도 저장 행에서 바로 만들 수 있다.
+distribution_data: Dict[int, Distribution] = {}
 delete_delay = 10
 
+# 사용자 ID -> 아직 수령 안 한 분배 메시지 ID (생성/수령 토글/종료 시 갱신)
+recipient_index = RecipientIndex()
+
+# DM 한 통 최대 글자 수 (디스코드 제한)
+DM_MAX_CHARS = 2000
+
+# 영구 저장소 (도커 재배포 시에도 남도록 볼륨 경로 권장)
+STORE_PATH = os.getenv("STORE_PATH", "distributor.db")
+STORE_FLUSH_INTERVAL = 2.0
+
+# discord.py 메시지 캐시 크기 (반응 처리는 raw 이벤트라 캐시에 의존하지 않으므로 작게)
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "100"))
+
 # ====== 레이트리밋/큐 설정 ======
 DELAY_JITTER_RANGE = (0.00, 0.15)
 INVITE_DELAY_BASE   = 0.30
-REACTION_DELAY_BASE = 0.25
-DM_DELAY_BASE       = 1.00
+INVITE_CONCURRENCY  = 4        # 스레드 하나에 동시에 보내는 초대 수
 ACTION_DELAY_BASE   = 0.10
 
 MAX_REACTIONS_PER_MESSAGE = 12
 
+# 쓰기 스케줄러: 전역 초당 요청 수 상한 / 순간 허용량 / 동시 실행 레인 수
+GLOBAL_RPS           = 40.0
+GLOBAL_BURST         = 10
+MAX_CONCURRENT_LANES = 8
+SHUTDOWN_DRAIN_TIMEOUT = 5.0   # 종료 시 남은 쓰기 작업을 기다리는 최대 시간 (초)
+PRIORITY_AGING       = 3.0     # 낮은 우선순위 레인이 이만큼 기다리면 먼저 실행 (초)
+
+# 상태 서버
+HEALTH_HOST = os.getenv("HEALTH_HOST", "0.0.0.0")
+HEALTH_PORT = int(os.getenv("PORT", "8080"))
+READY_MAX_QUEUE_DEPTH = 500    # 쓰기 큐가 이보다 쌓이면 /ready 503
+
+# 쓰기 작업 재시도 (429/5xx/네트워크 오류). discord.py 내부 재시도를 다 쓰고 올라온 오류에 한 번 더 적용
+RETRY_MAX_ATTEMPTS = 5         # 첫 시도 포함
+RETRY_BASE_DELAY   = 1.0       # 서버가 대기 시간을 안 줬을 때 지수 백오프 시작값 (초)
+RETRY_MAX_DELAY    = 60.0
+DEAD_LETTER_LIMIT  = 200       # 데드레터 보관 건수 (넘치면 오래된 것부터 버림)
+
 # 임베드 편집 디바운스 윈도우 (초)
 UPDATE_WINDOW = 1.5
 
-# 사용자별 리액션 처리 쿨다운(초)
+# 완료 게시판 묶음 전송: 첫 종료 후 이만큼 모아서 메시지 1통으로 (10개가 차면 바로)
+ARCHIVE_WINDOW = 3.0
+
+# 사용자별 숫자 리액션 처리 쿨다운(초). 버린 이벤트는 재조정기가 실제 리액션으로 메우므로 처리량 최적화일 뿐
 REACTION_COOLDOWN = 1.5
 
-# DM 관련 (옵트인 + 쿨다운)
+# 리액션 상태 재조정 (쿨다운으로 버린 이벤트 / 재시작 동안 놓친 이벤트 복원)
+RECONCILE_DELAY       = 5.0    # 마지막으로 이벤트를 버린 뒤 이만큼 조용하면 재조정 (초)
+RECONCILE_RATE        = 0.5    # 재조정 예산: 초당 메시지 수 (메시지당 조회 1회 + 누른 사람이 있는 이모지 수)
+RECONCILE_BURST       = 3
+RECONCILE_BOOT_DELAY  = 5.0    # 재시작 후 진행 중 분배 전체 재조정 시작 지연 (준비 완료 후 예산대로 흘림)
+RECONCILE_RETRY_DELAY = 30.0
+
+# 임베드 반영 지연 계측용 기록 보관 시간 (초)
+EMBED_LATENCY_TTL = 600.0
+
+# DM 관련 (옵트인 + 다이제스트)
 opt_in_users: Set[int] = set()         # DM 수신 동의한 사용자 ID 집합
-USER_DM_COOLDOWN = 3600                # 1시간에 1회 (유저별)
-last_user_dm: Dict[int, float] = {}    # user_id -> monotonic_ts
+DM_DIGEST_WINDOW = 30.0                # 첫 알림 후 이만큼 모아서 1통으로 전송 (초)
+DM_MIN_INTERVAL  = 300.0               # 같은 사용자에게 다이제스트 사이 최소 간격 (넘치면 기한을 늦춤, 버리지 않음)
+DM_RATE          = 2.0                 # DM 전송 전역 상한 (초당)
+DM_BURST         = 5
+# user_id -> time.time() (재시작 후에도 유지되도록 벽시계 기준)
+# 최소 간격이 지나면 값이 있어도 없어도 결과가 같으므로 그때 만료
+last_user_dm = ExpiringMap(DM_MIN_INTERVAL, resolution=60.0, clock=time.time)
+
+# ====== 계측 ======
+# 핫패스에서는 .inc() / .observe()만. 게이지는 수집 시점에 함수로 읽는다 (register_runtime_metrics)
+metrics = Registry(prefix="distbot_")
+REACTION_RESULTS = ("applied", "unchanged", "cooldown", "sell", "done", "ignored")
+reaction_events = {
+    r: metrics.counter("reaction_events_total", "리액션 이벤트 처리 결과별 횟수", result=r) for r in REACTION_RESULTS
+}
+reaction_handle_hist = metrics.histogram("reaction_handle_seconds", "handle_reaction_event 처리 시간")
+embed_updates_scheduled = metrics.counter("embed_updates_scheduled_total", "임베드 갱신 예약(더티 표시) 횟수")
+embed_update_latency = metrics.histogram("embed_update_latency_seconds", "수령 상태 변경 → 임베드 편집 반영까지 걸린 시간")
+# discord.py가 429를 받고 내부에서 기다린 횟수 (경고 로그 포맷 문자열로 판별)
+# 전역 429 1건은 "We are being rate limited..."와 "Global rate limit has been hit..."를 둘 다 남김
+# → 429 횟수는 앞쪽만 세고, 그중 전역 429는 따로 셈
+discord_rate_limits = LogMatchCounter("We are being rate limited")
+discord_global_rate_limits = LogMatchCounter("Global rate limit has been hit")
+logging.getLogger("discord.http").addHandler(discord_rate_limits)
+logging.getLogger("discord.http").addHandler(discord_global_rate_limits)
+metrics.add_source("discord_rate_limit_hits_total", "counter", "discord.py HTTP 계층이 받은 429 횟수", discord_rate_limits)
+metrics.add_source("discord_global_rate_limit_hits_total", "counter", "그중 전역 429 횟수", discord_global_rate_limits)
+RECONCILE_RESULTS = ("clean", "corrected", "raced", "gone")
+reconcile_results = {
+    r: metrics.counter("reconcile_total", "리액션 상태 재조정 결과별 횟수", result=r) for r in RECONCILE_RESULTS
+}
 
 def with_jitter(base: float) -> float:
     lo, hi = DELAY_JITTER_RANGE
@@ -80,252 +202,644 @@ async def pace(base: float):
     await asyncio.sleep(with_jitter(base))
 
 # ================== 유틸 ==================
-async def _safe_delete_impl(msg: discord.Message, delay=delete_delay):
-    """큐 내부에서 실행되는 안전 삭제(지연 후 삭제)."""
+async def _safe_delete_impl(msg: discord.Message):
+    """큐 내부에서 실행되는 안전 삭제 (지연은 DelayedActions가 담당).
+       이미 지워진 메시지는 성공으로 치고, 그 외 오류는 스케줄러의 재시도 규칙에 맡긴다.
+    """
     try:
-        await asyncio.sleep(delay)
         await msg.delete()
-    except Exception as e:
-        print(f"[WARN] 메시지 삭제 실패: {e}")
+    except discord.NotFound:
+        pass
+
+async def _edit_impl(msg: discord.Message, kwargs: dict, rendered_at: Optional[float]):
+    await msg.edit(**kwargs)
+    if rendered_at is not None:
+        record_embed_applied(msg.id, rendered_at)
+
+async def _safe_thread_delete_impl(thread: discord.Thread):
+    try:
+        await thread.delete()
+    except discord.NotFound:
+        pass
+
+async def _safe_add_reaction_impl(msg: discord.Message, emoji: str):
+    # 리액션 레인은 메시지 레인과 따로 돌아서, 시딩 도중 분배가 끝나 메시지가 먼저 지워질 수 있다
+    try:
+        await msg.add_reaction(emoji)
+    except discord.NotFound:
+        pass
 
 # ================== Bot ==================
 class MyBot(commands.Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.bg_queue: Optional[asyncio.Queue] = None
-        self.bg_worker_task: Optional[asyncio.Task] = None
+        self.scheduler: Optional[WriteScheduler] = None
 
-        # 디바운스 관리: msg_id -> asyncio.Task
-        self.update_tasks: Dict[int, asyncio.Task] = {}
+        # 지연 삭제 등 기한부 작업 (기한 도달 시 스케줄러에 등록)
+        self.timers = DelayedActions()
 
-        # (msg_id, user_id) -> last_ts
-        self.last_reaction_ts: Dict[Tuple[int, int], float] = {}
+        # 사용자별 판매 알림 다이제스트 → 기한에 DM 레인으로 전송 (레인끼리 병렬, DM 전역 상한)
+        self.dm_digest = DigestBuffer(self.timers, self._submit_dm_digest)
+        self.dm_limiter: Optional[RateLimiter] = None
+
+        # 완료 게시판 임베드 묶음 → 기한(또는 10개)에 완료 채널 레인으로 1통 전송
+        self.archive = ArchiveBuffer(
+            self.timers,
+            lambda cid, embeds: self.enqueue_bg_nowait(
+                lambda: send_archive(cid, embeds), lane=channel_lane(cid), name=f"완료 게시 {len(embeds)}건", priority=INTERACTIVE),
+            window=ARCHIVE_WINDOW,
+        )
+
+        # lazy 모드에서 필요한 멤버만 잠시 보관 (full 모드에서는 거의 항상 get_member로 해결)
+        self.member_cache = MemberCache(MEMBER_CACHE_SIZE, MEMBER_CACHE_TTL)
+
+        # 영구 저장소
+        self.store = DistributionStore(STORE_PATH, flush_interval=STORE_FLUSH_INTERVAL)
+
+        # 임베드 갱신 대기 중인 메시지 ID (플러셔 1개가 윈도우마다 비움)
+        self.dirty_embeds: Set[int] = set()
+        self.dirty_event: Optional[asyncio.Event] = None
+        self.embed_flusher_task: Optional[asyncio.Task] = None
+
+        # (msg_id, user_id) -> last_ts. 쿨다운이 지나면 만료, 분배 종료 시 메시지 단위로 삭제
+        self.last_reaction_ts = ExpiringMap(REACTION_COOLDOWN, group_of=lambda k: k[0])
+
+        # msg_id -> 처리한 리액션 이벤트 수 (재조정 조회 도중 이벤트가 끼어들었는지 판별)
+        self.reaction_gen: Dict[int, int] = {}
+
+        # 의심 메시지 재조정 (실행 함수는 아래 모듈 수준에 정의 → 호출 시점에 찾음)
+        self.reconciler = Reconciler(
+            self.timers, lambda msg_id: reconcile_distribution(msg_id),
+            delay=RECONCILE_DELAY, rate=RECONCILE_RATE, burst=RECONCILE_BURST, retry_delay=RECONCILE_RETRY_DELAY,
+        )
+
+        # 임베드에 아직 반영 안 된 첫 상태 변경 시각 (msg_id -> time.monotonic(), 지연 계측용)
+        # 편집이 끝내 실패해도 남지 않도록 만료
+        self.embed_dirty_since = ExpiringMap(EMBED_LATENCY_TTL, resolution=10.0)
+
+        # 게이트웨이 연결 상태 (connect/disconnect/resumed 이벤트로 갱신)
+        self.gateway_connected = False
+
+        # 상태 서버 (/, /ready, /metrics, /debug/state)
+        self.health: Optional[HealthServer] = None
 
     async def setup_hook(self):
-        # 큐/워커를 현재 이벤트 루프에서 생성
-        self.bg_queue = asyncio.Queue()
-        self.bg_worker_task = asyncio.create_task(self.background_worker())
+        # 스케줄러를 현재 이벤트 루프에서 생성
+        self.scheduler = WriteScheduler(
+            rate=GLOBAL_RPS,
+            burst=GLOBAL_BURST,
+            max_concurrency=MAX_CONCURRENT_LANES,
+            lane_delay=lambda: with_jitter(ACTION_DELAY_BASE),
+            retry=RetryPolicy(
+                max_attempts=RETRY_MAX_ATTEMPTS,
+                base=RETRY_BASE_DELAY,
+                cap=RETRY_MAX_DELAY,
+                transient=(asyncio.TimeoutError, OSError, aiohttp.ClientConnectionError),
+            ),
+            dead_letters=DeadLetterQueue(DEAD_LETTER_LIMIT),
+            aging=PRIORITY_AGING,
+        )
+        self.scheduler.start()
+        self.timers.start()
+        self.reconciler.start(ready_gate=self.wait_until_ready)
+        self.dm_limiter = RateLimiter(DM_RATE, DM_BURST)
+        # 버튼 게시글용 영구 뷰 1개 (모드와 무관하게 등록 → 모드를 바꿔도 기존 버튼 동작)
+        self.add_view(ClaimHandlerView(handle_claim_interaction, len(emoji_list)))
+        self.dirty_event = asyncio.Event()
+        self.embed_flusher_task = asyncio.create_task(embed_flusher())
+        register_runtime_metrics()
+        self.health = HealthServer(HEALTH_HOST, HEALTH_PORT, readiness, metrics.render, debug_state)
+        try:
+            await self.health.start()
+            print(f"🩺 상태 서버 시작: {HEALTH_HOST}:{HEALTH_PORT} | 부팅 {time.monotonic() - BOOT_TS:.2f}s | RSS {rss_mib():.1f} MiB")
+        except OSError as e:
+            print(f"❌ 상태 서버 시작 실패 (봇은 계속 동작): {e}")
 
-        # / 명령어 동기화: 환경변수로 제어
+        # 저장소 적재: 레코드는 ID만 담으므로 discord 객체 조회 없이 바로 복원
         try:
-            if os.getenv("SYNC_ON_STARTUP") == "1":
+            self.store.open()
+            for msg_id, row in self.store.load_distributions().items():
+                dist = Distribution.from_row(row)
+                distribution_data[msg_id] = dist
+                recipient_index.add(dist)
+            opt_in_users.update(self.store.load_opt_in_users())
+            # 최소 간격이 이미 지난 기록은 의미 없으므로 적재하지 않고 DB에서도 정리
+            now = time.time()
+            self.store.prune_user_dm(now - DM_MIN_INTERVAL)
+            for uid, ts in self.store.load_user_dm().items():
+                last_user_dm.set(uid, ts, ttl=ts + DM_MIN_INTERVAL - now)
+            print(f"💾 저장소 적재: 진행 중 분배 {len(distribution_data)}건, 알림동의 {len(opt_in_users)}명")
+            # 꺼져 있던 동안의 리액션은 이벤트로 오지 않으므로 리액션 모드 분배는 모두 재조정
+            suspects = [d.message_id for d in distribution_data.values() if not d.uses_buttons]
+            for msg_id in suspects:
+                self.reconciler.mark(msg_id, delay=RECONCILE_BOOT_DELAY)
+            if suspects:
+                print(f"🔧 재시작 재조정 예약: {len(suspects)}건")
+        except Exception as e:
+            print(f"❌ 저장소 적재 실패 (메모리 전용으로 동작): {e}")
+        self.store.start()
+
+        # / 명령어 동기화: 트리 지문이 저장된 값과 다를 때만
+        # SYNC_ON_STARTUP=1 이면 지문과 무관하게 강제, 0 이면 아예 생략
+        sync_mode = os.getenv("SYNC_ON_STARTUP", "auto")
+        try:
+            if sync_mode == "0":
+                print("ℹ️ SYNC_ON_STARTUP=0 이므로 /명령어 동기화 생략")
+            else:
                 # 개발시 특정 길드만 싱크 권장: GUILD_SYNC_ID 사용
                 guild_id_str = os.getenv("GUILD_SYNC_ID")
-                if guild_id_str:
-                    gobj = discord.Object(id=int(guild_id_str))
-                    synced = await self.tree.sync(guild=gobj)
-                    print(f"✅ 길드({guild_id_str}) 슬래시 {len(synced)}개 동기화 완료")
+                gobj = discord.Object(id=int(guild_id_str)) if guild_id_str else None
+                scope = f"길드({guild_id_str})" if gobj else "전역"
+                synced = await sync_if_changed(self.tree, self.store, guild=gobj, force=sync_mode == "1")
+                if synced is None:
+                    print(f"ℹ️ {scope} /명령어 변경 없음 → 동기화 생략")
                 else:
-                    synced = await self.tree.sync()
-                    print(f"✅ 전역 슬래시 {len(synced)}개 동기화 완료")
-            else:
-                print("ℹ️ SYNC_ON_STARTUP=1 이 아니므로 /명령어 동기화 생략")
+                    print(f"✅ {scope} 슬래시 {synced}개 동기화 완료")
         except Exception as e:
             print(f"❌ 슬래시 명령어 동기화 실패/생략: {e}")
 
-    async def background_worker(self):
-        """전역 백그라운드 큐 1개 워커로 순차 처리"""
-        assert self.bg_queue is not None
-        while True:
-            job_coro = await self.bg_queue.get()
-            try:
-                await job_coro
-            except Exception as e:
-                print(f"[ERROR] bg job 실패: {e}")
-            finally:
-                self.bg_queue.task_done()
-                await pace(ACTION_DELAY_BASE)
+    async def close(self):
+        if self.embed_flusher_task is not None:
+            self.embed_flusher_task.cancel()
+        if self.scheduler is not None:
+            # 모아둔 DM은 기한 전이라도 내보내고 잠깐 비워질 때까지 기다림
+            self.dm_digest.flush_all()
+            self.archive.flush_all()
+            await self.scheduler.drain(SHUTDOWN_DRAIN_TIMEOUT)
+        self.reconciler.close()
+        self.timers.close()
+        if self.scheduler is not None:
+            await self.scheduler.close()
+        try:
+            await self.store.close()
+        except Exception as e:
+            print(f"[ERROR] 저장소 종료 플러시 실패: {e}")
+        if self.health is not None:
+            await self.health.close()
+        await super().close()
+
+    async def enqueue_bg(self, factory, lane=GLOBAL_LANE, name="", priority=NORMAL):
+        """스케줄러에 작업 등록 (모든 쓰기 작업은 여기로)
+           factory는 호출할 때마다 새 코루틴을 만드는 함수 (재시도 시 다시 호출됨).
+           같은 lane 안에서는 등록 순서대로 실행된다. lane 미지정 시 전역 레인.
+           priority: INTERACTIVE(사용자가 바로 보는 것) / NORMAL / BULK(몰아서 처리해도 되는 것)
+        """
+        self.enqueue_bg_nowait(factory, lane=lane, name=name, priority=priority)
 
-    async def enqueue_bg(self, coro):
-        """큐에 작업 등록 (모든 쓰기 작업은 여기로)"""
-        assert self.bg_queue is not None
-        await self.bg_queue.put(coro)
+    def enqueue_bg_nowait(self, factory, lane=GLOBAL_LANE, key=None, name="", priority=NORMAL):
+        """동기 콜백(타이머 등)에서 쓰는 등록 함수. key가 같으면 대기 중 작업을 대체한다."""
+        assert self.scheduler is not None
+        self.scheduler.submit(lane, factory, key=key, name=name, priority=priority)
 
     # --------------- 공용 쓰기 래퍼 ---------------
-    async def enqueue_edit_message(self, message: discord.Message, embed: discord.Embed):
-        await self.enqueue_bg(message.edit(embed=embed))
+    async def enqueue_edit_message(self, message: discord.Message, embed: discord.Embed, view: Optional[discord.ui.View] = None,
+                                   rendered_at: Optional[float] = None):
+        # 같은 메시지의 편집이 아직 대기 중이면 최신 임베드로 교체 (API 호출 1회)
+        # view=None은 '컴포넌트 유지' (edit에 view=None을 넘기면 버튼이 지워지므로 아예 안 넘김)
+        # rendered_at: 임베드를 렌더링한 시각 (그 이전 상태 변경만 반영된 것으로 계측)
+        kwargs = {"embed": embed} if view is None else {"embed": embed, "view": view}
+        self.enqueue_bg_nowait(lambda: _edit_impl(message, kwargs, rendered_at), lane=message_lane(message.id),
+                               key=edit_key(message.id), name=f"편집 {message.id}", priority=INTERACTIVE)
+
+    def _submit_delete(self, message: discord.Message):
+        # 삭제될 메시지의 대기 중 편집은 의미가 없으므로 버린다
+        assert self.scheduler is not None
+        self.scheduler.discard(edit_key(message.id))
+        self.enqueue_bg_nowait(lambda: _safe_delete_impl(message), lane=message_lane(message.id),
+                               key=delete_key(message.id), name=f"삭제 {message.id}", priority=INTERACTIVE)
+
+    def _submit_dm_digest(self, user_id: int, entries: List[Tuple[int, str]]):
+        # 재시도 사이에 공유하는 진행 상태 (보낸 페이지 수) → 재시도는 못 보낸 페이지부터
+        sent = [0]
+        self.enqueue_bg_nowait(lambda: send_dm_digest(user_id, entries, sent), lane=dm_lane(user_id),
+                               name=f"DM 다이제스트 {user_id}", priority=BULK)
 
     async def enqueue_add_reaction(self, message: discord.Message, emoji: str):
-        async def _job():
-            await message.add_reaction(emoji)
-        await self.enqueue_bg(_job())
+        await self.enqueue_bg(lambda: _safe_add_reaction_impl(message, emoji), lane=reaction_lane(message.id),
+                              name=f"리액션 {emoji} {message.id}", priority=BULK)
 
-    async def enqueue_thread_add_user(self, thread: discord.Thread, member: discord.Member):
-        async def _job():
-            await thread.add_user(member)
-        await self.enqueue_bg(_job())
-
-    async def enqueue_send(self, channel: discord.abc.Messageable, *args, **kwargs):
+    async def enqueue_delete(self, message: discord.Message, delay: int = delete_delay, group: Optional[int] = None):
         """
-        주의: 반환값(Message)이 필요하면 이 래퍼 대신 직접 await channel.send(...) 사용.
-        이 래퍼는 큐로만 흘려보내므로 반환값이 없다.
+        delay초 뒤 삭제. 대기는 타이머 힙에서 하고, 기한이 되면 메시지 레인에 등록한다.
+        group(분배 메시지 ID)을 주면 분배 종료 시 timers.fire_group(group)으로 앞당겨 삭제된다.
         """
-        async def _job():
-            await channel.send(*args, **kwargs)
-        await self.enqueue_bg(_job())
-
-    async def enqueue_delete(self, message: discord.Message, delay: int = delete_delay):
-        await self.enqueue_bg(_safe_delete_impl(message, delay=delay))
+        if delay <= 0:
+            self._submit_delete(message)
+            return
+        self.timers.call_later(delay, lambda: self._submit_delete(message), group=group)
 
     async def enqueue_thread_delete(self, thread: discord.Thread):
-        async def _job():
-            await thread.delete()
-        await self.enqueue_bg(_job())
+        # 아무도 기다리지 않는 정리 작업 → 완료 게시/임베드 갱신에 실행 슬롯을 양보
+        await self.enqueue_bg(lambda: _safe_thread_delete_impl(thread), lane=thread_lane(thread.id),
+                              name=f"스레드 삭제 {thread.id}", priority=BULK)
+
+def rss_mib() -> float:
+    """현재 프로세스 RSS (MiB). /proc 없으면 최대 RSS로 대체."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
 # Bot 인스턴스
-bot = MyBot(command_prefix="!", intents=intents)
+bot = MyBot(
+    command_prefix="!",
+    intents=intents,
+    max_messages=MESSAGE_CACHE_SIZE,
+    chunk_guilds_at_startup=not LAZY_MEMBERS,
+    member_cache_flags=discord.MemberCacheFlags.none() if LAZY_MEMBERS else discord.MemberCacheFlags.from_intents(intents),
+)
+
+def register_runtime_metrics():
+    """스케줄러/저장소 등 setup_hook에서 만들어지는 객체의 지표를 등록 (값은 수집 시점에 읽음)"""
+    sched = bot.scheduler
+    assert sched is not None
+    for cls, name in enumerate(PRIORITY_NAMES):
+        metrics.counter_fn("jobs_submitted_total", "쓰기 큐 등록 수 (합치기 포함)", lambda cls=cls: sched.submitted[cls], priority=name)
+        metrics.histogram("job_queue_wait_seconds", "쓰기 작업 등록 → 실행 시작 대기 시간", sched.wait_hist[cls], priority=name)
+    metrics.counter_fn("jobs_coalesced_total", "대기 중 작업에 합쳐진 등록 수", lambda: sched.coalesced)
+    metrics.counter_fn("jobs_completed_total", "성공한 쓰기 작업 수", lambda: sched.completed)
+    metrics.counter_fn("jobs_failed_total", "포기한 쓰기 작업 수 (재시도 소진 포함)", lambda: sched.failed)
+    metrics.counter_fn("jobs_retried_total", "재시도 예약 횟수", lambda: sched.retried)
+    metrics.counter_fn("jobs_rate_limited_total", "429로 실패한 작업 실행 수", lambda: sched.rate_limited)
+    metrics.histogram("job_run_seconds", "쓰기 작업 1회 실행 시간", sched.run_hist)
+    metrics.gauge("queue_depth", "대기 중 쓰기 작업 수 (재시도 대기 포함)", lambda: sched.depth)
+    metrics.gauge("queue_parked", "백오프 중인 쓰기 작업 수", lambda: sched.parked)
+    metrics.gauge("queue_inflight", "실행 중인 쓰기 작업 수", lambda: sched.inflight)
+    metrics.gauge("queue_lanes", "작업이 남아 있는 레인 수", lambda: sched.lane_count)
+    metrics.gauge("dead_letters", "데드레터 보관 건수", lambda: len(sched.dead_letters))
+    metrics.gauge("open_distributions", "진행 중 분배 수", lambda: len(distribution_data))
+    metrics.gauge("dirty_embeds", "갱신 대기 중 임베드 수", lambda: len(bot.dirty_embeds))
+    metrics.gauge("dm_digest_users", "다이제스트 대기 사용자 수", lambda: len(bot.dm_digest))
+    metrics.gauge("archive_pending", "완료 게시 대기 임베드 수", lambda: len(bot.archive))
+    metrics.counter_fn("archive_completions_total", "완료 게시판에 올린 분배 수", lambda: bot.archive.added)
+    metrics.counter_fn("archive_posts_total", "완료 게시판 메시지 수 (묶음 1통 = 1)", lambda: bot.archive.posts)
+    metrics.gauge("timers_pending", "지연 작업 수", lambda: len(bot.timers))
+    metrics.gauge("reconcile_pending", "재조정 대기 메시지 수", lambda: bot.reconciler.pending)
+    metrics.counter_fn("reconcile_failures_total", "재조정 실행 실패 (재시도 예약됨)", lambda: bot.reconciler.failures)
+    for name, m in (("reaction_cooldown", bot.last_reaction_ts), ("user_dm", last_user_dm),
+                    ("embed_dirty_since", bot.embed_dirty_since)):
+        metrics.gauge("expiring_map_entries", "만료 맵 항목 수", lambda m=m: len(m), map=name)
+        metrics.counter_fn("expiring_map_expired_total", "만료로 지운 항목 수", lambda m=m: m.expired, map=name)
+    metrics.gauge("store_pending_writes", "저장소 플러시 대기 건수", lambda: bot.store.pending)
+    metrics.counter_fn("member_cache_hits_total", "멤버 캐시 적중", lambda: bot.member_cache.hits)
+    metrics.counter_fn("member_cache_misses_total", "멤버 캐시 미스", lambda: bot.member_cache.misses)
+    metrics.gauge("gateway_connected", "게이트웨이 연결 여부 (1/0)", lambda: int(bot.gateway_connected))
+    metrics.gauge("gateway_latency_seconds", "게이트웨이 하트비트 지연", lambda: bot.latency)
+    metrics.gauge("uptime_seconds", "프로세스 시작 후 경과 시간", lambda: time.monotonic() - BOOT_TS)
+    metrics.gauge("resident_memory_mib", "프로세스 RSS (MiB)", rss_mib)
+
+def readiness() -> Tuple[bool, dict]:
+    """/ready 판단: 게이트웨이 연결 + 준비 완료 + 쓰기 큐 적체 상한"""
+    depth = bot.scheduler.depth if bot.scheduler is not None else 0
+    detail = {"gateway_connected": bot.gateway_connected, "bot_ready": bot.is_ready(), "queue_depth": depth}
+    return bot.gateway_connected and bot.is_ready() and depth <= READY_MAX_QUEUE_DEPTH, detail
+
+def debug_state() -> dict:
+    """/debug/state 응답"""
+    sched = bot.scheduler
+    assert sched is not None
+    return {
+        "uptime_seconds": round(time.monotonic() - BOOT_TS, 1),
+        "rss_mib": round(rss_mib(), 1),
+        "modes": {"member": MEMBER_MODE, "claim": CLAIM_MODE},
+        "gateway": {
+            "connected": bot.gateway_connected,
+            "ready": bot.is_ready(),
+            "latency": bot.latency if bot.latency == bot.latency else None,   # NaN이면 None
+            "guilds": len(bot.guilds),
+        },
+        "queue": {
+            "depth": sched.depth,
+            "parked": sched.parked,
+            "inflight": sched.inflight,
+            "lanes": sched.lane_count,
+            "busiest_lanes": [[str(lane), n] for lane, n in sched.busiest_lanes()],
+            "wait": sched.wait_summary(),
+        },
+        "dead_letters": [
+            {"seq": d.seq, "name": d.name, "attempts": d.attempts, "error": d.error, "failed_at": d.failed_at}
+            for d in sched.dead_letters.list()
+        ],
+        "distributions": {"open": len(distribution_data), "dirty_embeds": len(bot.dirty_embeds),
+                          "indexed_users": len(recipient_index)},
+        "dm_digest": {"users": len(bot.dm_digest), "entries": bot.dm_digest.entry_count, "opt_in": len(opt_in_users)},
+        "archive": {"pending": len(bot.archive), "completions": bot.archive.added, "posts": bot.archive.posts},
+        "timers": len(bot.timers),
+        "reconcile": {"pending": bot.reconciler.pending, "runs": bot.reconciler.runs, "failures": bot.reconciler.failures},
+        "store_pending": bot.store.pending,
+        "metrics": metrics.snapshot(),
+    }
+
+@bot.event
+async def on_connect():
+    bot.gateway_connected = True
+
+@bot.event
+async def on_resumed():
+    bot.gateway_connected = True
+
+@bot.event
+async def on_disconnect():
+    bot.gateway_connected = False
+
+@bot.event
+async def on_ready():
+    # 두 멤버 모드 비교용: 프로세스 시작 → 준비 완료 시간과 RSS
+    print(f"🚀 준비 완료 ({bot.user}) | 멤버 모드={MEMBER_MODE} | 길드 {len(bot.guilds)}개 | "
+          f"부팅 {time.monotonic() - BOOT_TS:.1f}s | RSS {rss_mib():.1f} MiB")
 
 # ================== 게시글 즉시 표시 ==================
+def recipient_line(index: int, user_id: int, received: bool) -> str:
+    line = f"{emoji_list[index]} <@{user_id}>"
+    return line + " ✅" if received else line
+
+def build_embed(msg_id: Optional[int], item: str, dt: datetime, creator_mention: str, lines: List[str], price: str, buttons: bool = False) -> discord.Embed:
+    date_str = dt.strftime('%m/%d')
+    time_str = dt.strftime('%p %I:%M').replace('AM','오전').replace('PM','오후')
+
+    title = f"🍆 아이템 분배 안내 (ID: {msg_id})" if msg_id else "🍆 아이템 분배 안내"
+    embed = discord.Embed(title=title, color=0x9146FF)
+    summary = f"🎁 아이템명 : {item}\n📅 날짜 및 시간 : {date_str} {time_str}\n👤 생성자 : {creator_mention}"
+    embed.add_field(name="ℹ️ 기본 정보", value=summary, inline=False)
+    embed.add_field(name="🎯 수령 대상자", value="\n".join(lines) if lines else "등록된 대상자가 없습니다.", inline=False)
+    if buttons:
+        usage = "🔸 번호 버튼 누르면 수령 처리! (한 번 더 누르면 취소)\n✅ 완료 버튼은 완료게시판으로 이동!\n💰 판매 버튼은 판매완료 DM 전송!"
+    else:
+        usage = "🔸 번호 이모지 누르면 수령 처리!\n✅ 누르면 완료게시판으로 이동!\n💰 누르면 판매완료 DM 전송!"
+    embed.add_field(name="📢 사용법", value=usage, inline=False)
+    embed.add_field(name="💸 판매금액", value=price, inline=False)
+    return embed
+
+def render_embed(dist: Distribution) -> discord.Embed:
+    """레코드로부터 임베드를 그때그때 렌더링 (임베드 객체는 보관하지 않음)"""
+    lines = dist.lines if dist.lines is not None else [
+        recipient_line(i, uid, dist.is_received(i)) for i, uid in enumerate(dist.recipient_ids)
+    ]
+    return build_embed(dist.message_id, dist.item, dist.created_at_dt(KST), f"<@{dist.creator_id}>", lines, dist.price, dist.uses_buttons)
+
+def claim_view(dist: Distribution) -> Optional[discord.ui.View]:
+    """버튼 모드 게시글이면 현재 수령 상태를 반영한 버튼, 아니면 None"""
+    if not dist.uses_buttons:
+        return None
+    return render_claim_view(dist.recipient_count, dist.received, emoji_list, check_emoji, sell_emoji)
+
+async def enqueue_render(dist: Distribution):
+    """레코드를 렌더링해 메시지 편집을 큐에 (대기 중 편집이 있으면 합쳐짐)"""
+    rendered_at = time.monotonic()
+    embed = render_embed(dist)
+    message = partial_message(dist)
+    if message is not None:
+        await bot.enqueue_edit_message(message, embed, claim_view(dist), rendered_at=rendered_at)
+
+def partial_message(dist: Distribution) -> Optional[discord.PartialMessage]:
+    """API 호출 없이 편집/삭제/리액션에 쓸 수 있는 메시지 핸들"""
+    channel = bot.get_channel(dist.channel_id)
+    if channel is None:
+        return None
+    return channel.get_partial_message(dist.message_id)
+
+async def get_member(guild_id: int, user_id: int) -> Optional[discord.Member]:
+    """캐시 → LRU → fetch 순으로 멤버 조회 (lazy 모드에서도 동작)"""
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        return None
+    try:
+        return await bot.member_cache.get(guild, user_id)
+    except Exception as e:
+        print(f"[WARN] 멤버 조회 실패({user_id}): {e}")
+        return None
+
+async def display_name(guild_id: int, user_id: int) -> str:
+    member = await get_member(guild_id, user_id)
+    if member is not None:
+        return member.display_name
+    user = bot.get_user(user_id)
+    return user.display_name if user else f"<@{user_id}>"
+
+async def display_names(guild_id: int, user_ids: Iterable[int]) -> Dict[int, str]:
+    """여러 명을 한 번에: 캐시에 없는 ID만 묶어서 1회 조회 (없는 사용자는 member_cache가 기억)"""
+    ids = list(dict.fromkeys(user_ids))
+    guild = bot.get_guild(guild_id)
+    members: list = []
+    if guild is not None and ids:
+        try:
+            members = await resolve_members(guild, ids, cache=bot.member_cache)
+        except Exception as e:
+            print(f"[WARN] 멤버 일괄 조회 실패({len(ids)}명): {e}")
+    names = {m.id: m.display_name for m in members}
+    for uid in ids:
+        if uid not in names:
+            user = bot.get_user(uid)
+            names[uid] = user.display_name if user else f"<@{uid}>"
+    return names
+
 async def create_distribution(channel: discord.TextChannel, author: discord.Member, item: str, mention_list: List[discord.Member]):
     safe_mentions = mention_list[:10]  # 숫자 이모지 최대 10명
-    lines = [f"{emoji_list[i]} {m.mention}" for i, m in enumerate(safe_mentions)]
+    lines = [recipient_line(i, m.id, False) for i, m in enumerate(safe_mentions)]
 
     now = now_kst()
-    date_str = now.strftime('%m/%d')
-    time_str = now.strftime('%p %I:%M').replace('AM','오전').replace('PM','오후')
+    buttons = CLAIM_MODE == "button"
+    embed = build_embed(None, item, now, author.mention, lines, DEFAULT_PRICE, buttons)
 
-    embed = discord.Embed(title="🍆 아이템 분배 안내", color=0x9146FF)
-    summary = f"🎁 아이템명 : {item}\n📅 날짜 및 시간 : {date_str} {time_str}\n👤 생성자 : {author.mention}"
-    embed.add_field(name="ℹ️ 기본 정보", value=summary, inline=False)
-    embed.add_field(name="🎯 수령 대상자", value="\n".join(lines) if lines else "등록된 대상자가 없습니다.", inline=False)
-    embed.add_field(name="📢 사용법", value="🔸 번호 이모지 누르면 수령 처리!\n✅ 누르면 완료게시판으로 이동!\n💰 누르면 판매완료 DM 전송!", inline=False)
-    embed.add_field(name="💸 판매금액", value="미입력", inline=False)
+    # 최초 메시지는 즉시 전송(반환 Message 필요). 버튼 모드면 버튼도 이 한 번에 같이 보냄
+    if buttons:
+        view = render_claim_view(len(safe_mentions), 0, emoji_list, check_emoji, sell_emoji)
+        msg = await channel.send(embed=embed, view=view)
+    else:
+        msg = await channel.send(embed=embed)
 
-    # 최초 메시지는 즉시 전송(반환 Message 필요)
-    msg = await channel.send(embed=embed)
+    dist = Distribution(
+        msg.id, channel.guild.id, channel.id, author.id,
+        [m.id for m in safe_mentions], item, now.timestamp(),
+        flags=FLAG_BUTTONS if buttons else 0,
+    )
+    distribution_data[msg.id] = dist
+    recipient_index.add(dist)
+    persist_distribution(msg.id)
 
     # 제목에 메시지 ID 반영 (이 편집은 큐를 통해)
-    embed.title = f"🍆 아이템 분배 안내 (ID: {msg.id})"
-    await bot.enqueue_edit_message(msg, embed)
-
-    distribution_data[msg.id] = {
-        "creator": author,
-        "mentions": safe_mentions,
-        "received": set(),
-        "message": msg,
-        "embed": embed,
-        "item": item,
-        "datetime": now,
-        "price": "미입력"
-    }
-
-    # 느린 작업(스레드/초대/리액션)은 큐로 순차 처리
-    await bot.enqueue_bg(background_finalize(msg, item, author, safe_mentions, embed))
+    await bot.enqueue_edit_message(msg, render_embed(dist))
+
+    # 느린 작업(스레드/초대/리액션)은 메시지 레인에서 제목 편집 뒤에 순차 처리
+    # (Member 객체는 이 작업에만 잠깐 쓰고 레코드에는 남기지 않는다)
+    await bot.enqueue_bg(
+        lambda: background_finalize(msg, item, author, safe_mentions, seed_reactions=not buttons),
+        lane=message_lane(msg.id),
+        name=f"스레드 생성 {msg.id}",
+    )
+
+# ================== 영구 저장 ==================
+def persist_distribution(msg_id: int):
+    """현재 상태를 저장 버퍼에 기록 (디스크 반영은 write-behind 플러시가 담당)"""
+    dist = distribution_data.get(msg_id)
+    if dist is not None:
+        bot.store.put_distribution(dist.to_row())
+
+def end_distribution(msg_id: int):
+    dist = distribution_data.pop(msg_id, None)
+    if dist is not None:
+        recipient_index.remove(dist)
+    bot.embed_dirty_since.pop(msg_id, None)
+    bot.last_reaction_ts.discard_group(msg_id)
+    bot.reaction_gen.pop(msg_id, None)
+    bot.reconciler.forget(msg_id)
+    bot.store.delete_distribution(msg_id)
+
+async def resolve_user(guild_id: int, user_id: int) -> discord.abc.User:
+    """DM 보낼 대상: 길드 멤버(LRU 캐시 경유) → 길드를 떠났으면 User"""
+    member = await get_member(guild_id, user_id)
+    if member is not None:
+        return member
+    return bot.get_user(user_id) or await bot.fetch_user(user_id)
 
 # ================== 백그라운드 작업 ==================
-async def background_finalize(message: discord.Message, item: str, author: discord.Member, mention_list: List[discord.Member], embed: discord.Embed):
-    """스레드 생성/초대 + 이모지 추가 (전부 큐에서 실행됨)"""
-    try:
-        thread = await message.create_thread(name=f"{item} 분배", auto_archive_duration=60)
-        await pace(ACTION_DELAY_BASE)
+async def background_finalize(message: discord.Message, item: str, author: discord.Member, mention_list: List[discord.Member], seed_reactions: bool = True):
+    """스레드 생성 후 초대/이모지 작업을 등록 (큐에서 실행됨). 버튼 모드면 이모지 생략.
+       스레드 생성이 429/5xx로 실패하면 이 작업 전체가 재시도된다 (아직 아무것도 안 만든 상태).
+       이후 단계는 각자 별도 작업이라 실패해도 그 단계만 재시도된다.
+    """
+    thread = await message.create_thread(name=f"{item} 분배", auto_archive_duration=60)
 
-        try:
-            await thread.add_user(author)
-        except Exception as e:
-            print(f"[WARN] thread.add_user(author) 실패: {e}")
-        await pace(INVITE_DELAY_BASE)
+    # 초대는 스레드 자기 레인에서 병렬로, 리액션은 리액션 레인에서 → 메시지 레인(편집/삭제)을 막지 않음
+    invitees = [author] + [m for m in mention_list if m.id != author.id]
+    await bot.enqueue_bg(lambda: background_invite(thread, invitees), lane=thread_lane(thread.id),
+                         name=f"스레드 초대 {thread.id}", priority=BULK)
 
-        for m in mention_list:
-            try:
-                await thread.add_user(m)
-            except Exception as e:
-                print(f"[WARN] thread.add_user({m}) 실패: {e}")
-            await pace(INVITE_DELAY_BASE)
+    if not seed_reactions:
+        return
 
-        num_reactions = min(len(mention_list), len(emoji_list), MAX_REACTIONS_PER_MESSAGE)
-        for i in range(num_reactions):
-            try:
-                await message.add_reaction(emoji_list[i])
-            except Exception as e:
-                print(f"[WARN] add_reaction 숫자 실패: {e}")
-            await pace(REACTION_DELAY_BASE)
+    # 리액션은 1개씩 리액션 레인에 (순서 유지, 실패한 것만 재시도)
+    num_reactions = min(len(mention_list), len(emoji_list), MAX_REACTIONS_PER_MESSAGE)
+    seeds = emoji_list[:num_reactions] + [check_emoji, sell_emoji]
+    for emoji in seeds[:MAX_REACTIONS_PER_MESSAGE]:
+        await bot.enqueue_add_reaction(message, emoji)
 
-        added = num_reactions
-        if added < MAX_REACTIONS_PER_MESSAGE:
-            try:
-                await message.add_reaction(check_emoji)
-            except Exception as e:
-                print(f"[WARN] add_reaction 체크 실패: {e}")
-            await pace(REACTION_DELAY_BASE)
-            added += 1
-        if added < MAX_REACTIONS_PER_MESSAGE:
+async def background_invite(thread: discord.Thread, members: List[discord.abc.Snowflake]):
+    """스레드 초대 팬아웃 (스레드 레인에서 실행)
+       - 동시에 INVITE_CONCURRENCY개까지, 호출마다 전역 레이트 토큰 사용
+       - 실패한 멤버는 잠시 뒤 한 번에 모아 1회 재시도
+    """
+    assert bot.scheduler is not None
+    sem = asyncio.Semaphore(INVITE_CONCURRENCY)
+
+    async def _invite(m) -> Optional[Tuple[discord.abc.Snowflake, Exception]]:
+        async with sem:
+            await bot.scheduler.acquire()
             try:
-                await message.add_reaction(sell_emoji)
+                await thread.add_user(m)
+                return None
             except Exception as e:
-                print(f"[WARN] add_reaction 판매 실패: {e}")
+                return (m, e)
 
-    except Exception as e:
-        print(f"[ERROR] background_finalize 실패: {e}")
+    async def _fan_out(targets) -> List[Tuple[discord.abc.Snowflake, Exception]]:
+        results = await asyncio.gather(*(_invite(m) for m in targets))
+        return [r for r in results if r is not None]
 
-async def background_notify_sale(guild_id: int, channel_id: int, message_id: int, creator_name: str, mentions: List[discord.Member], item: str):
-    """판매완료 DM 전송 (전부 큐에서 실행됨)
-       - 옵트인 사용자만
-       - 유저별 1시간 쿨다운
+    failed = await _fan_out(members)
+    if failed:
+        await pace(INVITE_DELAY_BASE)
+        failed = await _fan_out([m for m, _ in failed])
+    for m, e in failed:
+        print(f"[WARN] thread.add_user({m}) 재시도 후에도 실패: {e}")
+
+async def send_dm_digest(user_id: int, entries: List[Tuple[int, str]], sent: Optional[List[int]] = None):
+    """판매 알림 다이제스트 1통 전송 (사용자 DM 레인에서 실행, DM 전역 상한 적용)
+       entries: (guild_id, 알림 줄) 목록
+       sent: [보낸 페이지 수] — 여러 페이지 중간에 실패해 재시도되면 이미 보낸 페이지는 건너뜀
     """
-    msg_link = f"https://discord.com/channels/{guild_id}/{channel_id}/{message_id}"
-    now = asyncio.get_running_loop().time()
-
-    for m in mentions:
+    if sent is None:
+        sent = [0]
+    if user_id not in opt_in_users:
+        # 기한을 기다리는 사이(또는 재시도 사이)에 동의를 해제했으면 보내지 않음
+        return
+    assert bot.dm_limiter is not None
+    try:
+        m = await resolve_user(entries[0][0], user_id)
         if m.bot:
-            continue
-        if m.id not in opt_in_users:
+            return
+        lines = [line for _, line in entries]
+        header = "💰 판매 완료 알림" + (f" ({len(lines)}건)" if len(lines) > 1 else "")
+        for page in paginate(header, lines)[sent[0]:]:
+            await bot.dm_limiter.acquire()
+            await m.send(page)
+            sent[0] += 1
+        last_user_dm[user_id] = time.time()
+        bot.store.set_last_dm(user_id, last_user_dm[user_id])
+    except discord.Forbidden:
+        # DM 차단은 재시도해도 소용없음 (그 외 오류는 스케줄러가 재시도/데드레터 처리)
+        pass
+
+async def send_archive(channel_id: int, embeds: List[discord.Embed]):
+    """완료 게시판 묶음 1통 전송 (완료 채널 레인에서 실행, 실패하면 묶음째 재시도)"""
+    channel = bot.get_channel(channel_id)
+    if channel is None:
+        print(f"[WARN] 완료 채널({channel_id})을 찾을 수 없어 {len(embeds)}건 게시 생략")
+        return
+    await channel.send(embeds=embeds)
+
+def queue_sale_notice(dist: Distribution, creator_name: str):
+    """옵트인한 대상자 각자의 다이제스트에 판매 알림 한 줄 추가 (DM은 기한에 모아서)"""
+    line = f"🎁 `{dist.item}` (👤 {creator_name} 님의 분배) → [바로가기]({dist.link})"
+    now = time.time()
+    for uid in set(dist.recipient_ids):
+        if uid not in opt_in_users:
             # 옵트인 안 했으면 건너뜀
             continue
-        last_ts = last_user_dm.get(m.id, 0.0)
-        if now - last_ts < USER_DM_COOLDOWN:
-            # 쿨다운 중이면 건너뜀
-            continue
-
-        try:
-            await m.send(
-                f"👤 {creator_name} 님의 분배 게시자입니다.\n"
-                f"💰 `{item}` 아이템이 판매 완료되었어요!\n"
-                f"🔗 [바로가기]({msg_link})"
-            )
-            last_user_dm[m.id] = asyncio.get_running_loop().time()
-        except discord.Forbidden:
-            pass
-        except Exception as e:
-            print(f"[WARN] DM 실패({m}): {e}")
-        await pace(DM_DELAY_BASE)
+        # 최근에 다이제스트를 받았으면 최소 간격이 지날 때까지 모음 (버리지 않음)
+        delay = max(DM_DIGEST_WINDOW, last_user_dm.get(uid, 0.0) + DM_MIN_INTERVAL - now)
+        bot.dm_digest.add(uid, (dist.guild_id, line), delay)
+
+# ================== 임베드 편집 (더티 집합 + 단일 플러셔) ==================
+def set_received(dist: Distribution, index: int, received: bool) -> bool:
+    """수령 상태 변경 + 해당 줄 캐시만 갱신. 실제로 바뀌었으면 True."""
+    if not dist.set_received(index, received):
+        return False
+    recipient_index.refresh(dist, dist.recipient_ids[index])
+    if dist.lines is None:
+        # 첫 변경 때 한 번만 전부 만들고, 이후에는 바뀐 줄만 고침 (렌더는 캐시를 그대로 씀)
+        dist.lines = [recipient_line(i, uid, dist.is_received(i)) for i, uid in enumerate(dist.recipient_ids)]
+    else:
+        dist.lines[index] = recipient_line(index, dist.recipient_ids[index], received)
+    return True
 
-# ================== 임베드 편집 디바운스 ==================
-async def schedule_embed_update(msg_id: int):
+def schedule_embed_update(msg_id: int):
     """
-    반응 폭주 시 임베드 편집을 합쳐서 1.5초 후 1회만 수행.
+    임베드 갱신 예약: 더티 집합에 넣기만 한다 (태스크 생성 없음).
+    반응 폭주 시에도 플러셔가 윈도우(1.5초)마다 메시지당 1회만 편집한다.
     """
-    # 기존 스케줄이 있으면 취소
-    old = bot.update_tasks.get(msg_id)
-    if old and not old.done():
-        old.cancel()
-
-    async def _job():
-        try:
-            await asyncio.sleep(UPDATE_WINDOW)
-            if msg_id not in distribution_data:
-                return
-            data = distribution_data[msg_id]
-            message: discord.Message = data["message"]
-            embed: discord.Embed = data["embed"]
-            mentions: List[discord.Member] = data["mentions"]
-            received: Set[int] = data["received"]
-
-            lines = []
-            for i, m in enumerate(mentions):
-                line = f"{emoji_list[i]} {m.mention}"
-                if i in received:
-                    line += " ✅"
-                lines.append(line)
-
-            embed.set_field_at(1, name="🎯 수령 대상자", value="\n".join(lines) if lines else "등록된 대상자가 없습니다.", inline=False)
-            await bot.enqueue_edit_message(message, embed)
-        except asyncio.CancelledError:
-            return
-        except Exception as e:
-            print(f"[WARN] 디바운스 업데이트 실패: {e}")
-
-    task = asyncio.create_task(_job())
-    bot.update_tasks[msg_id] = task
+    bot.dirty_embeds.add(msg_id)
+    if msg_id not in bot.embed_dirty_since:
+        bot.embed_dirty_since[msg_id] = time.monotonic()
+    embed_updates_scheduled.inc()
+    if bot.dirty_event is not None:
+        bot.dirty_event.set()
+
+def record_embed_applied(msg_id: int, rendered_at: float):
+    """편집이 반영됨: 렌더링 전에 생긴 변경이면 첫 변경 시각부터의 지연을 기록"""
+    since = bot.embed_dirty_since.get(msg_id)
+    if since is not None and since <= rendered_at:
+        bot.embed_dirty_since.pop(msg_id)
+        embed_update_latency.observe(time.monotonic() - since)
+
+async def embed_flusher():
+    """더티 메시지들의 임베드를 윈도우마다 1회씩 렌더/편집 (봇 전체에 태스크 1개)"""
+    assert bot.dirty_event is not None
+    while True:
+        await bot.dirty_event.wait()
+        await asyncio.sleep(UPDATE_WINDOW)
+        bot.dirty_event.clear()
+        dirty, bot.dirty_embeds = bot.dirty_embeds, set()
+
+        for msg_id in dirty:
+            dist = distribution_data.get(msg_id)
+            if dist is None:
+                continue
+            try:
+                await enqueue_render(dist)
+            except Exception as e:
+                print(f"[WARN] 임베드 갱신 실패: {e}")
 
 # ================== 느낌표 명령어 ==================
 @bot.command()
@@ -344,15 +858,13 @@ async def 분배(ctx: commands.Context, *, arg):
 async def 판매(ctx: commands.Context, message_id: int, *, content: str):
     await bot.enqueue_delete(ctx.message)
     try:
-        if message_id in distribution_data:
-            msg_data = distribution_data[message_id]
-            msg_data['price'] = content
-            embed = msg_data['embed']
-            # 3번째 필드(인덱스 3) = 판매금액 갱신
-            embed.set_field_at(index=3, name="💸 판매금액", value=content, inline=False)
-            await bot.enqueue_edit_message(msg_data['message'], embed)
+        dist = distribution_data.get(message_id)
+        if dist is not None:
+            dist.price = content
+            persist_distribution(message_id)
+            await enqueue_render(dist)
             m = await ctx.send(f"💸 판매금액이 등록되었습니다: `{content}`")
-            await bot.enqueue_delete(m)
+            await bot.enqueue_delete(m, group=message_id)
         else:
             m = await ctx.send("❌ 해당 메시지를 찾을 수 없습니다.")
             await bot.enqueue_delete(m)
@@ -377,12 +889,61 @@ async def 알림동의(ctx: commands.Context):
     uid = ctx.author.id
     if uid in opt_in_users:
         opt_in_users.remove(uid)
+        bot.store.set_opt_in(uid, False)
+        bot.dm_digest.drop(uid)
         m = await ctx.send(f"🔕 {ctx.author.mention} DM 알림 동의가 해제되었습니다.")
     else:
         opt_in_users.add(uid)
+        bot.store.set_opt_in(uid, True)
         m = await ctx.send(f"🔔 {ctx.author.mention} DM 알림 동의가 설정되었습니다.")
     await bot.enqueue_delete(m)
 
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def 큐상태(ctx: commands.Context):
+    """(관리자) 쓰기 큐 깊이와 우선순위 클래스별 대기 시간"""
+    await bot.enqueue_delete(ctx.message)
+    assert bot.scheduler is not None
+    sched = bot.scheduler
+    lines = [f"📊 대기 {sched.depth}건 (재시도 대기 {sched.parked}건) · 레인 {sched.lane_count}개 · 재시도 누적 {sched.retried}회"]
+    for name, w in sched.wait_summary().items():
+        lines.append(f"`{name:<11}` {w['count']:>6}건 · 평균 {w['mean']:.2f}s · p50≤{w['p50']:g}s · p95≤{w['p95']:g}s · 최대 {w['max']:.2f}s")
+    m = await ctx.send("\n".join(lines))
+    await bot.enqueue_delete(m, delay=60)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def 실패작업(ctx: commands.Context):
+    """(관리자) 재시도를 다 쓰고 데드레터에 남은 쓰기 작업 목록"""
+    await bot.enqueue_delete(ctx.message)
+    assert bot.scheduler is not None
+    dead = bot.scheduler.dead_letters
+    letters = dead.list()
+    if not letters:
+        m = await ctx.send("📭 실패한 쓰기 작업이 없습니다.")
+        await bot.enqueue_delete(m)
+        return
+    entries = [
+        f"`#{d.seq}` {d.name} · {d.attempts}회 · {datetime.fromtimestamp(d.failed_at, KST):%m/%d %H:%M:%S}\n → {d.error}"
+        for d in letters
+    ]
+    for page in paginate(f"🪦 실패 작업 {len(letters)}건 (누적 {dead.total}건, `!실패재실행 [번호]`):", entries):
+        m = await ctx.send(page)
+        await bot.enqueue_delete(m, delay=60)
+
+@bot.command()
+@commands.has_permissions(administrator=True)
+async def 실패재실행(ctx: commands.Context, seq: Optional[int] = None):
+    """(관리자) 데드레터 작업을 다시 큐에 등록. 번호를 안 주면 전부."""
+    await bot.enqueue_delete(ctx.message)
+    assert bot.scheduler is not None
+    n = bot.scheduler.replay(seq)
+    if n:
+        m = await ctx.send(f"🔁 실패 작업 {n}건을 다시 등록했습니다.")
+    else:
+        m = await ctx.send("❌ 다시 등록한 실패 작업이 없습니다. (없는 번호이거나, 같은 대상의 더 새 작업이 이미 대기 중)")
+    await bot.enqueue_delete(m)
+
 # ================== 슬래시 명령어 ==================
 @bot.tree.command(name="분배", description="아이템 분배 등록")
 @app_commands.describe(item="아이템 이름", 대상자="수령 대상자 멘션(e.g. @사용자1 @사용자2)")
@@ -393,8 +954,9 @@ async def slash_분배(interaction: discord.Interaction, item: str, 대상자: s
     except Exception:
         pass
 
-    # 멘션 파싱: 채널 멤버 중 텍스트에 포함된 멘션만 추출
-    mention_list = [m for m in interaction.channel.members if f"<@{m.id}>" in 대상자 or f"<@!{m.id}>" in 대상자]
+    # 멘션 파싱: 인자에서 ID만 뽑아 작성 순서대로 조회 (채널 멤버 전체를 훑지 않음)
+    mention_ids = parse_mention_ids(대상자)[:len(emoji_list)]
+    mention_list = await resolve_members(interaction.guild, mention_ids, cache=bot.member_cache)
     await create_distribution(interaction.channel, interaction.user, item, mention_list)
 
     try:
@@ -415,115 +977,288 @@ async def slash_알림동의(interaction: discord.Interaction):
     uid = interaction.user.id
     if uid in opt_in_users:
         opt_in_users.remove(uid)
+        bot.store.set_opt_in(uid, False)
+        bot.dm_digest.drop(uid)
         await interaction.response.send_message("🔕 DM 알림 동의가 해제되었습니다.", ephemeral=True)
     else:
         opt_in_users.add(uid)
+        bot.store.set_opt_in(uid, True)
         await interaction.response.send_message("🔔 DM 알림 동의가 설정되었습니다.", ephemeral=True)
 
 # ================== 리액션 이벤트 ==================
-@bot.event
-async def on_reaction_add(reaction: discord.Reaction, user: discord.User):
-    if user.bot:
-        return
-    await handle_reaction_event(reaction, user, is_add=True)
+# raw 이벤트는 메시지 캐시와 무관하게 항상 들어온다 (재시작/캐시 축출 후에도 동작)
+def is_bot_user(user_id: int, member: Optional[discord.Member]) -> bool:
+    if bot.user is not None and user_id == bot.user.id:
+        return True
+    user = member or bot.get_user(user_id)
+    return bool(user and user.bot)
 
 @bot.event
-async def on_reaction_remove(reaction: discord.Reaction, user: discord.User):
-    if user.bot:
+async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
+    if payload.message_id not in distribution_data or is_bot_user(payload.user_id, payload.member):
         return
-    await handle_reaction_event(reaction, user, is_add=False)
+    await handle_reaction_event(payload.message_id, payload.user_id, str(payload.emoji), is_add=True)
 
-async def handle_reaction_event(reaction: discord.Reaction, user: discord.User, is_add: bool):
-    msg_id = reaction.message.id
-    if msg_id not in distribution_data:
+@bot.event
+async def on_raw_reaction_remove(payload: discord.RawReactionActionEvent):
+    # 제거 이벤트에는 member가 없으므로 캐시된 사용자로만 봇 여부 판단
+    if payload.message_id not in distribution_data or is_bot_user(payload.user_id, None):
         return
+    await handle_reaction_event(payload.message_id, payload.user_id, str(payload.emoji), is_add=False)
 
-    # 사용자별 반응 쿨다운
-    key = (msg_id, user.id)
-    now = asyncio.get_running_loop().time()
-    last_ts = bot.last_reaction_ts.get(key, 0.0)
-    if now - last_ts < REACTION_COOLDOWN:
-        return
-    bot.last_reaction_ts[key] = now
+async def handle_reaction_event(msg_id: int, user_id: int, emoji: str, is_add: bool):
+    """Reaction/Message 객체 없이 ID와 우리 상태만으로 처리 (결과별 횟수/처리 시간 계측)"""
+    started = time.perf_counter()
+    try:
+        result = await _apply_reaction_event(msg_id, user_id, emoji, is_add)
+    finally:
+        reaction_handle_hist.observe(time.perf_counter() - started)
+    reaction_events[result].inc()
 
-    data = distribution_data[msg_id]
-    emoji = str(reaction.emoji)
-    message: discord.Message = data["message"]
-    embed: discord.Embed = data["embed"]
-    guild = message.guild
-    완료채널 = guild.get_channel(완료_채널_ID)
+async def _apply_reaction_event(msg_id: int, user_id: int, emoji: str, is_add: bool) -> str:
+    """처리 결과(REACTION_RESULTS 중 하나)를 돌려준다"""
+    if msg_id not in distribution_data:
+        return "ignored"
+    bot.reaction_gen[msg_id] = bot.reaction_gen.get(msg_id, 0) + 1
 
-    async def 종료처리():
-        try:
-            if 완료채널:
-                await bot.enqueue_send(완료채널, embed=embed)
-            if hasattr(message, "thread") and message.thread:
-                await bot.enqueue_thread_delete(message.thread)
-            await bot.enqueue_delete(message, delay=0)  # 즉시 삭제
-        except Exception as e:
-            print(f"[ERROR] 종료 처리 중 오류: {e}")
+    dist = distribution_data[msg_id]
+    message = partial_message(dist)
+    if message is None:
+        return "ignored"
 
     if emoji in emoji_list:
         index = emoji_list.index(emoji)
-
-        # 수령 집합 갱신
-        if is_add:
-            data["received"].add(index)
-        else:
-            data["received"].discard(index)
-
-        # 임베드 편집은 디바운스로 합쳐서 실행
-        await schedule_embed_update(msg_id)
+        if index >= dist.recipient_count:
+            return "ignored"
+
+        # 사용자별 반응 쿨다운: 버린 이벤트는 메시지를 의심으로 표시 → 조용해지면 실제 리액션으로 재구성
+        # (판매/종료 리액션은 토글이 아니고 드물어서 쿨다운 없이 바로 처리)
+        key = (msg_id, user_id)
+        if key in bot.last_reaction_ts:
+            bot.reconciler.mark(msg_id)
+            return "cooldown"
+        bot.last_reaction_ts[key] = time.monotonic()
+
+        # 수령 상태가 실제로 바뀐 경우에만 줄 갱신 + 임베드 더티 표시
+        changed = set_received(dist, index, is_add)
+        if changed:
+            schedule_embed_update(msg_id)
+            persist_distribution(msg_id)
 
         # 전원 수령 완료 시 종료
-        if is_add and len(data["received"]) == len(data["mentions"]) and len(data["mentions"]) > 0:
+        if is_add and dist.all_received:
             tmp = await message.channel.send("✅ 모든 대상자 수령 완료. 분배 종료!")
             await bot.enqueue_delete(tmp)
-            await 종료처리()
-            distribution_data.pop(msg_id, None)
+            await finish_distribution(dist)
+        return "applied" if changed else "unchanged"
 
     elif is_add and emoji == sell_emoji:
         tmp = await message.channel.send("💰 판매 완료! (DM은 알림동의한 분들만 전송됩니다)")
-        await bot.enqueue_delete(tmp)
-        creator = data["creator"].display_name
-        # DM은 큐에 태움
-        await bot.enqueue_bg(background_notify_sale(
-            guild.id, message.channel.id, message.id, creator, data["mentions"], data["item"]
-        ))
+        await bot.enqueue_delete(tmp, group=msg_id)
+        await notify_sale(dist)
+        return "sell"
 
     elif is_add and emoji == check_emoji:
         tmp = await message.channel.send("✅ 강제 종료 처리되었습니다.")
         await bot.enqueue_delete(tmp)
-        await 종료처리()
-        distribution_data.pop(msg_id, None)
+        await finish_distribution(dist)
+        return "done"
+
+    return "ignored"
+
+# ================== 리액션 상태 재조정 ==================
+async def has_human_reactor(reaction: discord.Reaction) -> bool:
+    """봇이 아닌 사용자가 이 리액션을 눌렀는지 (개수로 걸러지면 users() 조회 생략)"""
+    if reaction.count - int(reaction.me) <= 0:
+        return False
+    assert bot.scheduler is not None
+    await bot.scheduler.acquire()
+    async for user in reaction.users():
+        if not is_bot_user(user.id, user):
+            return True
+    return False
+
+async def reconcile_distribution(msg_id: int):
+    """
+    의심 메시지의 수령 상태를 실제 숫자 리액션으로 한 번에 재구성 (재조정 워커에서 실행).
+    메시지 조회 1회 + 봇 말고 누른 사람이 있을 수 있는 숫자 이모지만 users() 조회.
+    조회 도중 이 메시지에 리액션 이벤트가 처리됐으면 결과를 버리고 다시 표시한다.
+    """
+    dist = distribution_data.get(msg_id)
+    if dist is None or dist.uses_buttons:
+        return
+    message = partial_message(dist)
+    if message is None:
+        return
+    assert bot.scheduler is not None
+    gen = bot.reaction_gen.get(msg_id, 0)
+    await bot.scheduler.acquire()
+    try:
+        fetched = await message.fetch()
+    except discord.NotFound:
+        # 원본이 지워졌으면 더 받을 리액션도 없다 → 상태만 정리
+        print(f"[WARN] 재조정: 분배 메시지 {msg_id}를 찾을 수 없어 분배 상태 정리")
+        end_distribution(msg_id)
+        reconcile_results["gone"].inc()
+        return
+
+    actual = 0
+    for reaction in fetched.reactions:
+        emoji = str(reaction.emoji)
+        if emoji not in emoji_list:
+            continue
+        index = emoji_list.index(emoji)
+        if index < dist.recipient_count and await has_human_reactor(reaction):
+            actual |= 1 << index
+
+    if distribution_data.get(msg_id) is not dist:
+        return   # 조회하는 동안 종료됨
+    if bot.reaction_gen.get(msg_id, 0) != gen:
+        bot.reconciler.mark(msg_id)
+        reconcile_results["raced"].inc()
+        return
+
+    fixed = 0
+    for i in range(dist.recipient_count):
+        if set_received(dist, i, bool(actual >> i & 1)):
+            fixed += 1
+    if not fixed:
+        reconcile_results["clean"].inc()
+        return
+    reconcile_results["corrected"].inc()
+    print(f"🔧 재조정: 분배 {msg_id} 수령 상태 {fixed}건 보정")
+    schedule_embed_update(msg_id)
+    persist_distribution(msg_id)
+
+    if dist.all_received:
+        tmp = await message.channel.send("✅ 모든 대상자 수령 완료. 분배 종료!")
+        await bot.enqueue_delete(tmp)
+        await finish_distribution(dist)
+
+# ================== 버튼 인터랙션 ==================
+async def handle_claim_interaction(interaction: discord.Interaction, action: str, index: int):
+    """
+    버튼 모드 게시글의 클릭 처리. 응답은 인터랙션 응답으로만 한다
+    (수령 토글 = edit_message 한 번으로 확인 + 임베드/버튼 갱신).
+    """
+    msg_id = interaction.message.id if interaction.message else 0
+    dist = distribution_data.get(msg_id)
+    if dist is None:
+        await interaction.response.send_message("❌ 이미 종료되었거나 찾을 수 없는 분배입니다.", ephemeral=True)
+        return
+
+    if action == "claim":
+        if index >= dist.recipient_count:
+            await interaction.response.send_message("❌ 대상자 번호가 올바르지 않습니다.", ephemeral=True)
+            return
+        # 버튼은 누를 때마다 토글 (리액션 추가/제거에 해당)
+        set_received(dist, index, not dist.is_received(index))
+        persist_distribution(msg_id)
+        # 인터랙션 응답으로 바로 갱신하므로 큐/플러셔에 남은 예전 편집은 버림
+        bot.dirty_embeds.discard(msg_id)
+        bot.embed_dirty_since.pop(msg_id, None)
+        assert bot.scheduler is not None
+        bot.scheduler.discard(edit_key(msg_id))
+        embed = render_embed(dist)
+        await interaction.response.edit_message(embed=embed, view=claim_view(dist))
+
+        if dist.all_received:
+            await interaction.followup.send("✅ 모든 대상자 수령 완료. 분배 종료!", ephemeral=True)
+            await finish_distribution(dist)
+
+    elif action == "sell":
+        await interaction.response.send_message("💰 판매 완료! (DM은 알림동의한 분들만 전송됩니다)", ephemeral=True)
+        await notify_sale(dist)
+
+    elif action == "done":
+        await interaction.response.send_message("✅ 강제 종료 처리되었습니다.", ephemeral=True)
+        await finish_distribution(dist)
+
+# ================== 종료 / 판매 공통 ==================
+async def finish_distribution(dist: Distribution):
+    """완료게시판 전송 + 스레드/원본 삭제 + 상태 정리"""
+    msg_id = dist.message_id
+    try:
+        # 이 분배에 묶인 임시 안내 메시지는 기한을 기다리지 않고 같이 정리
+        bot.timers.fire_group(msg_id)
+        guild = bot.get_guild(dist.guild_id)
+        완료채널 = guild.get_channel(완료_채널_ID) if guild else None
+        if 완료채널:
+            # 완료 게시는 잠시 모아 여러 건을 1통으로 (완료 채널 레인)
+            bot.archive.add(완료채널.id, render_embed(dist))
+        # 정리는 각자 레인에서: 스레드(스레드 레인) / 원본(메시지 레인) → 완료 게시를 막지 않음
+        # 메시지 스레드 ID = 메시지 ID
+        thread = guild.get_thread(msg_id) if guild else None
+        if thread:
+            await bot.enqueue_thread_delete(thread)
+        message = partial_message(dist)
+        if message is not None:
+            await bot.enqueue_delete(message, delay=0)  # 즉시 삭제
+    except Exception as e:
+        print(f"[ERROR] 종료 처리 중 오류: {e}")
+    end_distribution(msg_id)
+
+async def notify_sale(dist: Distribution):
+    creator = await display_name(dist.guild_id, dist.creator_id)
+    queue_sale_notice(dist, creator)
 
 # ================== 분배 목록 DM ==================
+def paginate(header: str, entries: List[str], limit: int = DM_MAX_CHARS) -> List[str]:
+    """항목을 잘리지 않게 limit 글자 이하 페이지로 나눈다. 여러 페이지면 머리말에 (n/N) 표시."""
+    # 페이지 표시가 붙을 자리를 미리 남겨둔다
+    budget = limit - len(header) - len(" (999/999)") - 1
+    pages: List[List[str]] = [[]]
+    size = 0
+    for entry in entries:
+        entry = entry[:budget]
+        if pages[-1] and size + 1 + len(entry) > budget:
+            pages.append([])
+            size = 0
+        size += len(entry) + (1 if pages[-1] else 0)
+        pages[-1].append(entry)
+
+    total = len(pages)
+    out = []
+    for n, page in enumerate(pages, 1):
+        title = f"{header} ({n}/{total})" if total > 1 else header
+        out.append("\n".join([title] + page))
+    return out
+
 async def send_distribution_list(user: discord.User, guild: discord.Guild, channel: discord.abc.Messageable, exclude_completed: bool = True):
     """
     exclude_completed=True:
       본인 이름 옆에 ✅가 붙어 있으면(본인/타인 누름 상관없이) DM 목록에서 제외.
+      역인덱스로 본인 미완료 항목만 꺼내므로 전체 분배 수와 무관.
+    exclude_completed=False: 전체 분배를 훑는다 (드문 경로).
     """
-    found = []
-    for msg_id, data in distribution_data.items():
-        mentions: List[discord.Member] = data["mentions"]
-        if user in mentions:
-            try:
-                idx = mentions.index(user)
-            except ValueError:
-                continue
-            if exclude_completed and idx in data["received"]:
-                continue
+    if exclude_completed:
+        dists = [distribution_data[mid] for mid in recipient_index.open_for(user.id) if mid in distribution_data]
+    else:
+        dists = [d for d in distribution_data.values() if d.index_of(user.id) >= 0]
+    dists.sort(key=lambda d: d.created_at)
+
+    # 작성자 이름은 길드별로 한 번에 조회 (항목마다 기다리지 않음)
+    creators: Dict[int, List[int]] = {}
+    for dist in dists:
+        creators.setdefault(dist.guild_id, []).append(dist.creator_id)
+    names: Dict[Tuple[int, int], str] = {}
+    for guild_id, ids in creators.items():
+        for uid, name in (await display_names(guild_id, ids)).items():
+            names[(guild_id, uid)] = name
 
-            dt = data["datetime"]
-            date_str = dt.strftime('%m/%d')
-            time_str = dt.strftime('%p %I:%M').replace('AM','오전').replace('PM','오후')
-            author = data["creator"].display_name
-            link = f"https://discord.com/channels/{guild.id}/{data['message'].channel.id}/{msg_id}"
-            found.append(f"{data['item']} | 🕛 {date_str} ⏰ {time_str} 👤 {author}\n → [바로가기]({link})")
+    found = []
+    for dist in dists:
+        dt = dist.created_at_dt(KST)
+        date_str = dt.strftime('%m/%d')
+        time_str = dt.strftime('%p %I:%M').replace('AM','오전').replace('PM','오후')
+        author = names[(dist.guild_id, dist.creator_id)]
+        found.append(f"{dist.item} | 🕛 {date_str} ⏰ {time_str} 👤 {author}\n → [바로가기]({dist.link})")
 
     if found:
+        label = "완료 제외" if exclude_completed else "전체"
         try:
-            await user.send("\n".join([f"📄 {user.display_name} 님의 분배 목록 (완료 제외):"] + found))
+            for page in paginate(f"📄 {user.display_name} 님의 분배 목록 ({label}, {len(found)}건):", found):
+                await user.send(page)
         except discord.Forbidden:
             m = await channel.send(f"⚠️ {user.mention}님에게 DM을 보내지 못했습니다.")
             await bot.enqueue_delete(m, delay=5)
@@ -532,7 +1267,9 @@ async def send_distribution_list(user: discord.User, guild: discord.Guild, chann
         await bot.enqueue_delete(m, delay=5)
 
 # ================== 실행 ==================
-if not TOKEN:
-    raise SystemExit("환경변수 DISCORD_TOKEN 이 비어있습니다.")
+# import만 하면 봇을 띄우지 않음 (bench/bench_load_sim.py가 가짜 서버에 붙여 직접 start)
+if __name__ == "__main__":
+    if not TOKEN:
+        raise SystemExit("환경변수 DISCORD_TOKEN 이 비어있습니다.")
 
-bot.run(TOKEN)
\ No newline at end of file
+    bot.run(TOKEN)
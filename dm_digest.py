@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# DM 다이제스트 버퍼
+# - 사용자별로 알림 항목을 잠시 모았다가 기한에 한 번에 꺼냄 → DM 1통으로 전송
+# - 첫 항목이 들어올 때 기한을 잡고, 같은 기한 안에 들어온 항목은 같은 다이제스트로
+# - 기한 관리는 DelayedActions(타이머 힙)에 맡김 (사용자마다 태스크를 만들지 않음)
+# - 알림을 버리지 않는다: 쿨다운은 '기한을 늦추는' 방식으로만 적용
+#   (예외: 옵트아웃한 사용자의 대기분은 drop으로 버림)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+from typing import Any, Callable, Dict, List
+
+from timers import DelayedActions
+
+
+class DigestBuffer:
+    """
+    add(user_id, entry, delay): 사용자 버퍼에 항목 추가. 버퍼가 비어 있었으면 delay초 뒤 기한을 잡는다.
+    기한이 되면 on_due(user_id, entries)를 호출 (entries는 추가 순서, 중복 제거).
+    """
+
+    def __init__(self, timers: DelayedActions, on_due: Callable[[int, List[Any]], None]):
+        self.timers = timers
+        self.on_due = on_due
+        self._pending: Dict[int, List[Any]] = {}
+
+    def __len__(self) -> int:
+        """다이제스트 대기 중인 사용자 수"""
+        return len(self._pending)
+
+    @property
+    def entry_count(self) -> int:
+        return sum(len(v) for v in self._pending.values())
+
+    def add(self, user_id: int, entry: Any, delay: float):
+        entries = self._pending.get(user_id)
+        if entries is not None:
+            if entry not in entries:
+                entries.append(entry)
+            return
+        self._pending[user_id] = [entry]
+        self.timers.call_later(delay, lambda: self._due(user_id), group=("dm_digest", user_id))
+
+    def drop(self, user_id: int) -> int:
+        """사용자의 대기 중 다이제스트를 보내지 않고 버림 (옵트아웃 등). 버린 항목 수."""
+        self.timers.cancel_group(("dm_digest", user_id))
+        return len(self._pending.pop(user_id, ()))
+
+    def flush_all(self):
+        """종료 시 등: 기한을 기다리지 않고 모두 내보냄"""
+        for user_id in list(self._pending):
+            self.timers.fire_group(("dm_digest", user_id))
+
+    def _due(self, user_id: int):
+        entries = self._pending.pop(user_id, None)
+        if entries:
+            self.on_due(user_id, entries)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 만료되는 맵 (버킷 단위 기한)
+# - 항목마다 기한을 두고, 기한을 resolution초 단위 버킷(slot)에 모아둔다
+# - 접근(get/set/len)할 때 지나간 버킷만 통째로 비움 → 항목당 분할상환 O(1), 별도 태스크 없음
+# - 조회 시에도 기한을 확인하므로 버킷 해상도와 무관하게 만료된 값은 보이지 않음
+# - group_of를 주면 그룹(예: 분배 메시지 ID) 단위로 한 번에 지울 수 있음
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Set, Tuple
+
+_MISSING = object()
+
+
+class ExpiringMap:
+    """
+    ttl초 뒤 사라지는 dict 비슷한 맵. m[key] = value 는 기본 ttl, set(key, value, ttl)로 개별 지정.
+    clock은 기한 기준 시계 (기본 time.monotonic; 벽시계 값과 맞춰야 하면 time.time).
+    """
+
+    def __init__(self, ttl: float, resolution: float = 1.0, clock: Callable[[], float] = time.monotonic,
+                 group_of: Optional[Callable[[Hashable], Hashable]] = None):
+        self.ttl = ttl
+        self.resolution = resolution
+        self.clock = clock
+        self.group_of = group_of
+        self._data: Dict[Hashable, Tuple[Any, float]] = {}   # key -> (값, 기한)
+        self._slots: Dict[int, Set[Hashable]] = {}           # 버킷 번호 -> 그 버킷에 기한이 있는 키
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self._swept = int(clock() // resolution)              # 이 번호 미만 버킷은 비워짐
+        self.expired = 0                                      # 만료로 지운 누적 항목 수
+
+    # --------------- 조회 ---------------
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = self.clock()
+        self._expire(now)
+        item = self._data.get(key)
+        if item is None:
+            return default
+        if item[1] <= now:
+            self._remove(key)
+            self.expired += 1
+            return default
+        return item[0]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        now = self.clock()
+        self._expire(now)
+        return ((k, v) for k, (v, deadline) in list(self._data.items()) if deadline > now)
+
+    # --------------- 변경 ---------------
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = self.clock()
+        self._expire(now)
+        deadline = now + (self.ttl if ttl is None else ttl)
+        old = self._data.get(key)
+        if old is not None:
+            self._slot_discard(key, old[1])
+        elif self.group_of is not None:
+            self._groups.setdefault(self.group_of(key), set()).add(key)
+        self._data[key] = (value, deadline)
+        self._slots.setdefault(int(deadline // self.resolution), set()).add(key)
+
+    def update(self, pairs: Iterable[Tuple[Hashable, Any]], ttl: Optional[float] = None):
+        for k, v in pairs:
+            self.set(k, v, ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        return self._remove(key)
+
+    def discard_group(self, group: Hashable) -> int:
+        """그룹의 항목을 모두 지우고 지운 수를 돌려준다."""
+        keys = self._groups.pop(group, None)
+        if not keys:
+            return 0
+        for key in list(keys):
+            value, deadline = self._data.pop(key)
+            self._slot_discard(key, deadline)
+        return len(keys)
+
+    def clear(self):
+        self._data.clear()
+        self._slots.clear()
+        self._groups.clear()
+
+    # --------------- 내부 ---------------
+    def _remove(self, key: Hashable) -> Any:
+        value, deadline = self._data.pop(key)
+        self._slot_discard(key, deadline)
+        if self.group_of is not None:
+            group = self.group_of(key)
+            members = self._groups.get(group)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._groups[group]
+        return value
+
+    def _slot_discard(self, key: Hashable, deadline: float):
+        slot = int(deadline // self.resolution)
+        keys = self._slots.get(slot)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._slots[slot]
+
+    def _expire(self, now: Optional[float] = None):
+        """기한이 통째로 지나간 버킷(현재 버킷 미만)을 비운다."""
+        current = int((self.clock() if now is None else now) // self.resolution)
+        if current <= self._swept:
+            return
+        if current - self._swept > len(self._slots):
+            # 오래 쉬었으면 빈 버킷 번호를 하나씩 훑지 않고 있는 버킷만 본다
+            due = sorted(s for s in self._slots if s < current)
+        else:
+            due = [s for s in range(self._swept, current) if s in self._slots]
+        for slot in due:
+            for key in list(self._slots[slot]):
+                self._remove(key)
+                self.expired += 1
+        self._swept = current
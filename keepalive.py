@@ -1,15 +1,59 @@
-from flask import Flask
-from threading import Thread
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 상태 서버 (aiohttp, 봇과 같은 이벤트 루프에서 실행)
+# - 별도 스레드/런타임 없이 MyBot.setup_hook에서 start() → 봇 상태를 락 없이 바로 읽음
+# - GET/HEAD /        : 살아 있음 (keepalive 핑용, 항상 200)
+# - GET/HEAD /ready   : 준비 상태 (게이트웨이 연결 + 큐 적체 기준, 아니면 503) → 모니터링은 여기로
+# - GET /metrics      : Prometheus 텍스트 포맷
+# - GET /debug/state  : 디버그용 상태 JSON
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
 
-app = Flask('')
+from typing import Callable, Optional, Tuple
 
-@app.route('/')
-def home():
-    return "I'm alive!"
+from aiohttp import web
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
\ No newline at end of file
+# readiness(): (준비 여부, 사유/세부 dict)
+Readiness = Callable[[], Tuple[bool, dict]]
+
+
+class HealthServer:
+    def __init__(self, host: str, port: int, readiness: Readiness,
+                 metrics: Callable[[], str], state: Callable[[], dict]):
+        self.host = host
+        self.port = port
+        self.readiness = readiness
+        self.metrics = metrics
+        self.state = state
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self._alive)          # GET 등록 시 HEAD도 같이 등록됨
+        app.router.add_get("/ready", self._ready)
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/debug/state", self._state)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # --------------- 핸들러 ---------------
+    async def _alive(self, request: web.Request) -> web.Response:
+        return web.Response(text="I'm alive!")
+
+    async def _ready(self, request: web.Request) -> web.Response:
+        ok, detail = self.readiness()
+        return web.json_response({"ready": ok, **detail}, status=200 if ok else 503)
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.metrics().encode("utf-8"), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+    async def _state(self, request: web.Request) -> web.Response:
+        return web.json_response(self.state())
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 멘션 파싱 / 멤버 조회
+# - 인자 문자열에서 <@id> / <@!id> 를 한 번만 파싱 (작성 순서 유지, 중복 제거)
+#   채널 멤버 전체를 훑지 않으므로 길드 크기와 무관하게 O(멘션 수)
+# - 캐시(guild.get_member) 우선, 없으면 query_members로 한 번에 조회 (100명 단위)
+#   query_members가 실패하면 fetch_member로 하나씩
+# - MemberCache: 청크 없는(lazy) 시작 모드용 LRU + TTL 캐시
+#   discord.py 멤버 캐시를 끈 상태에서 필요한 멤버만 조회해 잠시 보관
+#   조회 결과는 이 캐시만 들고 있음 (query_members(cache=False) → 길드 멤버 목록에 쌓이지 않음)
+#   길드에 없는 사용자도 miss_ttl초 동안 기억 (같은 ID로 게이트웨이 조회를 반복하지 않게)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 역할 멘션(<@&id>)은 제외
+MENTION_RE = re.compile(r"<@!?(\d{15,21})>")
+
+# query_members(user_ids=...) 1회 최대 인원
+QUERY_BATCH = 100
+
+# MemberCache.peek: 길드에 없는 사용자로 기억된 경우 (None = 캐시에 없음)
+NOT_FOUND = object()
+
+
+def parse_mention_ids(text: str) -> List[int]:
+    """멘션 ID를 작성 순서대로 (중복 제거)"""
+    seen = set()
+    out: List[int] = []
+    for m in MENTION_RE.finditer(text):
+        uid = int(m.group(1))
+        if uid not in seen:
+            seen.add(uid)
+            out.append(uid)
+    return out
+
+
+class MemberCache:
+    """(guild_id, user_id) -> Member, 최대 maxsize개, ttl초 뒤 만료 (LRU)
+       없는 사용자는 NOT_FOUND로 miss_ttl초 동안 보관
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 600.0, clock: Callable[[], float] = time.monotonic,
+                 miss_ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.clock = clock
+        self._data: "OrderedDict[Tuple[int, int], Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def peek(self, guild_id: int, user_id: int):
+        """Member / NOT_FOUND / None(캐시에 없음)"""
+        key = (guild_id, user_id)
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, member = entry
+        if expires < self.clock():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return member
+
+    def put(self, member):
+        self._store((member.guild.id, member.id), self.ttl, member)
+
+    def put_missing(self, guild_id: int, user_id: int):
+        self._store((guild_id, user_id), self.miss_ttl, NOT_FOUND)
+
+    def _store(self, key: Tuple[int, int], ttl: float, value: object):
+        self._data[key] = (self.clock() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get(self, guild, user_id: int):
+        """캐시 → fetch_member 순. 길드에 없는 사용자면 None."""
+        members = await resolve_members(guild, [user_id], cache=self)
+        return members[0] if members else None
+
+
+async def resolve_members(guild, user_ids: List[int], cache: Optional[MemberCache] = None) -> list:
+    """ID 목록 -> Member 목록 (입력 순서 유지, 찾지 못한 ID는 빠짐)
+       조회 순서: guild.get_member → cache → query_members/fetch_member (결과는 cache에 보관)
+       길드에 없다고 확인된 ID는 cache에 NOT_FOUND로 남겨 다음 조회를 건너뜀
+    """
+    found: Dict[int, object] = {}
+    missing: List[int] = []
+    for uid in dict.fromkeys(user_ids):
+        member = guild.get_member(uid)
+        if member is None and cache is not None:
+            member = cache.peek(guild.id, uid)
+        if member is NOT_FOUND:
+            continue
+        if member is not None:
+            found[uid] = member
+        else:
+            missing.append(uid)
+
+    for i in range(0, len(missing), QUERY_BATCH):
+        batch = missing[i:i + QUERY_BATCH]
+        # 확인된 부재: 응답에 빠진 ID (query_members) / 404 (fetch_member). 일시 오류는 기억하지 않음
+        absent: List[int] = []
+        try:
+            members = await guild.query_members(user_ids=batch, cache=False)
+            returned = {m.id for m in members}
+            absent = [uid for uid in batch if uid not in returned]
+        except Exception as e:
+            print(f"[WARN] query_members 실패, 개별 조회로 대체: {e}")
+            members = []
+            for uid in batch:
+                try:
+                    members.append(await guild.fetch_member(uid))
+                except Exception as e2:
+                    if getattr(e2, "status", None) == 404:
+                        absent.append(uid)
+                    else:
+                        print(f"[WARN] fetch_member({uid}) 실패: {e2}")
+        for member in members:
+            found[member.id] = member
+            if cache is not None:
+                cache.put(member)
+        if cache is not None:
+            for uid in absent:
+                cache.put_missing(guild.id, uid)
+
+    return [found[uid] for uid in user_ids if uid in found]
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 가벼운 계측 도구
+# - 핫패스에서 하는 일은 정수 증가(Counter.inc) / 이분 탐색 1회(Histogram.observe) 뿐
+#   문자열 조립·라벨 처리는 전부 수집(/metrics 요청) 시점에만
+# - Histogram: 고정 버킷 누적 카운트, Prometheus 히스토그램과 같은 le(이하) 버킷 규칙
+# - Registry: 이름/라벨별 지표를 모아 Prometheus 텍스트 포맷(0.0.4) 또는 dict로 내보냄
+#   게이지와 외부 객체가 이미 세고 있는 카운터는 함수로 등록 → 수집할 때만 읽음
+# - LogMatchCounter: 특정 로그(예: discord.py의 429 경고) 발생 횟수를 세는 logging 핸들러
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import logging
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# 초 단위 기본 버킷 (큐 대기/처리 지연용)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)   # 마지막 칸 = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """버킷 상한으로 어림한 분위수 (+Inf 칸이면 관측 최댓값)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95), "max": self.max}
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+
+class LogMatchCounter(logging.Handler):
+    """로그 포맷 문자열이 prefixes 중 하나로 시작하면 1 증가 (메시지 포맷팅 없이 비교)"""
+
+    def __init__(self, *prefixes: str):
+        super().__init__(logging.DEBUG)
+        self.prefixes = prefixes
+        self.value = 0
+
+    def emit(self, record: logging.LogRecord):
+        msg = record.msg
+        if isinstance(msg, str) and msg.startswith(self.prefixes):
+            self.value += 1
+
+
+# 값 소스: Counter / Histogram / 수집 시 호출할 함수
+Source = Union[Counter, Histogram, LogMatchCounter, Callable[[], float]]
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Family:
+    __slots__ = ("name", "kind", "help", "samples")
+
+    def __init__(self, name: str, kind: str, help: str):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples: List[Tuple[Labels, Source]] = []
+
+
+def _fmt_value(v: float) -> str:
+    if isinstance(v, float):
+        if math.isnan(v):
+            return "NaN"
+        if math.isinf(v):
+            return "+Inf" if v > 0 else "-Inf"
+        return repr(v)
+    return str(v)
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+class Registry:
+    """
+    counter()/histogram()은 핫패스에서 직접 올릴 객체를 돌려주고,
+    gauge()/counter_fn()은 수집 시점에 호출할 함수를 등록한다.
+    같은 이름을 라벨만 바꿔 여러 번 등록하면 한 지표(family)로 묶인다.
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._families: Dict[str, _Family] = {}
+
+    def _add(self, name: str, kind: str, help: str, labels: Dict[str, str], source: Source):
+        full = self.prefix + name
+        family = self._families.get(full)
+        if family is None:
+            family = self._families[full] = _Family(full, kind, help)
+        elif family.kind != kind:
+            raise ValueError(f"지표 종류 불일치: {full} ({family.kind} != {kind})")
+        family.samples.append((tuple(sorted(labels.items())), source))
+
+    def counter(self, name: str, help: str, **labels: str) -> Counter:
+        c = Counter()
+        self._add(name, "counter", help, labels, c)
+        return c
+
+    def counter_fn(self, name: str, help: str, fn: Callable[[], float], **labels: str):
+        self._add(name, "counter", help, labels, fn)
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float], **labels: str):
+        self._add(name, "gauge", help, labels, fn)
+
+    def histogram(self, name: str, help: str, hist: Optional[Histogram] = None, **labels: str) -> Histogram:
+        h = hist if hist is not None else Histogram()
+        self._add(name, "histogram", help, labels, h)
+        return h
+
+    def add_source(self, name: str, kind: str, help: str, source: Source, **labels: str):
+        """이미 있는 객체(LogMatchCounter 등)를 그대로 등록"""
+        self._add(name, kind, help, labels, source)
+
+    # --------------- 내보내기 ---------------
+    @staticmethod
+    def _read(source: Source) -> float:
+        if isinstance(source, (Counter, LogMatchCounter)):
+            return source.value
+        return source()   # type: ignore[operator]
+
+    def render(self) -> str:
+        """Prometheus 텍스트 포맷"""
+        out: List[str] = []
+        for f in self._families.values():
+            out.append(f"# HELP {f.name} {f.help}")
+            out.append(f"# TYPE {f.name} {f.kind}")
+            for labels, source in f.samples:
+                if isinstance(source, Histogram):
+                    cumulative = 0
+                    for bound, c in zip(source.buckets + (math.inf,), source.counts):
+                        cumulative += c
+                        out.append(f"{f.name}_bucket{_fmt_labels(labels, ('le', _fmt_value(float(bound))))} {cumulative}")
+                    out.append(f"{f.name}_sum{_fmt_labels(labels)} {_fmt_value(source.sum)}")
+                    out.append(f"{f.name}_count{_fmt_labels(labels)} {source.count}")
+                    continue
+                try:
+                    value = self._read(source)
+                except Exception:
+                    value = math.nan
+                out.append(f"{f.name}{_fmt_labels(labels)} {_fmt_value(value)}")
+        out.append("")
+        return "\n".join(out)
+
+    def snapshot(self) -> Dict[str, object]:
+        """JSON용 요약: 라벨 없는 지표는 값, 라벨 있으면 {"k=v,...": 값}, 히스토그램은 요약 dict"""
+        out: Dict[str, object] = {}
+        for f in self._families.values():
+            values: Dict[str, object] = {}
+            for labels, source in f.samples:
+                if isinstance(source, Histogram):
+                    v: object = source.summary()
+                else:
+                    try:
+                        v = self._read(source)
+                    except Exception:
+                        v = None
+                    if isinstance(v, float) and not math.isfinite(v):
+                        v = None
+                values[",".join(f"{k}={val}" for k, val in labels)] = v
+            out[f.name] = values[""] if list(values) == [""] else values
+        return out
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 의심 메시지 재조정 (reconciler)
+# - 이벤트를 버렸거나(쿨다운) 놓쳤을 수 있는(재시작) 메시지를 '의심'으로 표시
+# - 표시 후 delay초 동안 조용하면(다시 표시되면 기한 연장) 재조정 대기열로
+# - 워커 1개가 자체 레이트 예산(토큰 버킷) 안에서 하나씩 run(msg_id) 실행
+#   → 실제 복원 로직(리액션 목록 조회 후 수령 상태 일괄 재구성)은 봇 쪽 함수
+# - run이 실패하면 retry_delay 뒤 다시 표시
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Set
+
+from scheduler import RateLimiter
+from timers import DelayedActions
+
+
+class Reconciler:
+    def __init__(self, timers: DelayedActions, run: Callable[[int], Awaitable[None]],
+                 delay: float, rate: float, burst: int, retry_delay: float = 30.0):
+        self.timers = timers
+        self.run = run
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self._rate = rate
+        self._burst = burst
+        self._marked: Set[int] = set()     # 기한 대기 중
+        self._due: Deque[int] = deque()    # 재조정 대기열
+        self._queued: Set[int] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready_gate: Optional[Callable[[], Awaitable[None]]] = None
+        # 누적 계측값
+        self.runs = 0
+        self.failures = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._marked) + len(self._due)
+
+    # --------------- 수명주기 ---------------
+    def start(self, ready_gate: Optional[Callable[[], Awaitable[None]]] = None):
+        """ready_gate: 워커가 첫 작업 전에 기다릴 코루틴 함수 (예: bot.wait_until_ready)"""
+        self._ready_gate = ready_gate
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._worker())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # --------------- 표시 ---------------
+    def mark(self, msg_id: int, delay: Optional[float] = None):
+        """의심 표시. 이미 기한 대기 중이면 기한을 뒤로 미룸 (폭주가 끝난 뒤 1번만 재조정)"""
+        if msg_id in self._queued:
+            return
+        group = ("reconcile", msg_id)
+        self.timers.cancel_group(group)
+        self._marked.add(msg_id)
+        self.timers.call_later(self.delay if delay is None else delay, lambda: self._promote(msg_id), group=group)
+
+    def forget(self, msg_id: int):
+        """분배 종료 시: 대기 중인 재조정 취소"""
+        self.timers.cancel_group(("reconcile", msg_id))
+        self._marked.discard(msg_id)
+        self._queued.discard(msg_id)   # 대기열 자리는 꺼낼 때 건너뜀
+
+    def _promote(self, msg_id: int):
+        self._marked.discard(msg_id)
+        if msg_id in self._queued:
+            return
+        self._queued.add(msg_id)
+        self._due.append(msg_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # --------------- 실행 ---------------
+    async def _worker(self):
+        assert self._wakeup is not None
+        if self._ready_gate is not None:
+            await self._ready_gate()
+        limiter = RateLimiter(self._rate, self._burst)
+        while True:
+            while not self._due:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            msg_id = self._due.popleft()
+            if msg_id not in self._queued:
+                continue   # forget()된 항목
+            await limiter.acquire()
+            self._queued.discard(msg_id)
+            self.runs += 1
+            try:
+                await self.run(msg_id)
+            except Exception as e:
+                self.failures += 1
+                print(f"[WARN] 재조정 실패 {msg_id} ({self.retry_delay:.0f}초 뒤 재시도): {e}")
+                self.mark(msg_id, delay=self.retry_delay)
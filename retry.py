@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 쓰기 작업 재시도 정책 + 데드레터
+# - 재시도 대상: 429 / 5xx / 일시적 네트워크 오류 (403·404 같은 영구 실패는 바로 포기)
+# - 대기 시간: retry_after 속성 → Retry-After / X-RateLimit-Reset-After 헤더 → 지수 백오프, 모두 지터 추가
+# - 재시도를 다 쓴 작업은 데드레터에 보관 → 관리자가 조회 후 다시 실행
+# - discord를 import하지 않고 status / retry_after / (response.)headers 속성만 본다
+#   → discord.HTTPException 이든 가짜 HTTP 서버에 붙인 aiohttp 예외든 같은 규칙으로 판단
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import asyncio
+import itertools
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Hashable, List, Mapping, Optional, Tuple, Type
+
+# 작업 서술자: 호출할 때마다 새 코루틴을 만드는 함수 (코루틴은 두 번 await 할 수 없으므로)
+JobFactory = Callable[[], Awaitable]
+
+# 헤더 우선순위 (초 단위 값)
+_RETRY_HEADERS = ("Retry-After", "X-RateLimit-Reset-After")
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def _headers_of(exc: BaseException) -> Optional[Mapping[str, str]]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        headers = getattr(exc, "headers", None)
+    return headers
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """서버가 알려준 대기 시간(초). 없으면 None."""
+    retry_after = getattr(exc, "retry_after", None)
+    if isinstance(retry_after, (int, float)):
+        return max(0.0, float(retry_after))
+    headers = _headers_of(exc)
+    if not headers:
+        return None
+    for name in _RETRY_HEADERS:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            continue
+    return None
+
+
+def is_global_limit(exc: BaseException) -> bool:
+    """전역 레이트리밋 429인지 (이 경우 모든 레인을 같이 멈춰야 함)"""
+    if status_of(exc) != 429:
+        return False
+    headers = _headers_of(exc)
+    if not headers:
+        return False
+    return headers.get("X-RateLimit-Global", "").lower() == "true" or headers.get("X-RateLimit-Scope") == "global"
+
+
+class RetryPolicy:
+    """
+    max_attempts: 첫 시도 포함 총 시도 횟수
+    base/cap: 지수 백오프 (base * 2^(n-1), 최대 cap) — 서버 힌트가 없을 때만 사용
+    transient: 상태 코드가 없는 예외 중 재시도할 타입 (타임아웃/연결 오류 등)
+    """
+
+    def __init__(self, max_attempts: int = 5, base: float = 0.5, cap: float = 30.0,
+                 transient: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError, OSError),
+                 rng: Callable[[], float] = random.random):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.transient = transient
+        self._rng = rng
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        status = status_of(exc)
+        if status is not None:
+            return status == 429 or status >= 500
+        return isinstance(exc, self.transient)
+
+    def backoff(self, exc: BaseException, attempt: int) -> float:
+        """attempt번째 실패 뒤 기다릴 시간 (attempt는 1부터)"""
+        hint = retry_after_of(exc)
+        if hint is not None:
+            # 서버가 준 값은 지키되, 같은 순간에 몰려 다시 부딪치지 않도록 조금 늦춘다
+            return hint + self.base * self._rng()
+        # 힌트가 없으면 지수 백오프의 절반 + 무작위 절반 (equal jitter)
+        ceiling = min(self.cap, self.base * (2 ** (attempt - 1)))
+        return ceiling / 2 + ceiling / 2 * self._rng()
+
+
+class DeadLetter:
+    """재시도를 다 쓴 작업 1건 (factory를 그대로 들고 있어 다시 실행할 수 있다)"""
+    __slots__ = ("seq", "lane", "key", "name", "factory", "priority", "attempts", "error", "failed_at")
+
+    def __init__(self, seq: int, lane: Hashable, key: Optional[Hashable], name: str,
+                 factory: JobFactory, priority: int, attempts: int, error: str):
+        self.seq = seq
+        self.lane = lane
+        self.key = key
+        self.name = name
+        self.factory = factory
+        self.priority = priority
+        self.attempts = attempts
+        self.error = error
+        self.failed_at = time.time()
+
+
+class DeadLetterQueue:
+    """
+    최근 실패 작업을 최대 maxlen건 보관 (넘치면 가장 오래된 것부터 버림).
+    factory는 discord 객체를 캡처한 클로저라 디스크에 저장하지 않고 메모리에만 둔다.
+    """
+
+    def __init__(self, maxlen: int = 200):
+        self._items: Deque[DeadLetter] = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+        self.total = 0   # 지금까지 데드레터로 간 작업 수 (버려진 것 포함)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, lane: Hashable, key: Optional[Hashable], name: str, factory: JobFactory,
+            priority: int, attempts: int, exc: BaseException) -> DeadLetter:
+        letter = DeadLetter(next(self._seq), lane, key, name, factory, priority, attempts, f"{type(exc).__name__}: {exc}")
+        self._items.append(letter)
+        self.total += 1
+        return letter
+
+    def list(self) -> List[DeadLetter]:
+        return list(self._items)
+
+    def pop(self, seq: Optional[int] = None) -> List[DeadLetter]:
+        """seq 1건(없으면 빈 목록) 또는 seq=None이면 전부 꺼낸다."""
+        if seq is None:
+            out = list(self._items)
+            self._items.clear()
+            return out
+        for letter in self._items:
+            if letter.seq == seq:
+                self._items.remove(letter)
+                return [letter]
+        return []
@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 쓰기 작업 스케줄러
+# - 디스코드 레이트리밋 버킷(채널/메시지/스레드/DM)마다 레인(lane) 1개
+# - 레인 내부는 FIFO 순서 보장 (기존 단일 큐의 순서 보장을 레인 단위로 유지)
+# - 레인끼리는 병렬 실행, 동시 실행 레인 수 상한
+# - 전역 초당 요청 수 상한(토큰 버킷)
+# - 키 합치기: 같은 key로 대기 중인 작업이 있으면 새 작업이 그 자리를 대체
+#   (예: 같은 메시지의 임베드 편집은 마지막 것만 실행)
+# - 작업은 코루틴이 아니라 코루틴을 만드는 함수(factory) → 429/5xx면 같은 작업을 다시 실행
+#   재시도 대기 중에는 레인을 붙잡아 순서를 지키되 동시 실행 슬롯은 내어줌
+#   작업 사이 레인 간격(lane_delay)도 같은 방식 (레인만 쉬고 슬롯은 다른 레인이 씀)
+#   재시도를 다 쓰면 데드레터로 (retry.py)
+# - 우선순위 클래스(interactive > normal > bulk): 준비된 레인 중 높은 클래스부터 꺼냄
+#   낮은 클래스도 aging초 넘게 기다렸으면 먼저 꺼냄 → bulk가 굶지 않음
+#   클래스별 큐 대기 시간은 히스토그램으로 기록 (wait_hist)
+# - 계측은 정수 증가/히스토그램 관측만 (내보내기는 metrics.Registry가 수집 시점에 읽음)
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import asyncio
+import heapq
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from metrics import Histogram
+from retry import DeadLetterQueue, JobFactory, RetryPolicy, is_global_limit, status_of
+
+# 레인 키: (종류, ID) 튜플
+GLOBAL_LANE = ("global", 0)
+
+def channel_lane(channel_id: int) -> tuple:
+    return ("channel", channel_id)
+
+def message_lane(message_id: int) -> tuple:
+    return ("message", message_id)
+
+def reaction_lane(message_id: int) -> tuple:
+    # 리액션 추가는 메시지 편집과 다른 버킷 → 시딩이 같은 메시지의 편집을 막지 않도록 분리
+    return ("reaction", message_id)
+
+def thread_lane(thread_id: int) -> tuple:
+    return ("thread", thread_id)
+
+def dm_lane(user_id: int) -> tuple:
+    return ("dm", user_id)
+
+# 우선순위 클래스 (작을수록 먼저)
+INTERACTIVE = 0   # 사용자가 보고 기다리는 것: 수령 후 임베드 갱신, 안내 메시지 정리, 완료 게시
+NORMAL      = 1
+BULK        = 2   # 몰아서 해도 되는 것: 스레드 초대, 리액션 시딩, DM 발송
+PRIORITY_NAMES = ("interactive", "normal", "bulk")
+
+# 합치기 키
+def edit_key(message_id: int) -> tuple:
+    return ("edit", message_id)
+
+def delete_key(message_id: int) -> tuple:
+    return ("delete", message_id)
+
+
+class _Job:
+    __slots__ = ("factory", "key", "name", "attempts", "priority", "enqueued_at")
+
+    def __init__(self, factory: Optional[JobFactory], key: Optional[Hashable], name: str,
+                 priority: int, enqueued_at: float):
+        self.factory = factory   # None이면 버려진 작업
+        self.key = key
+        self.name = name
+        self.attempts = 0
+        self.priority = priority
+        self.enqueued_at = enqueued_at   # 큐 대기 시간 측정 기준 (loop.time())
+
+
+class RateLimiter:
+    """토큰 버킷: 초당 rate개, 최대 burst개까지 몰아서 허용."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last: Optional[float] = None
+        self._resume_at = 0.0
+
+    def pause(self, delay: float):
+        """전역 429 등으로 delay초 동안 토큰 발급 중지"""
+        now = asyncio.get_running_loop().time()
+        self._resume_at = max(self._resume_at, now + delay)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if now < self._resume_at:
+                await asyncio.sleep(self._resume_at - now)
+                continue
+            if self._last is None:
+                self._last = now
+            self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+class WriteScheduler:
+    """
+    레인별 FIFO + 전역 레이트 상한 + 동시성 상한 스케줄러.
+    - submit(lane, factory): 해당 레인 끝에 작업 추가 (factory()가 실제 코루틴을 만든다)
+    - 한 레인은 동시에 작업 1개만 실행 (순서 보장)
+    - 준비된 레인은 클래스별로 라운드로빈, 높은 클래스 먼저 (레인 클래스 = 맨 앞 작업의 클래스,
+      낮은 클래스 레인에 높은 클래스 작업이 들어오면 레인을 승격)
+    - 낮은 클래스 레인이 aging초 넘게 준비 상태로 기다렸으면 클래스와 무관하게 먼저 꺼냄
+    - submit(..., key=K): K로 대기 중인 작업이 있으면 그 작업의 내용을 교체 (순서 위치는 유지)
+    - discard(K): K로 대기 중인 작업을 실행하지 않고 버림 (재시도 대기 중인 작업 포함)
+    - 실패 시 retry 정책이 재시도 가능하다고 보면 백오프 뒤 레인 맨 앞으로 되돌림
+      (대기 중 같은 key로 새 작업이 오면 재시도는 최신 내용으로 실행)
+    - 재시도를 다 쓰면 dead_letters에 보관, replay()로 다시 등록
+    반드시 이벤트 루프 안에서 생성/시작할 것 (setup_hook).
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int,
+                 lane_delay: Optional[Callable[[], float]] = None,
+                 retry: Optional[RetryPolicy] = None, dead_letters: Optional[DeadLetterQueue] = None,
+                 aging: float = 3.0):
+        self.max_concurrency = max_concurrency
+        self.aging = aging
+        self.lane_delay = lane_delay
+        self.retry = retry or RetryPolicy()
+        self.dead_letters = dead_letters if dead_letters is not None else DeadLetterQueue()
+        # 누적 계측값
+        self.submitted = [0] * len(PRIORITY_NAMES)   # 클래스별 등록 수 (합치기 포함)
+        self.coalesced = 0   # 대기 중 작업에 합쳐진 등록 수
+        self.completed = 0
+        self.failed = 0      # 재시도 없이 포기했거나 재시도를 다 쓴 작업 수
+        self.retried = 0     # 재시도 예약 횟수
+        self.rate_limited = 0   # 429로 실패한 실행 수
+        self.run_hist = Histogram()   # 작업 1회 실행 시간 (초)
+        self._limiter = RateLimiter(rate, burst)
+        self._lanes: Dict[Hashable, Deque[_Job]] = {}
+        self._keyed: Dict[Hashable, _Job] = {}   # 합치기 키 -> 대기 중 작업
+        self._pending = 0                        # 재시도 대기 중인 작업 포함
+        self._parked: Dict[_Job, asyncio.TimerHandle] = {}   # 재시도 대기 중 작업 -> 타이머
+        self._resting: Dict[Hashable, asyncio.TimerHandle] = {}   # 작업 간격(lane_delay) 대기 중 레인 -> 타이머
+        # 대기 작업이 있고 실행 중이 아닌 레인: 클래스별 (레인, 준비된 시각, 세대)
+        # 승격 등으로 옮겨간 예전 항목은 남겨두고, 꺼낼 때 세대가 _ready_gen과 다르면 버린다
+        # (클래스만 비교하면 같은 클래스로 다시 준비된 레인이 예전 시각의 항목으로 뽑힘)
+        self._ready: List[Deque[Tuple[Hashable, float, int]]] = [deque() for _ in PRIORITY_NAMES]
+        self._ready_class: Dict[Hashable, int] = {}
+        self._ready_gen: Dict[Hashable, int] = {}
+        self._gen = 0
+        self.wait_hist = [Histogram() for _ in PRIORITY_NAMES]   # 클래스별 등록→실행 대기 시간 (초)
+        self._busy: Set[Hashable] = set()        # 작업 실행 중인 레인
+        self._inflight = 0
+        self._wakeup = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    # --------------- 상태 ---------------
+    @property
+    def depth(self) -> int:
+        """대기 중인 작업 수 (실행 중 제외, 재시도 대기 포함)"""
+        return self._pending
+
+    @property
+    def parked(self) -> int:
+        """백오프 중인 작업 수"""
+        return len(self._parked)
+
+    @property
+    def lane_count(self) -> int:
+        return len(self._lanes)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def wait_summary(self) -> Dict[str, Dict[str, float]]:
+        """클래스별 큐 대기 시간 요약 (튜닝용)"""
+        return {name: h.summary() for name, h in zip(PRIORITY_NAMES, self.wait_hist)}
+
+    def busiest_lanes(self, n: int = 10) -> List[Tuple[Hashable, int]]:
+        """대기 작업이 많은 레인 상위 n개 (디버그용, 버려진 자리 포함 길이)"""
+        return heapq.nlargest(n, ((lane, len(q)) for lane, q in self._lanes.items()), key=lambda x: x[1])
+
+    async def acquire(self):
+        """작업 안에서 API를 여러 번 부르는 팬아웃이 전역 레이트 상한을 같이 쓰도록"""
+        await self._limiter.acquire()
+
+    # --------------- 수명주기 ---------------
+    def start(self):
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def drain(self, timeout: float):
+        """대기/실행 중 작업이 비거나 timeout이 지날 때까지 기다린다 (종료 직전용)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (self._pending or self._inflight) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for t in list(self._running):
+            t.cancel()
+        for handle in self._parked.values():
+            handle.cancel()
+        self._parked.clear()
+        for handle in self._resting.values():
+            handle.cancel()
+        self._resting.clear()
+
+    # --------------- 등록 ---------------
+    def submit(self, lane: Hashable, factory: JobFactory, key: Optional[Hashable] = None, name: str = "",
+               priority: int = NORMAL):
+        """name은 로그/데드레터 표시용 (비우면 레인 키)"""
+        self.submitted[priority] += 1
+        if key is not None:
+            queued = self._keyed.get(key)
+            if queued is not None:
+                self.coalesced += 1
+                # 아직 실행 전이면 최신 내용으로 교체 → API 호출 1회로 합쳐짐 (대기 시작 시각은 유지)
+                # 재시도 대기 중이던 작업이면 새 내용은 처음 시도하는 것이므로 시도 횟수도 초기화
+                queued.factory = factory
+                queued.attempts = 0
+                queued.name = name or queued.name
+                if priority < queued.priority:
+                    queued.priority = priority
+                    if lane not in self._busy:
+                        self._mark_ready(lane, priority)
+                return
+
+        job = _Job(factory, key, name or str(lane), priority, asyncio.get_running_loop().time())
+        if key is not None:
+            self._keyed[key] = job
+        self._pending += 1
+        q = self._lanes.get(lane)
+        if q is None:
+            q = self._lanes[lane] = deque()
+        q.append(job)
+        # 실행 중이 아니면 준비 목록에 올림 (이미 올라 있으면 필요할 때만 승격)
+        if lane not in self._busy:
+            self._mark_ready(lane, priority)
+
+    def discard(self, key: Hashable) -> bool:
+        """key로 대기 중인 작업을 버린다. (레인 안의 자리는 꺼낼 때 건너뜀)"""
+        job = self._keyed.pop(key, None)
+        if job is None:
+            return False
+        job.factory = None
+        self._pending -= 1
+        return True
+
+    def replay(self, seq: Optional[int] = None) -> int:
+        """데드레터 작업을 다시 등록 (seq=None이면 전부). 등록한 건수를 돌려준다.
+           같은 key로 대기 중인 작업이 있으면 그쪽이 더 새 내용이므로 다시 등록하지 않고 버린다
+           (합치기로 예전 내용이 최신 작업을 덮어쓰지 않도록)
+        """
+        count = 0
+        for letter in self.dead_letters.pop(seq):
+            if letter.key is not None and letter.key in self._keyed:
+                print(f"[WARN] 데드레터 #{letter.seq} 재실행 생략 (더 새 작업이 대기 중): {letter.name}")
+                continue
+            self.submit(letter.lane, letter.factory, key=letter.key, name=letter.name, priority=letter.priority)
+            count += 1
+        return count
+
+    def _pop_live(self, lane: Hashable) -> Optional[_Job]:
+        """레인 앞에서 버려지지 않은 작업 1개를 꺼낸다. 없으면 레인 정리 후 None."""
+        q = self._lanes.get(lane)
+        while q:
+            job = q.popleft()
+            if job.factory is None:
+                continue
+            if job.key is not None and self._keyed.get(job.key) is job:
+                del self._keyed[job.key]
+            self._pending -= 1
+            return job
+        self._lanes.pop(lane, None)
+        return None
+
+    # --------------- 준비 목록 ---------------
+    def _mark_ready(self, lane: Hashable, priority: int):
+        current = self._ready_class.get(lane)
+        if current is not None and current <= priority:
+            return
+        self._gen += 1
+        self._ready_class[lane] = priority
+        self._ready_gen[lane] = self._gen
+        self._ready[priority].append((lane, asyncio.get_running_loop().time(), self._gen))
+        self._wakeup.set()
+
+    def _next_ready(self) -> Hashable:
+        """다음에 실행할 레인: aging을 넘긴 낮은 클래스(가장 오래 기다린 것) → 높은 클래스 순"""
+        now = asyncio.get_running_loop().time()
+        starved: Optional[Tuple[float, int]] = None
+        first: Optional[int] = None
+        for cls, q in enumerate(self._ready):
+            while q and self._ready_gen.get(q[0][0]) != q[0][2]:
+                q.popleft()   # 승격되어 옮겨갔거나 이미 꺼내진 예전 항목
+            if not q:
+                continue
+            if first is None:
+                first = cls
+            elif now - q[0][1] >= self.aging and (starved is None or q[0][1] < starved[0]):
+                starved = (q[0][1], cls)
+        assert first is not None
+        cls = starved[1] if starved is not None else first
+        lane, _, _ = self._ready[cls].popleft()
+        del self._ready_class[lane]
+        del self._ready_gen[lane]
+        return lane
+
+    def _head_priority(self, lane: Hashable) -> int:
+        for job in self._lanes.get(lane, ()):
+            if job.factory is not None:
+                return job.priority
+        return BULK
+
+    # --------------- 실행 ---------------
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self._ready_class or self._inflight >= self.max_concurrency:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            lane = self._next_ready()
+            job = self._pop_live(lane)
+            if job is None:
+                continue
+            # 레이트 대기 중에 같은 레인이 다시 준비 목록에 오르지 않도록 먼저 점유
+            self._busy.add(lane)
+            self._inflight += 1
+            await self._limiter.acquire()
+            self.wait_hist[job.priority].observe(loop.time() - job.enqueued_at)
+
+            task = asyncio.create_task(self._run(lane, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, lane: Hashable, job: _Job):
+        assert job.factory is not None
+        retry_in: Optional[float] = None
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await job.factory()
+            self.completed += 1
+        except Exception as e:
+            retry_in = self._on_failure(lane, job, e)
+        finally:
+            self.run_hist.observe(loop.time() - started)
+            # 실행 슬롯은 바로 반납. 레인 간격(lane_delay)은 재시도 대기처럼 레인만 붙잡은 채 타이머로 기다림
+            self._inflight -= 1
+            if retry_in is not None:
+                self._park(lane, job, retry_in)
+            elif self.lane_delay is not None:
+                self._rest(lane, self.lane_delay())
+            else:
+                self._release(lane)
+            self._wakeup.set()
+
+    def _on_failure(self, lane: Hashable, job: _Job, e: Exception) -> Optional[float]:
+        """재시도할 거면 대기 시간, 아니면 None (로그/데드레터 처리 포함)"""
+        job.attempts += 1
+        if status_of(e) == 429:
+            self.rate_limited += 1
+        if not self.retry.is_retryable(e):
+            self.failed += 1
+            print(f"[ERROR] bg job 실패 {job.name}: {e}")
+            return None
+        if job.key is not None and job.key in self._keyed:
+            # 실행 중에 같은 key로 새 작업이 들어와 있음 → 그쪽이 최신이므로 이 작업은 재시도하지 않음
+            return None
+        if job.attempts >= self.retry.max_attempts:
+            self.failed += 1
+            letter = self.dead_letters.add(lane, job.key, job.name, job.factory, job.priority, job.attempts, e)
+            print(f"[ERROR] bg job {job.attempts}회 시도 후 포기 → 데드레터 #{letter.seq} {job.name}: {e}")
+            return None
+        delay = self.retry.backoff(e, job.attempts)
+        if is_global_limit(e):
+            self._limiter.pause(delay)
+        self.retried += 1
+        print(f"[WARN] bg job 재시도 {job.attempts}/{self.retry.max_attempts} ({delay:.2f}초 후) {job.name}: {e}")
+        return delay
+
+    def _park(self, lane: Hashable, job: _Job, delay: float):
+        """레인은 붙잡은 채(순서 유지) 백오프. 그동안 같은 key 등록/버리기는 이 작업에 반영된다."""
+        if job.key is not None:
+            self._keyed[job.key] = job
+        self._pending += 1
+        self._parked[job] = asyncio.get_running_loop().call_later(delay, self._unpark, lane, job)
+
+    def _unpark(self, lane: Hashable, job: _Job):
+        self._parked.pop(job, None)
+        job.enqueued_at = asyncio.get_running_loop().time()
+        q = self._lanes.get(lane)
+        if q is None:
+            q = self._lanes[lane] = deque()
+        q.appendleft(job)   # 버려졌으면 _pop_live가 건너뜀
+        self._release(lane)
+        self._wakeup.set()
+
+    def _rest(self, lane: Hashable, delay: float):
+        """같은 레인의 다음 작업까지 delay초 간격 (그동안 다른 레인은 슬롯을 쓸 수 있음)"""
+        self._resting[lane] = asyncio.get_running_loop().call_later(delay, self._wake_rested, lane)
+
+    def _wake_rested(self, lane: Hashable):
+        self._resting.pop(lane, None)
+        self._release(lane)
+        self._wakeup.set()
+
+    def _release(self, lane: Hashable):
+        self._busy.discard(lane)
+        q = self._lanes.get(lane)
+        if q:
+            self._mark_ready(lane, self._head_priority(lane))
+        else:
+            self._lanes.pop(lane, None)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 분배 상태 영구 저장소 (SQLite, WAL 모드)
+# - 쓰기는 write-behind 버퍼에 모아 두었다가 주기적으로 한 트랜잭션에 일괄 반영
+#   → 반응 처리 같은 핫패스는 디스크를 기다리지 않음 (dict 대입만)
+# - 같은 키의 쓰기는 버퍼에서 마지막 값만 남음
+# - 부팅 시에는 행을 메시지 ID로 인덱싱만 하고, discord 객체 복원은 호출 측에서 지연 처리
+# - DB 접근은 to_thread로 이벤트 루프 밖에서, 잠금으로 한 번에 하나씩
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import asyncio
+import contextlib
+import sqlite3
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS distributions (
+    message_id  INTEGER PRIMARY KEY,
+    guild_id    INTEGER NOT NULL,
+    channel_id  INTEGER NOT NULL,
+    creator_id  INTEGER NOT NULL,
+    mention_ids TEXT    NOT NULL,   -- 쉼표 구분 사용자 ID (순서 = 번호 이모지 순서)
+    received    INTEGER NOT NULL,   -- 수령 비트마스크 (i번째 비트 = i번째 대상자)
+    item        TEXT    NOT NULL,
+    created_at  TEXT    NOT NULL,   -- ISO 8601 (타임존 포함)
+    price       TEXT    NOT NULL,
+    flags       INTEGER NOT NULL DEFAULT 0   -- 비트 0: 버튼 수령 UI
+);
+CREATE TABLE IF NOT EXISTS opt_in_users (
+    user_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS user_dm (
+    user_id INTEGER PRIMARY KEY,
+    last_ts REAL NOT NULL           -- time.time() 기준
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,         -- 예: command_tree:global (슬래시 명령어 지문)
+    value TEXT NOT NULL
+);
+"""
+
+
+class StoredDistribution(NamedTuple):
+    message_id: int
+    guild_id: int
+    channel_id: int
+    creator_id: int
+    mention_ids: Tuple[int, ...]
+    received: int
+    item: str
+    created_at: datetime
+    price: str
+    flags: int = 0
+
+
+# 예전 스키마 DB에 없을 수 있는 컬럼 (이름, 정의)
+_MIGRATIONS = [
+    ("flags", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+# 버퍼 항목: 테이블별 키 -> 값 (None이면 삭제)
+_DELETE = None
+
+
+class DistributionStore:
+    """
+    put_*/delete_* 는 동기 함수이며 버퍼에 기록만 한다.
+    flush() 또는 start()로 띄운 주기 플러시가 실제 DB에 반영한다.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0, max_batch: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._conn: Optional[sqlite3.Connection] = None
+        self._dist_buf: Dict[int, Optional[StoredDistribution]] = {}
+        self._opt_buf: Dict[int, bool] = {}
+        self._dm_buf: Dict[int, float] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._kick: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # --------------- 열기/닫기 ---------------
+    def open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(distributions)")}
+        for name, decl in _MIGRATIONS:
+            if name not in cols:
+                conn.execute(f"ALTER TABLE distributions ADD COLUMN {name} {decl}")
+        self._conn = conn
+
+    def start(self):
+        """이벤트 루프 안에서 호출 (setup_hook)"""
+        self._lock = asyncio.Lock()
+        self._kick = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            # 플러시 중이었으면 스레드 쪽 트랜잭션이 끝날 때까지 기다린 뒤 마지막 플러시 (flush 참고)
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --------------- 부팅 시 적재 ---------------
+    def load_distributions(self) -> Dict[int, StoredDistribution]:
+        """메시지 ID -> 저장 행 (discord 객체 복원은 하지 않음)"""
+        assert self._conn is not None
+        rows = self._conn.execute(
+            "SELECT message_id, guild_id, channel_id, creator_id, mention_ids, received, item, created_at, price, flags"
+            " FROM distributions"
+        ).fetchall()
+        out: Dict[int, StoredDistribution] = {}
+        for r in rows:
+            mention_ids = tuple(int(x) for x in r[4].split(",") if x)
+            out[r[0]] = StoredDistribution(
+                r[0], r[1], r[2], r[3], mention_ids, r[5], r[6], datetime.fromisoformat(r[7]), r[8], r[9]
+            )
+        return out
+
+    def load_opt_in_users(self) -> Set[int]:
+        assert self._conn is not None
+        return {r[0] for r in self._conn.execute("SELECT user_id FROM opt_in_users")}
+
+    def load_user_dm(self) -> Dict[int, float]:
+        assert self._conn is not None
+        return {r[0]: r[1] for r in self._conn.execute("SELECT user_id, last_ts FROM user_dm")}
+
+    def prune_user_dm(self, before_ts: float) -> int:
+        """before_ts 이전 DM 기록 삭제 (부팅 시, 최소 간격이 지난 기록은 쓸모없음)"""
+        assert self._conn is not None
+        return self._conn.execute("DELETE FROM user_dm WHERE last_ts < ?", (before_ts,)).rowcount
+
+    # --------------- 메타 (드물게 쓰는 키-값, 버퍼 없이 바로 반영) ---------------
+    def get_meta(self, key: str) -> Optional[str]:
+        assert self._conn is not None
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    async def set_meta(self, key: str, value: str):
+        assert self._conn is not None
+        sql, args = "INSERT OR REPLACE INTO meta VALUES (?,?)", (key, value)
+        if self._lock is None:
+            self._conn.execute(sql, args)
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._conn.execute, sql, args)
+
+    # --------------- 쓰기 (버퍼) ---------------
+    def put_distribution(self, row: StoredDistribution):
+        self._dist_buf[row.message_id] = row
+        self._maybe_kick()
+
+    def delete_distribution(self, message_id: int):
+        self._dist_buf[message_id] = _DELETE
+        self._maybe_kick()
+
+    def set_opt_in(self, user_id: int, enabled: bool):
+        self._opt_buf[user_id] = enabled
+        self._maybe_kick()
+
+    def set_last_dm(self, user_id: int, ts: float):
+        self._dm_buf[user_id] = ts
+        self._maybe_kick()
+
+    @property
+    def pending(self) -> int:
+        return len(self._dist_buf) + len(self._opt_buf) + len(self._dm_buf)
+
+    def _maybe_kick(self):
+        # 버퍼가 많이 쌓였으면 주기를 기다리지 않고 플러시
+        if self._kick is not None and self.pending >= self.max_batch:
+            self._kick.set()
+
+    # --------------- 플러시 ---------------
+    async def _flush_loop(self):
+        assert self._kick is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._kick.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._kick.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[ERROR] 저장소 플러시 실패: {e}")
+
+    async def flush(self):
+        if self._conn is None:
+            # 메모리 전용으로 동작 중 (열기 실패): 쌓아둘 곳이 없으므로 버림
+            self._dist_buf.clear()
+            self._opt_buf.clear()
+            self._dm_buf.clear()
+            return
+        if not self.pending:
+            return
+        # 버퍼를 통째로 떼어낸 뒤 스레드에서 반영 (그동안 들어오는 쓰기는 새 버퍼로)
+        dist, self._dist_buf = self._dist_buf, {}
+        opt, self._opt_buf = self._opt_buf, {}
+        dm, self._dm_buf = self._dm_buf, {}
+        if self._lock is None:
+            self._write_batch(dist, opt, dm)
+            return
+        async with self._lock:
+            write = asyncio.ensure_future(asyncio.to_thread(self._write_batch, dist, opt, dm))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # 취소돼도 스레드는 같은 연결에서 BEGIN~COMMIT 중일 수 있다
+                # → 끝날 때까지 잠금을 쥔 채 기다린 뒤 취소를 전파 (다음 플러시/close가 끼어들지 않게)
+                await asyncio.wait([write])
+                if write.exception() is not None:
+                    self._restore(dist, opt, dm)
+                raise
+            except BaseException:
+                self._restore(dist, opt, dm)
+                raise
+
+    def _restore(self, dist: Dict[int, Optional[StoredDistribution]], opt: Dict[int, bool], dm: Dict[int, float]):
+        # 실패한 배치는 버퍼로 되돌림 (그 사이 들어온 더 새로운 값이 우선)
+        for k, v in dist.items():
+            self._dist_buf.setdefault(k, v)
+        for k, v in opt.items():
+            self._opt_buf.setdefault(k, v)
+        for k, v in dm.items():
+            self._dm_buf.setdefault(k, v)
+
+    def _write_batch(self, dist: Dict[int, Optional[StoredDistribution]], opt: Dict[int, bool], dm: Dict[int, float]):
+        assert self._conn is not None
+        upserts = [
+            (r.message_id, r.guild_id, r.channel_id, r.creator_id, ",".join(map(str, r.mention_ids)),
+             r.received, r.item, r.created_at.isoformat(), r.price, r.flags)
+            for r in dist.values() if r is not None
+        ]
+        deletes = [(mid,) for mid, r in dist.items() if r is None]
+        cur = self._conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            if upserts:
+                cur.executemany("INSERT OR REPLACE INTO distributions VALUES (?,?,?,?,?,?,?,?,?,?)", upserts)
+            if deletes:
+                cur.executemany("DELETE FROM distributions WHERE message_id = ?", deletes)
+            if opt:
+                cur.executemany("INSERT OR IGNORE INTO opt_in_users VALUES (?)", [(u,) for u, on in opt.items() if on])
+                cur.executemany("DELETE FROM opt_in_users WHERE user_id = ?", [(u,) for u, on in opt.items() if not on])
+            if dm:
+                cur.executemany("INSERT OR REPLACE INTO user_dm VALUES (?,?)", list(dm.items()))
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
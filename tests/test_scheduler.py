@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 쓰기 스케줄러 단위 테스트 (결정적)
+# - 가상 시계 이벤트 루프: loop.time()은 가상 시각, 잠들 일이 생기면 실제로 기다리지 않고 시각만 앞당김
+#   → sleep/call_later/레이트 대기가 즉시 끝나고, 실행 시각을 정확한 값으로 비교할 수 있음
+# - HTTP 오류는 status / retry_after / response.headers 만 가진 가짜 예외 (retry.py가 보는 속성)
+# - 확인: 레인 FIFO, 키 합치기/버리기, 재시도·데드레터·replay, 우선순위 aging, 승격 후 남은 준비 항목
+# 실행: python -m pytest -q
+# ------------------------------------------------------------
+
+import asyncio
+import os
+import selectors
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from retry import RetryPolicy  # noqa: E402
+from scheduler import BULK, INTERACTIVE, NORMAL, WriteScheduler  # noqa: E402
+
+
+# ================== 가상 시계 ==================
+class _VirtualSelector:
+    """select(timeout)을 기다리지 않고, 준비된 I/O가 없으면 루프 시각을 timeout만큼 앞당긴다"""
+
+    def __init__(self, inner: selectors.BaseSelector, loop: "VirtualClockLoop"):
+        self._inner = inner
+        self._loop = loop
+
+    def select(self, timeout=None):
+        events = self._inner.select(0)
+        if not events and timeout:
+            # 부동소수 오차 정리 (기한을 1e-12 차이로 못 넘어 한 바퀴 더 도는 일 방지)
+            self._loop.now = round(self._loop.now + timeout, 9)
+        elif not events and timeout is None:
+            raise RuntimeError("가상 시계: 예약된 타이머 없이 무한 대기 (교착)")
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self.now = 0.0
+        super().__init__(_VirtualSelector(selectors.DefaultSelector(), self))
+
+    def time(self) -> float:
+        return self.now
+
+
+def run(main):
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+# ================== 도우미 ==================
+class FakeHTTPError(Exception):
+    def __init__(self, status: int, retry_after=None, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        if retry_after is not None:
+            self.retry_after = retry_after
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def make_scheduler(**kwargs) -> WriteScheduler:
+    # 지터 없는 재시도 (대기 시간 = 서버 힌트 그대로 / 지수 백오프의 절반)
+    kwargs.setdefault("retry", RetryPolicy(max_attempts=3, base=1.0, rng=lambda: 0.0))
+    kwargs.setdefault("max_concurrency", 4)
+    sched = WriteScheduler(rate=1000.0, burst=1000, **kwargs)
+    sched.start()
+    return sched
+
+
+def recorder(log: list):
+    """job(name, seconds): 실행 시작 시 (name, 시각)을 기록하고 seconds만큼 걸리는 작업"""
+    def job(name: str, seconds: float = 0.0):
+        async def factory():
+            log.append((name, asyncio.get_running_loop().time()))
+            if seconds:
+                await asyncio.sleep(seconds)
+        return factory
+    return job
+
+
+def names(log: list) -> list:
+    return [name for name, _ in log]
+
+
+# ================== 레인 FIFO ==================
+def test_lane_runs_jobs_in_submit_order():
+    async def main():
+        sched = make_scheduler()
+        log: list = []
+        job = recorder(log)
+        # 뒤에 등록한 작업일수록 짧아도 같은 레인 안에서는 앞지르지 못함
+        for i in range(5):
+            sched.submit("a", job(f"a{i}", 5 - i))
+            sched.submit("b", job(f"b{i}", 1))
+        await sched.drain(60)
+        await sched.close()
+        return log
+
+    log = run(main)
+    assert [n for n in names(log) if n[0] == "a"] == ["a0", "a1", "a2", "a3", "a4"]
+    assert [n for n in names(log) if n[0] == "b"] == ["b0", "b1", "b2", "b3", "b4"]
+    # 레인끼리는 병렬: b는 a를 기다리지 않음
+    assert dict(log)["b1"] == 1.0
+    assert dict(log)["a1"] == 5.0
+
+
+def test_lane_delay_spaces_lane_without_holding_slot():
+    async def main():
+        sched = make_scheduler(max_concurrency=1, lane_delay=lambda: 1.0)
+        log: list = []
+        job = recorder(log)
+        sched.submit("a", job("a1"))
+        sched.submit("a", job("a2"))
+        sched.submit("b", job("b1"))
+        await sched.drain(60)
+        await asyncio.sleep(2)
+        await sched.close()
+        return log
+
+    log = run(main)
+    # a는 작업 사이 1초 쉬지만, 쉬는 동안 슬롯 1개는 b가 바로 씀
+    assert log == [("a1", 0.0), ("b1", 0.0), ("a2", 1.0)]
+
+
+# ================== 합치기 / 버리기 ==================
+def test_same_key_replaces_queued_job_and_keeps_position():
+    async def main():
+        sched = make_scheduler()
+        log: list = []
+        job = recorder(log)
+        sched.submit("m", job("busy", 1))
+        sched.submit("m", job("edit-1"), key="edit")
+        sched.submit("m", job("after"))
+        sched.submit("m", job("edit-2"), key="edit")
+        await sched.drain(60)
+        await sched.close()
+        return sched, log
+
+    sched, log = run(main)
+    assert names(log) == ["busy", "edit-2", "after"]
+    assert sched.coalesced == 1
+    assert sched.completed == 3
+
+
+def test_discard_drops_queued_job():
+    async def main():
+        sched = make_scheduler()
+        log: list = []
+        job = recorder(log)
+        sched.submit("m", job("busy", 1))
+        sched.submit("m", job("edit"), key="edit")
+        sched.submit("m", job("delete"), key="delete")
+        assert sched.discard("edit")
+        assert not sched.discard("edit")
+        await sched.drain(60)
+        await sched.close()
+        return sched, log
+
+    sched, log = run(main)
+    assert names(log) == ["busy", "delete"]
+    assert sched.depth == 0
+
+
+def test_key_is_free_again_once_job_started():
+    async def main():
+        sched = make_scheduler()
+        log: list = []
+        job = recorder(log)
+        sched.submit("m", job("edit-1", 1), key="edit")
+        await asyncio.sleep(0.5)
+        sched.submit("m", job("edit-2"), key="edit")
+        await sched.drain(60)
+        await sched.close()
+        return sched, log
+
+    sched, log = run(main)
+    assert names(log) == ["edit-1", "edit-2"]
+    assert sched.coalesced == 0
+
+
+# ================== 재시도 / 데드레터 ==================
+def test_429_retries_after_hint_then_succeeds():
+    async def main():
+        sched = make_scheduler()
+        attempts: list = []
+
+        async def flaky():
+            attempts.append(asyncio.get_running_loop().time())
+            if len(attempts) <= 2:
+                raise FakeHTTPError(429, retry_after=2.0)
+
+        sched.submit("c", flaky)
+        await sched.drain(60)
+        await sched.close()
+        return sched, attempts
+
+    sched, attempts = run(main)
+    assert attempts == [0.0, 2.0, 4.0]
+    assert (sched.retried, sched.rate_limited, sched.completed, sched.failed) == (2, 2, 1, 0)
+    assert len(sched.dead_letters) == 0
+
+
+def test_retry_header_is_used_when_no_retry_after_attribute():
+    async def main():
+        sched = make_scheduler()
+        attempts: list = []
+
+        async def flaky():
+            attempts.append(asyncio.get_running_loop().time())
+            if len(attempts) == 1:
+                raise FakeHTTPError(503, headers={"Retry-After": "1.5"})
+
+        sched.submit("c", flaky)
+        await sched.drain(60)
+        await sched.close()
+        return attempts
+
+    assert run(main) == [0.0, 1.5]
+
+
+def test_retry_holds_lane_order():
+    async def main():
+        sched = make_scheduler()
+        log: list = []
+        job = recorder(log)
+        failed = []
+
+        async def first():
+            log.append(("first", asyncio.get_running_loop().time()))
+            if not failed:
+                failed.append(True)
+                raise FakeHTTPError(500, retry_after=3.0)
+
+        sched.submit("c", first)
+        sched.submit("c", job("second"))
+        sched.submit("other", job("other"))
+        await sched.drain(60)
+        await sched.close()
+        return log
+
+    log = run(main)
+    assert names(log) == ["first", "other", "first", "second"]
+    assert dict(log)["second"] == 3.0
+
+
+def test_exhausted_retries_go_to_dead_letters_and_replay():
+    async def main():
+        sched = make_scheduler()
+        state = {"down": True, "calls": 0}
+
+        async def down():
+            state["calls"] += 1
+            if state["down"]:
+                raise FakeHTTPError(503)
+
+        sched.submit("c", down, name="down")
+        await sched.drain(60)
+        letters = sched.dead_letters.list()
+        failed_calls = state["calls"]
+
+        state["down"] = False
+        replayed = sched.replay()
+        await sched.drain(60)
+        await sched.close()
+        return sched, letters, failed_calls, replayed, state
+
+    sched, letters, failed_calls, replayed, state = run(main)
+    assert failed_calls == 3   # max_attempts
+    assert [(l.name, l.attempts) for l in letters] == [("down", 3)]
+    assert "503" in letters[0].error
+    assert replayed == 1
+    assert state["calls"] == 4
+    assert sched.failed == 1 and sched.completed == 1
+    assert len(sched.dead_letters) == 0
+
+
+def test_replay_does_not_overwrite_newer_queued_job():
+    async def main():
+        sched = make_scheduler()
+        log: list = []
+        job = recorder(log)
+
+        async def old_edit():
+            log.append(("old", asyncio.get_running_loop().time()))
+            raise FakeHTTPError(503)
+
+        sched.submit("m", old_edit, key="edit")
+        await sched.drain(60)
+        sched.submit("m", job("busy", 1))
+        sched.submit("m", job("new"), key="edit")
+        replayed = sched.replay()
+        await sched.drain(60)
+        await sched.close()
+        return sched, log, replayed
+
+    sched, log, replayed = run(main)
+    assert replayed == 0
+    assert names(log) == ["old", "old", "old", "busy", "new"]
+    assert len(sched.dead_letters) == 0
+
+
+def test_replaced_content_of_retrying_job_gets_fresh_attempts():
+    async def main():
+        sched = make_scheduler()
+        calls = {"old": 0, "new": 0}
+
+        async def old():
+            calls["old"] += 1
+            raise FakeHTTPError(429, retry_after=1.0)
+
+        async def new():
+            calls["new"] += 1
+            if calls["new"] == 1:
+                raise FakeHTTPError(429, retry_after=1.0)
+
+        sched.submit("m", old, key="edit")
+        await asyncio.sleep(1.5)   # 2번째 시도 실패 후 재시도 대기 중 (2/3)
+        sched.submit("m", new, key="edit")
+        await sched.drain(60)
+        await sched.close()
+        return sched, calls
+
+    sched, calls = run(main)
+    # 새 내용은 1번 실패해도 데드레터로 가지 않고 재시도해서 성공
+    assert calls == {"old": 2, "new": 2}
+    assert (sched.completed, sched.failed) == (1, 0)
+
+
+def test_permanent_error_is_not_retried():
+    async def main():
+        sched = make_scheduler()
+        calls: list = []
+
+        async def gone():
+            calls.append(1)
+            raise FakeHTTPError(404)
+
+        sched.submit("c", gone)
+        await sched.drain(60)
+        await sched.close()
+        return sched, calls
+
+    sched, calls = run(main)
+    assert len(calls) == 1
+    assert (sched.failed, sched.retried) == (1, 0)
+    assert len(sched.dead_letters) == 0
+
+
+def test_discarded_while_parked_is_not_retried():
+    async def main():
+        sched = make_scheduler()
+        calls: list = []
+
+        async def edit():
+            calls.append(asyncio.get_running_loop().time())
+            raise FakeHTTPError(429, retry_after=5.0)
+
+        sched.submit("m", edit, key="edit")
+        await asyncio.sleep(1)
+        assert sched.discard("edit")
+        await sched.drain(60)
+        await sched.close()
+        return sched, calls
+
+    sched, calls = run(main)
+    assert calls == [0.0]
+    assert sched.depth == 0
+
+
+# ================== 우선순위 / aging ==================
+def interactive_flood(sched: WriteScheduler, job, n: int):
+    for i in range(n):
+        sched.submit(("i", i), job(f"i{i}", 1), priority=INTERACTIVE)
+
+
+def test_higher_class_runs_first_without_aging():
+    async def main():
+        sched = make_scheduler(max_concurrency=1, aging=100.0)
+        log: list = []
+        job = recorder(log)
+        sched.submit("bulk", job("bulk"), priority=BULK)
+        sched.submit("normal", job("normal"), priority=NORMAL)
+        interactive_flood(sched, job, 3)
+        await sched.drain(60)
+        await sched.close()
+        return log
+
+    assert names(run(main)) == ["i0", "i1", "i2", "normal", "bulk"]
+
+
+def test_aged_bulk_lane_runs_despite_interactive_load():
+    async def main():
+        sched = make_scheduler(max_concurrency=1, aging=3.0)
+        log: list = []
+        job = recorder(log)
+        sched.submit("bulk", job("bulk"), priority=BULK)
+        interactive_flood(sched, job, 10)
+        await sched.drain(60)
+        await sched.close()
+        return log
+
+    log = run(main)
+    # 1초짜리 interactive가 0,1,2초에 시작 → 3초에 bulk가 aging을 넘겨 먼저 나감
+    assert names(log)[:4] == ["i0", "i1", "i2", "bulk"]
+    assert dict(log)["bulk"] == 3.0
+
+
+def test_stale_ready_entry_does_not_age_requeued_lane():
+    """승격 전 BULK 준비 항목이 남아 있어도, 나중에 다시 BULK로 준비된 레인은 새 시각으로 aging"""
+    async def main():
+        sched = make_scheduler(max_concurrency=1, aging=10.0)
+        log: list = []
+        job = recorder(log)
+        sched.submit("x", job("x", 5), priority=INTERACTIVE)
+        await asyncio.sleep(0)
+        # t=0: b1(BULK) 뒤에 L의 BULK 준비 항목 → L 승격으로 그 항목은 예전 것이 됨
+        sched.submit("b1", job("b1", 10), priority=BULK)
+        sched.submit("L", job("a"), priority=BULK)
+        sched.submit("L", job("b"), priority=INTERACTIVE)
+        # t=5: L(a, b) → b1(10초) 순으로 실행. b1 실행 중 t=7에 L이 다시 BULK로 준비
+        await asyncio.sleep(7)
+        sched.submit("L", job("c"), priority=BULK)
+        sched.submit("y", job("y"), priority=INTERACTIVE)
+        await sched.drain(60)
+        await sched.close()
+        return log
+
+    log = run(main)
+    # t=15: c는 8초 기다렸을 뿐 (aging 10초 미만) → interactive y가 먼저
+    assert names(log) == ["x", "a", "b", "b1", "y", "c"]
+    assert dict(log)["y"] == 15.0
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------
+# 지연 작업 스케줄러 (힙 기반)
+# - "N초 뒤 삭제" 같은 지연 작업을 쓰기 큐 밖에서 보관
+# - 기한이 된 작업만 콜백으로 꺼내 큐에 등록 → 큐 워커가 sleep으로 막히지 않음
+# - 개별 취소 / 그룹(예: 분배 메시지 ID) 단위 취소·즉시 실행 지원
+# - 타이머 핸들은 가장 이른 기한 1개만 이벤트 루프에 걸어둔다
+# Python 3.9 호환을 위해 typing.Optional 사용 (PEP604 X)
+# ------------------------------------------------------------
+
+import asyncio
+import heapq
+import itertools
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+
+class DelayedAction:
+    """힙 항목. cancel 시 힙에서 바로 빼지 않고 표시만 해두었다가 꺼낼 때 버린다."""
+    __slots__ = ("deadline", "seq", "callback", "group", "cancelled")
+
+    def __init__(self, deadline: float, seq: int, callback: Callable[[], None], group: Optional[Hashable]):
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.group = group
+        self.cancelled = False
+
+    def __lt__(self, other: "DelayedAction") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class DelayedActions:
+    """
+    call_later(delay, callback, group=None) 로 등록하면 기한에 callback()을 1회 호출.
+    callback은 동기 함수여야 하며, 보통 스케줄러에 작업을 submit 하는 용도로 쓴다.
+    (코루틴 객체를 미리 만들지 않으므로 취소해도 'never awaited' 경고가 없다)
+    반드시 이벤트 루프 안에서 start() 할 것 (setup_hook).
+    """
+
+    def __init__(self):
+        self._heap: List[DelayedAction] = []
+        self._seq = itertools.count()
+        self._groups: Dict[Hashable, Set[DelayedAction]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._armed_at: Optional[float] = None
+        self._live = 0
+
+    def __len__(self) -> int:
+        """취소되지 않은 대기 작업 수"""
+        return self._live
+
+    # --------------- 수명주기 ---------------
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._arm()
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._heap.clear()
+        self._groups.clear()
+        self._live = 0
+
+    # --------------- 등록/취소 ---------------
+    def call_later(self, delay: float, callback: Callable[[], None], group: Optional[Hashable] = None) -> DelayedAction:
+        assert self._loop is not None
+        action = DelayedAction(self._loop.time() + max(0.0, delay), next(self._seq), callback, group)
+        heapq.heappush(self._heap, action)
+        self._live += 1
+        if group is not None:
+            self._groups.setdefault(group, set()).add(action)
+        self._arm()
+        return action
+
+    def cancel(self, action: DelayedAction) -> bool:
+        if action.cancelled:
+            return False
+        action.cancelled = True
+        self._live -= 1
+        self._forget_group(action)
+        return True
+
+    def cancel_group(self, group: Hashable) -> List[Callable[[], None]]:
+        """그룹의 대기 작업을 모두 취소하고 콜백 목록(기한 순)을 돌려준다."""
+        actions = sorted(self._groups.pop(group, ()))
+        for a in actions:
+            a.group = None
+            self.cancel(a)
+        return [a.callback for a in actions]
+
+    def fire_group(self, group: Hashable) -> int:
+        """그룹의 대기 작업을 기한을 기다리지 않고 지금 실행한다."""
+        callbacks = self.cancel_group(group)
+        for cb in callbacks:
+            self._invoke(cb)
+        return len(callbacks)
+
+    # --------------- 내부 ---------------
+    def _forget_group(self, action: DelayedAction):
+        if action.group is None:
+            return
+        members = self._groups.get(action.group)
+        if members is not None:
+            members.discard(action)
+            if not members:
+                del self._groups[action.group]
+
+    def _arm(self):
+        """가장 이른 기한에 맞춰 타이머 핸들 1개만 유지"""
+        if self._loop is None:
+            return
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        deadline = self._heap[0].deadline
+        if self._handle is not None and self._armed_at is not None and self._armed_at <= deadline:
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+        self._armed_at = deadline
+        self._handle = self._loop.call_at(deadline, self._fire_due)
+
+    def _fire_due(self):
+        assert self._loop is not None
+        self._handle = None
+        self._armed_at = None
+        now = self._loop.time()
+        while self._heap and self._heap[0].deadline <= now:
+            action = heapq.heappop(self._heap)
+            if action.cancelled:
+                continue
+            action.cancelled = True
+            self._live -= 1
+            self._forget_group(action)
+            self._invoke(action.callback)
+        self._arm()
+
+    @staticmethod
+    def _invoke(callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[ERROR] 지연 작업 실행 실패: {e}")